@@ -3,6 +3,7 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Permission, PermissionsMixin
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinLengthValidator
 from django.db import models
 
@@ -116,6 +117,8 @@ class CustomUser(AbstractUser, PermissionsMixin):
 
     # email field tracker
     email_tracker = FieldTracker(fields=['email'])
+    # tracker of the fields that are shown with realty of the user (see `realty.signals`)
+    host_data_tracker = FieldTracker(fields=['email', 'first_name', 'last_name', 'is_email_confirmed'])
 
     class Meta:
         verbose_name = 'user'
@@ -168,6 +171,14 @@ class Profile(models.Model):
         upload_to=get_profile_image_upload_path,
         default=get_default_profile_image,
     )
+    # keys of the generated renditions, e.g. 300x200 and 300x200.webp (see `main.services`)
+    profile_image_renditions = ArrayField(
+        models.CharField(max_length=32),
+        verbose_name='profile image renditions',
+        default=list,
+        blank=True,
+        editable=False,
+    )
     date_of_birth = models.DateField(
         verbose_name='date of birth',
         blank=True,
@@ -199,6 +210,15 @@ class Profile(models.Model):
         on_delete=models.CASCADE,
     )
 
+    # profile image field tracker
+    profile_image_tracker = FieldTracker(fields=['profile_image'])
+    # tracker of the fields that are shown with realty of the user (see `realty.signals`)
+    host_data_tracker = FieldTracker(
+        fields=[
+            'profile_image', 'date_of_birth', 'gender', 'phone_number', 'is_phone_number_confirmed', 'description',
+        ],
+    )
+
     class Meta:
         verbose_name = 'profile'
         verbose_name_plural = 'profiles'
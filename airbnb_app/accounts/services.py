@@ -17,6 +17,9 @@ from common.services import is_cooldown_ended, set_key_with_timeout
 from common.tasks import send_sms_by_twilio
 from configs.redis_conf import redis_instance
 from mailings.services import send_email_with_attachments
+from main.services import (
+    DirectUpload, create_direct_image_upload, is_direct_image_upload_completed, is_direct_upload_enabled,
+)
 
 from .jwt import UserEmailRefreshToken
 from .models import (
@@ -124,6 +127,32 @@ def has_user_profile_image(user_profile: Profile) -> bool:
     return False
 
 
+def is_profile_image_direct_upload_enabled() -> bool:
+    return is_direct_upload_enabled(Profile._meta.get_field('profile_image').storage)
+
+
+def create_profile_image_upload(profile: Profile, content_type: str) -> DirectUpload:
+    """Create a presigned POST, that uploads a new profile image directly to the storage."""
+    return create_direct_image_upload(profile, 'profile_image', content_type)
+
+
+def confirm_profile_image_upload(profile: Profile, image_name: str) -> bool:
+    """Set the image that has been uploaded directly to the storage as a profile image.
+
+    Renditions of the image are scheduled by the `post_save` signal, as for the images uploaded with the form.
+
+    Returns:
+        bool: whether the profile image has been changed, False if the image has already been confirmed
+    """
+    if not is_direct_image_upload_completed(profile, 'profile_image', image_name):
+        return False
+    if Profile.objects.filter(profile_image=image_name).exists():
+        return False
+    profile.profile_image = image_name
+    profile.save(update_fields=['profile_image'])
+    return True
+
+
 def generate_random_sms_code() -> str:
     """Generates random 4 digits code (0000-9999)."""
     return str(random.randint(0, 9999)).zfill(4)
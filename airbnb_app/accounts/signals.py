@@ -3,9 +3,10 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from common.decorators import disable_for_loaddata
+from main.services import schedule_image_renditions
 from subscribers.services import set_user_for_subscriber, update_email_for_subscriber_by_user
 
-from .models import Profile
+from .models import Profile, get_default_profile_image
 from .services import add_user_to_group
 
 
@@ -25,3 +26,12 @@ def update_profile(sender, instance: settings.AUTH_USER_MODEL, created, **kwargs
     if not created:
         update_email_for_subscriber_by_user(user=instance)
         instance.profile.save()
+
+
+@receiver(post_save, sender=Profile)
+@disable_for_loaddata
+def generate_profile_image_renditions(sender, instance: Profile, created, **kwargs):
+    # default image is shared by all profiles, so it doesn't have renditions and is linked as is
+    is_default_image = instance.profile_image.name == get_default_profile_image()
+    if not is_default_image and (created or instance.profile_image_tracker.has_changed('profile_image')):
+        schedule_image_renditions(instance, 'profile_image')
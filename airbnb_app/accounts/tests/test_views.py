@@ -1,3 +1,4 @@
+import json
 import re
 import shutil
 import tempfile
@@ -6,14 +7,15 @@ from unittest import mock
 import fakeredis
 
 from django.core import mail
+from django.core.files.base import ContentFile
 from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse, reverse_lazy
 
-from accounts.models import CustomUser, SMSLog
+from accounts.models import CustomUser, Profile, SMSLog
 from addresses.models import Address
 from common.collections import TwilioShortPayload
 from common.constants import VERIFICATION_CODE_STATUS_DELIVERED
-from common.testing_utils import create_invalid_image, create_valid_image
+from common.testing_utils import create_invalid_image, create_local_s3_storage, create_valid_image
 from hosts.models import RealtyHost
 from hosts.services import get_host_or_none_by_user
 from realty.models import Realty
@@ -58,6 +60,8 @@ class SignUpViewTests(TestCase):
         response = self.client.get(reverse('accounts:signup'))
         self.assertIsInstance(response.context['form'], SignUpForm)
 
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(charset="utf-8", decode_responses=True))
     def test_redirect_if_logged_in(self):
         """Test that an authenticated user is redirected to the home page."""
         self.client.login(username='user1@gmail.com', password='test')
@@ -140,6 +144,8 @@ class LoginViewTests(TestCase):
         response = self.client.get(reverse('accounts:login'))
         self.assertEqual(response.status_code, 200)
 
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(charset="utf-8", decode_responses=True))
     def test_redirect_if_logged_in(self):
         """Test that an authenticated user is redirected to the home page."""
         self.client.login(email='user1@gmail.com', password='test')
@@ -712,6 +718,82 @@ class ProfileImageEditViewTests(TestCase):
         self.assertFalse(response.context['profile_image_form'].is_valid())
 
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DIRECT_UPLOADS_ENABLED=True)
+class ProfileImageDirectUploadViewsTests(TestCase):
+    def setUp(self) -> None:
+        CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)  # delete temp media dir
+        super().tearDownClass()
+
+    def test_upload_image(self):
+        """User gets a presigned POST for uploading a profile image directly to the storage."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        with mock.patch.object(Profile._meta.get_field('profile_image'), 'storage', create_local_s3_storage()):
+            response = self.client.post(
+                path=reverse('accounts:edit_image_upload'),
+                data=json.dumps({'content_type': 'image/png'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['name'].startswith('upload/users/user1@gmail.com/profile/'))
+
+    def test_upload_image_s3_disabled(self):
+        """Direct uploads are available for S3 storages only."""
+        self.client.login(email='user1@gmail.com', password='test')
+        response = self.client.post(
+            path=reverse('accounts:edit_image_upload'),
+            data=json.dumps({'content_type': 'image/png'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch('accounts.views.is_profile_image_direct_upload_enabled', return_value=True)
+    def test_confirm_image_upload(self, *args):
+        """Profile image is changed once the image has been uploaded to the storage (local stand-in of the bucket)."""
+        test_user = CustomUser.objects.get(email='user1@gmail.com')
+        self.client.login(email='user1@gmail.com', password='test')
+        image_name = f"upload/users/{test_user.email}/profile/image.png"
+
+        response = self.client.post(
+            path=reverse('accounts:edit_image_upload_confirm'),
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+        storage = Profile._meta.get_field('profile_image').storage
+        storage.save(image_name, ContentFile(create_valid_image('image.png').read()))
+        response = self.client.post(
+            path=reverse('accounts:edit_image_upload_confirm'),
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        test_user.profile.refresh_from_db()
+        self.assertEqual(test_user.profile.profile_image.name, image_name)
+        self.assertEqual(response.json(), {'url': test_user.profile.profile_image.url})
+
+        # image can't be confirmed twice
+        response = self.client.post(
+            path=reverse('accounts:edit_image_upload_confirm'),
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
 class ProfileDescriptionEditViewTests(TestCase):
     def setUp(self) -> None:
         CustomUser.objects.create_user(
@@ -38,6 +38,8 @@ urlpatterns = [
 
     path('show/<int:user_pk>/', views.ProfileShowView.as_view(), name='profile_show'),
     path('edit-image/', views.ProfileImageEditView.as_view(), name='edit_image'),
+    path('edit-image/upload/', views.ProfileImageUploadView.as_view(), name='edit_image_upload'),
+    path('edit-image/upload/confirm/', views.ProfileImageUploadConfirmView.as_view(), name='edit_image_upload_confirm'),
     path('edit-description/', views.ProfileDescriptionEditView.as_view(), name='edit_description'),
 
     # password change urls
@@ -1,9 +1,11 @@
+from braces.views import JsonRequestResponseMixin
+
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.sites.shortcuts import get_current_site
-from django.http import HttpRequest
+from django.http import Http404, HttpRequest
 from django.shortcuts import redirect, reverse
 from django.urls import reverse_lazy
 from django.views import generic
@@ -28,10 +30,11 @@ from .forms import (
 from .mixins import AnonymousUserRequiredMixin, UnconfirmedEmailRequiredMixin, UnconfirmedPhoneNumberRequiredMixin
 from .models import CustomUser, Profile
 from .services import (
-    create_jwt_token_for_user_with_additional_fields, get_phone_code_status_by_user_id, get_user_by_pk,
-    get_user_from_uid, get_verification_code_from_digits_dict, handle_phone_number_change,
-    is_verification_code_for_profile_valid, send_verification_link, set_phone_code_status_by_user_id,
-    update_phone_number_confirmation_status, update_user_email_confirmation_status,
+    confirm_profile_image_upload, create_jwt_token_for_user_with_additional_fields, create_profile_image_upload,
+    get_phone_code_status_by_user_id, get_user_by_pk, get_user_from_uid, get_verification_code_from_digits_dict,
+    handle_phone_number_change, is_profile_image_direct_upload_enabled, is_verification_code_for_profile_valid,
+    send_verification_link, set_phone_code_status_by_user_id, update_phone_number_confirmation_status,
+    update_user_email_confirmation_status,
 )
 from .tokens import account_activation_token
 
@@ -264,6 +267,7 @@ class ProfileImageEditView(
         return self.render_to_response(
             context={
                 'profile_image_form': self.profile_image_form,
+                'is_direct_upload_enabled': is_profile_image_direct_upload_enabled(),
             },
         )
 
@@ -274,6 +278,58 @@ class ProfileImageEditView(
         return self.render_to_response(
             context={
                 'profile_image_form': self.profile_image_form,
+                'is_direct_upload_enabled': is_profile_image_direct_upload_enabled(),
+            },
+        )
+
+
+class ProfileImageDirectUploadMixin:
+    """Mixin for views of the direct (browser -> storage) upload of a profile image."""
+
+    def dispatch(self, request: AuthenticatedHttpRequest, *args, **kwargs):
+        if not is_profile_image_direct_upload_enabled():
+            raise Http404
+        return super(ProfileImageDirectUploadMixin, self).dispatch(request, *args, **kwargs)
+
+
+class ProfileImageUploadView(
+    LoginRequiredMixin,
+    ProfileImageDirectUploadMixin,
+    JsonRequestResponseMixin,
+    generic.View,
+):
+    """View for issuing a presigned POST, that uploads a profile image directly to the storage."""
+
+    require_json = True
+
+    def post(self, request: AuthenticatedHttpRequest, *args, **kwargs):
+        try:
+            direct_upload = create_profile_image_upload(
+                request.user.profile,
+                content_type=self.request_json.get('content_type'),
+            )
+        except ValueError as error:
+            return self.render_bad_request_response({'errors': [str(error)]})
+        return self.render_json_response(context_dict=direct_upload._asdict())
+
+
+class ProfileImageUploadConfirmView(
+    LoginRequiredMixin,
+    ProfileImageDirectUploadMixin,
+    JsonRequestResponseMixin,
+    generic.View,
+):
+    """View for changing a profile image to the one, that has been uploaded directly to the storage."""
+
+    require_json = True
+
+    def post(self, request: AuthenticatedHttpRequest, *args, **kwargs):
+        profile: Profile = request.user.profile
+        if not confirm_profile_image_upload(profile, image_name=str(self.request_json.get('name', ''))):
+            return self.render_bad_request_response({'errors': ['Image has not been uploaded']})
+        return self.render_json_response(
+            context_dict={
+                'url': profile.profile_image.url,
             },
         )
 
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:28
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0004_auto_20210327_1837'),
+        # `pg_trgm` extension
+        ('realty', '0015_enable_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['city'], name='address_city_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from model_utils import FieldTracker
+
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.text import slugify
 
@@ -11,9 +14,15 @@ class Address(models.Model):
     city_slug = models.SlugField(verbose_name='city slug', max_length=255)
     country_slug = models.SlugField(verbose_name='country slug', max_length=255)
 
+    city_tracker = FieldTracker(fields=['city_slug'])
+
     class Meta:
         verbose_name = 'address'
         verbose_name_plural = 'addresses'
+        indexes = [
+            # fuzzy realty search by city, see `get_available_realty_fuzzy_search_results()`
+            GinIndex(fields=['city'], name='address_city_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f"Address #{self.id}"
@@ -39,6 +39,34 @@ app.conf.beat_schedule = {
             'queue': 'default',
         },
     },
+    'roll_up_realty_visits_stats_from_redis': {
+        'task': 'realty.tasks.roll_up_realty_visits_stats_from_redis',
+        'schedule': crontab(minute=5),  # every hour at **:05
+        'options': {
+            'queue': 'default',
+        },
+    },
+    'decay_realty_cities_popularity': {
+        'task': 'realty.tasks.decay_realty_cities_popularity',
+        'schedule': crontab(hour=3, minute=0),  # every day at 3:00 a.m.
+        'options': {
+            'queue': 'default',
+        },
+    },
+    'reconcile_cached_available_realty_count_by_city': {
+        'task': 'realty.tasks.reconcile_cached_available_realty_count_by_city',
+        'schedule': crontab(hour=4, minute=0),  # every day at 4:00 a.m.
+        'options': {
+            'queue': 'default',
+        },
+    },
+    'refresh_realty_materialized_view': {
+        'task': 'realty.tasks.refresh_realty_materialized_view',
+        'schedule': crontab(minute='*/10'),  # every 10 minutes, picks up changes without signals (e.g. visits)
+        'options': {
+            'queue': 'default',
+        },
+    },
     'email_subscribers_about_latest_realty': {
         'task': 'subscribers.tasks.email_subscribers_about_latest_realty',
         'schedule': crontab(day_of_week=5, hour=18, minute=0),  # every Friday at 6:00 p.m.
@@ -1,5 +1,5 @@
 import os
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List
 
@@ -427,3 +427,50 @@ CKEDITOR_CONFIGS = {
         ]),
     },
 }
+
+
+# VISITS
+# requests with a matching User-Agent (case-insensitive regex) aren't counted as realty visits
+VISITS_BOT_USER_AGENT_REGEX = os.environ.get(
+    'VISITS_BOT_USER_AGENT_REGEX',
+    r"bot|crawl|spider|slurp|facebookexternalhit|embedly|preview|headless|python-requests|curl|wget",
+)
+
+
+# RELEASE
+# version of the deployed code, part of the ETags (see `common.mixins.ConditionalGetMixin`) and page cache keys
+RELEASE_VERSION = os.environ.get('RELEASE_VERSION', '')
+# start date of the running code, responses aren't reported as modified earlier, so they are revalidated after deploys
+RELEASE_DATE = datetime.now(tz=timezone.utc)
+
+
+# PAGE CACHE
+# rendered pages of anonymous users are cached (see `common.mixins.AnonymousPageCacheMixin`)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+
+
+# PAGINATION
+# planner estimations of the large paginated querysets are cached (see `common.pagination`)
+PAGINATION_ESTIMATED_COUNT_CACHE_ENABLED = os.environ.get('PAGINATION_ESTIMATED_COUNT_CACHE_ENABLED', '1') == '1'
+
+
+# REALTY FACETS
+# counts of the realty filters are cached per city and filters (see `realty.services.facets`)
+REALTY_FACETS_CACHE_ENABLED = os.environ.get('REALTY_FACETS_CACHE_ENABLED', '1') == '1'
+
+
+# REALTY MATERIALIZED VIEW
+# realty lists, search, sitemap and export read from the materialized `realty_view` (see `realty.models.RealtyView`)
+REALTY_VIEW_ENABLED = os.environ.get('REALTY_VIEW_ENABLED', '1') == '1'
+
+
+# IMAGE RENDITIONS
+# all sizes of the uploaded images are generated by Celery, only generated sizes are linked (see `main.services`)
+IMAGE_RENDITIONS_ENABLED = os.environ.get('IMAGE_RENDITIONS_ENABLED', '1') == '1'
+# WebP renditions are generated (and linked in `<picture>`), Pillow has to be built with WebP support
+IMAGE_RENDITIONS_WEBP_ENABLED = os.environ.get('IMAGE_RENDITIONS_WEBP_ENABLED', '0') == '1'
+
+
+# DIRECT UPLOADS
+# images are uploaded by the browser straight to the S3 bucket with a presigned POST (see `main.services`)
+DIRECT_UPLOADS_ENABLED = os.environ.get('DIRECT_UPLOADS_ENABLED', '1') == '1'
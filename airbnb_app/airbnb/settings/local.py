@@ -24,6 +24,7 @@ YANDEX_STORAGE_CUSTOM_DOMAIN = None
 MEDIA_URL = os.environ.get('MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / 'airbnb/media/'
 RESIZED_MEDIA_URL = '/resized/'
+RESIZED_MEDIA_ROOT = BASE_DIR / 'airbnb/resized/'
 
 # DEBUG TOOLBAR
 DEBUG_TOOLBAR_CONFIG = {
@@ -51,7 +51,8 @@ if USE_S3_BUCKET:
     # Yandex Object Storage settings
     YANDEX_STORAGE_CUSTOM_DOMAIN = os.environ.get("YANDEX_STORAGE_CUSTOM_DOMAIN")
     DEFAULT_FILE_STORAGE = 'storage_backends.YandexObjectMediaStorage'
-    AWS_S3_ENDPOINT_URL = 'https://storage.yandexcloud.net'
+    # can be pointed to a local S3 compatible storage (e.g. MinIO)
+    AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL', 'https://storage.yandexcloud.net')
     AWS_S3_REGION_NAME = 'ru-central1'
 
     # Media settings
@@ -63,6 +64,8 @@ else:
     # MEDIA
     MEDIA_URL = os.environ.get('MEDIA_URL', '/media/')
     MEDIA_ROOT = BASE_DIR / 'airbnb/media/'
+    RESIZED_MEDIA_URL = '/resized/'
+    RESIZED_MEDIA_ROOT = BASE_DIR / 'airbnb/resized/'
 
 
 # REDIS
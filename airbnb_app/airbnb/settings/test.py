@@ -22,3 +22,23 @@ YANDEX_STORAGE_CUSTOM_DOMAIN = None
 MEDIA_URL = os.environ.get('MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / 'airbnb/media/'
 RESIZED_MEDIA_URL = '/resized/'
+RESIZED_MEDIA_ROOT = BASE_DIR / 'airbnb/resized/'
+
+# PAGE CACHE
+PAGE_CACHE_ENABLED = False
+
+# PAGINATION
+PAGINATION_ESTIMATED_COUNT_CACHE_ENABLED = False
+
+# REALTY FACETS
+REALTY_FACETS_CACHE_ENABLED = False
+
+# REALTY MATERIALIZED VIEW
+REALTY_VIEW_ENABLED = False
+
+# IMAGE RENDITIONS
+IMAGE_RENDITIONS_ENABLED = False
+IMAGE_RENDITIONS_WEBP_ENABLED = False
+
+# DIRECT UPLOADS
+DIRECT_UPLOADS_ENABLED = False
@@ -9,3 +9,11 @@ class YandexObjectMediaStorage(S3Boto3Storage):
     default_acl = 'public-read'
     file_overwrite = False
     custom_domain = settings.YANDEX_STORAGE_CUSTOM_DOMAIN
+
+
+class YandexObjectResizedMediaStorage(S3Boto3Storage):
+    bucket_name = settings.YANDEX_STORAGE_BUCKET_NAME
+    location = 'resized'
+    default_acl = 'public-read'
+    file_overwrite = True  # renditions are regenerated in place
+    custom_domain = settings.YANDEX_STORAGE_CUSTOM_DOMAIN
@@ -5,7 +5,9 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
 from django.utils import timezone
 
-from realty.services.realty import get_available_realty_count_by_city
+from configs.redis_conf import get_async_redis_instance
+from realty.services.cities import get_cached_available_realty_count_by_city
+from realty.services.realty import update_cached_available_realty_count_by_city
 
 
 class ChatBotConsumer(AsyncJsonWebsocketConsumer):
@@ -53,9 +55,12 @@ class ChatBotConsumer(AsyncJsonWebsocketConsumer):
             },
         )
 
-    @database_sync_to_async
-    def get_response_message(self, message: str):
-        realty_count = get_available_realty_count_by_city(city=message)
+    async def get_response_message(self, message: str):
+        async_redis = await get_async_redis_instance()
+        realty_count = await get_cached_available_realty_count_by_city(async_redis, city=message)
+        if realty_count is None:
+            await database_sync_to_async(update_cached_available_realty_count_by_city)()
+            realty_count = await get_cached_available_realty_count_by_city(async_redis, city=message) or 0
         if realty_count:
             message_verb = 'is' if realty_count == 1 else 'are'
             pluralize = '' if realty_count == 1 else 's'
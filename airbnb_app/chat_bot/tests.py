@@ -1,5 +1,8 @@
 import datetime
+from unittest import mock
 
+import fakeredis
+import fakeredis.aioredis
 from asgiref.sync import sync_to_async
 from channels.routing import URLRouter
 from channels.testing import WebsocketCommunicator
@@ -14,12 +17,27 @@ from realty.models import Realty
 from .consumers import ChatBotConsumer
 
 
+redis_server = fakeredis.FakeServer()
+
+
+async def get_fake_async_redis_instance():
+    return await fakeredis.aioredis.create_redis_pool(redis_server, encoding='utf-8')
+
+
+@mock.patch('chat_bot.consumers.get_async_redis_instance', get_fake_async_redis_instance)
+@mock.patch('realty.services.cities.redis_instance',
+            fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cache.redis_instance',
+            fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
 class ChatBotConsumerTests(TransactionTestCase):
     serialized_rollback = True
     application = URLRouter([
         re_path(r'ws/chat-bot/$', ChatBotConsumer.as_asgi(), name='chat_bot'),
     ])
 
+    def setUp(self) -> None:
+        fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True).flushall()
+
     def create_test_realty(self) -> Realty:
         test_user = baker.make('CustomUser')
 
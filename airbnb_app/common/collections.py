@@ -10,6 +10,12 @@ class FormWithModel(NamedTuple):
     model: AbstractModel
 
 
+class CachedPage(NamedTuple):
+    content: str
+    content_type: str
+    data: dict
+
+
 class TwilioShortPayload(BaseModel):
     status: str
     sid: Optional[str]
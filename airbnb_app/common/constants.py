@@ -9,3 +9,29 @@ VERIFICATION_CODE_STATUS_DELIVERED = "delivered"
 
 # Indicates Twilio status codes (if message hasn't been sent)
 TWILIO_MESSAGE_STATUS_CODES_FAILED = ("undelivered", "failed")
+
+# Indicates the number of rows, after which paginators use the planner estimation instead of the exact count
+PAGINATION_ESTIMATED_COUNT_THRESHOLD = 50_000
+
+# Indicates the prefix of the cache keys of the planner estimations of the paginated querysets
+PAGINATION_ESTIMATED_COUNT_CACHE_KEY_PREFIX = 'pagination:estimated_count'
+
+# Indicates how long (in seconds) planner estimations of the paginated querysets are cached
+PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT = 60 * 10
+
+# Indicates the name of the Redis key that stores the epoch (random token) of all cache versions
+CACHE_VERSIONS_EPOCH_KEY = 'cache_versions:epoch'
+
+# Indicates how many seconds rendered pages are kept in the anonymous page cache
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Indicates the prefix of the anonymous page cache keys
+PAGE_CACHE_KEY_PREFIX = 'page_cache'
+
+# Indicates query params that don't change the page content, so they are ignored in the page cache key
+PAGE_CACHE_IGNORED_QUERY_PARAMS = (
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'gclid', 'fbclid', 'yclid',
+)
+
+# Indicates the value that is rendered instead of the CSRF token in the cached pages
+PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER = '__page_cache_csrf_token__'
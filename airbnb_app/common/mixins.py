@@ -1,6 +1,20 @@
-from typing import List, Tuple, Union
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, Union
 
-from django.http import HttpRequest, HttpResponseRedirect
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseRedirect
+from django.middleware.csrf import get_token
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .collections import CachedPage
+from .constants import PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER, PAGE_CACHE_TIMEOUT
+from .pagination import KeysetPaginator
+from .services import get_cache_versions, get_etag, get_page_cache_key
 
 
 class SessionDataRequiredMixin:
@@ -16,3 +30,159 @@ class SessionDataRequiredMixin:
         ):
             return HttpResponseRedirect(self.redirect_url)
         return super(SessionDataRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class KeysetPaginationMixin:
+    """Opt-in keyset (cursor) pagination for a ListView.
+
+    Keyset pagination is used if there is a `cursor_query_param` in the query string (may be empty for the first page),
+    otherwise the view falls back to the default pagination.
+    """
+
+    keyset_ordering: Sequence[str] = None
+    cursor_query_param: str = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.cursor_query_param not in self.request.GET:
+            return super(KeysetPaginationMixin, self).paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, ordering=self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AnonymousPageCacheMixin:
+    """Cache rendered pages of anonymous users.
+
+    Cache key includes normalized GET params, mobile flag and current values of the `get_page_cache_version_keys()`
+    counters, so cached pages are invalidated by bumping their versions.
+    Per-request parts of the page are rendered as placeholders and spliced in after the cache lookup
+    (see `splice_page_cache_content()`).
+    """
+
+    page_cache_timeout: int = PAGE_CACHE_TIMEOUT
+    is_page_cache_used: bool = False
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs):
+        self.is_page_cache_used = self._is_page_cache_used(request)
+        if not self.is_page_cache_used:
+            return super(AnonymousPageCacheMixin, self).dispatch(request, *args, **kwargs)
+
+        # versions are read before rendering, so a page rendered during invalidation is stored under outdated key
+        cache_key = get_page_cache_key(request, get_cache_versions(self.get_page_cache_version_keys()))
+        cached_page: Optional[CachedPage] = cache.get(cache_key)
+        if cached_page is not None:
+            self.handle_cached_page(cached_page)
+            response = HttpResponse(content_type=cached_page.content_type)
+        else:
+            response = super(AnonymousPageCacheMixin, self).dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or not isinstance(response, SimpleTemplateResponse):
+                return response
+            response.render()
+            cached_page = CachedPage(
+                content=response.content.decode(response.charset),
+                content_type=response['Content-Type'],
+                data=self.get_page_cache_data(),
+            )
+            if not response.cookies:
+                cache.set(cache_key, cached_page, self.page_cache_timeout)
+
+        response.content = self.splice_page_cache_content(cached_page)
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super(AnonymousPageCacheMixin, self).get_context_data(**kwargs)
+        if self.is_page_cache_used:
+            # overrides the `csrf_token` from the context processor, real token is spliced into the page
+            context['csrf_token'] = PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER
+        return context
+
+    def get_page_cache_version_keys(self) -> List[str]:
+        """Get keys of the version counters of the page data (see `get_cache_versions()`)."""
+        return []
+
+    def get_page_cache_data(self) -> dict:
+        """Get data that is stored with the rendered page, called after rendering."""
+        return {}
+
+    def handle_cached_page(self, cached_page: CachedPage) -> None:
+        """Handle request that is served from the cache, instead of the view handler (e.g. `get()`)."""
+
+    def splice_page_cache_content(self, cached_page: CachedPage) -> str:
+        """Replace placeholders in the rendered page with per-request data."""
+        return cached_page.content.replace(PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER, get_token(self.request))
+
+    @staticmethod
+    def _is_page_cache_used(request: HttpRequest) -> bool:
+        return (
+            settings.PAGE_CACHE_ENABLED and
+            request.method in ('GET', 'HEAD') and
+            not request.user.is_authenticated and
+            not get_messages(request)
+        )
+
+
+class ConditionalGetMixin:
+    """Answer conditional GET requests (`If-None-Match`, `If-Modified-Since`) with 304 Not Modified.
+
+    Validators are calculated by `get_etag_data()` and `get_last_modified()` before the view handler is called,
+    so unchanged responses aren't rendered or serialized at all.
+    ETag includes the release version and Last-Modified is never earlier than the release date,
+    so responses are revalidated after every deployment.
+    DRF API views have to use `ApiConditionalGetMixin` instead, so authentication, permissions and throttling
+    are checked before the response is reported as not modified.
+    """
+
+    etag: Optional[str] = None
+    last_modified_timestamp: Optional[int] = None
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs):
+        response = self.get_not_modified_response(request)
+        if response is None:
+            response = super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs)
+        return self.set_conditional_headers(response)
+
+    def get_not_modified_response(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Calculate validators of the response, get 304 Not Modified response if the client's copy is still valid."""
+        if request.method not in ('GET', 'HEAD') or get_messages(request):
+            return None
+
+        etag_data = self.get_etag_data()
+        self.etag = get_etag([settings.RELEASE_VERSION, etag_data]) if etag_data is not None else None
+        last_modified = self.get_last_modified()
+        if last_modified is not None:
+            self.last_modified_timestamp = int(max(last_modified, settings.RELEASE_DATE).timestamp())
+        if self.etag is None and self.last_modified_timestamp is None:
+            return None
+
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified_timestamp)
+        if response is not None:
+            self.handle_not_modified()
+        return response
+
+    def set_conditional_headers(self, response: HttpResponse) -> HttpResponse:
+        """Set validators of successful and not modified responses."""
+        if response.status_code not in (200, 304) or (self.etag is None and self.last_modified_timestamp is None):
+            return response
+
+        if self.etag is not None and not response.has_header('ETag'):
+            response['ETag'] = self.etag
+        if self.last_modified_timestamp is not None and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(self.last_modified_timestamp)
+        # clients have to revalidate the response on every request, validators make it cheap
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_etag_data(self) -> Optional[Any]:
+        """Get JSON serializable data that changes with the response (e.g. versions), None if there is no ETag."""
+        return None
+
+    def get_last_modified(self) -> Optional[datetime]:
+        """Get last modification date of the response data, None if it is unknown."""
+        return None
+
+    def handle_not_modified(self) -> None:
+        """Handle request that is answered with 304 Not Modified, instead of the view handler (e.g. `get()`)."""
@@ -0,0 +1,308 @@
+import base64
+import binascii
+import collections.abc
+import hashlib
+import json
+from typing import Optional, Sequence, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Count, Model, Q, QuerySet, Window
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .constants import (
+    PAGINATION_ESTIMATED_COUNT_CACHE_KEY_PREFIX, PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT,
+    PAGINATION_ESTIMATED_COUNT_THRESHOLD,
+)
+
+
+def get_queryset_estimated_count(queryset: QuerySet) -> Optional[int]:
+    """Get number of rows in the `queryset` estimated by the PostgreSQL planner.
+
+    Doesn't scan the table, `EXPLAIN` uses the collected statistics only.
+
+    Args:
+        queryset(QuerySet): queryset to estimate
+
+    Returns:
+        Optional[int]: estimated rows count, None if the database doesn't support it
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_cached_queryset_estimated_count(queryset: QuerySet) -> Optional[int]:
+    """Get number of rows in the `queryset` estimated by the PostgreSQL planner from the cache.
+
+    The estimation is made on a cache miss, it depends on the table statistics only,
+    so it is cached by the SQL of the `queryset` for `PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT` seconds.
+    """
+    if not settings.PAGINATION_ESTIMATED_COUNT_CACHE_ENABLED:
+        return get_queryset_estimated_count(queryset)
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    query_hash = hashlib.sha1(repr((queryset.db, sql, params)).encode()).hexdigest()
+    cache_key = f"{PAGINATION_ESTIMATED_COUNT_CACHE_KEY_PREFIX}:{query_hash}"
+    estimated_count: Optional[int] = cache.get(cache_key)
+    if estimated_count is None:
+        estimated_count = get_queryset_estimated_count(queryset)
+        if estimated_count is not None:
+            cache.set(cache_key, estimated_count, PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT)
+    return estimated_count
+
+
+def get_queryset_estimated_count_above_threshold(
+        queryset: QuerySet,
+        estimate_threshold: Optional[int],
+) -> Optional[int]:
+    """Get number of rows in the `queryset` estimated by the PostgreSQL planner, if it is above `estimate_threshold`.
+
+    Estimations of the small (e.g. filtered) querysets are often off and the planner never estimates 0 rows,
+    so such querysets have to be counted.
+
+    Returns:
+        Optional[int]: estimated rows count, None if the estimation is disabled, not supported or below the threshold
+    """
+    if estimate_threshold is None:
+        return None
+    estimated_count = get_cached_queryset_estimated_count(queryset)
+    if estimated_count is None or estimated_count <= estimate_threshold:
+        return None
+    return estimated_count
+
+
+class WindowCountPaginator(Paginator):
+    """Paginator that fetches the page and the total number of objects in a single query.
+
+    The total count is annotated on every row of the page with a `COUNT(*) OVER ()` window,
+    so the filtered queryset (FTS ranking, joins) is evaluated only once per request.
+    If the planner estimates more than `estimate_threshold` rows, the estimation is used as the count instead,
+    unless the page turns out to be the last one: then the count is known from the page rows,
+    and pages past the real rows are validated against the real count (so they are never empty).
+    """
+
+    count_annotation = '_paginator_total_count'
+
+    def __init__(self, *args, estimate_threshold: Optional[int] = PAGINATION_ESTIMATED_COUNT_THRESHOLD, **kwargs):
+        super(WindowCountPaginator, self).__init__(*args, **kwargs)
+        self.estimate_threshold = estimate_threshold
+        self.is_count_estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        estimated_count = self._get_estimated_count()
+        if estimated_count is not None:
+            return estimated_count
+        return super(WindowCountPaginator, self).count
+
+    def page(self, number):
+        if 'count' in self.__dict__ or not self._is_window_count_supported():
+            return super(WindowCountPaginator, self).page(number)
+
+        number = self._validate_number_type(number)
+        estimated_count = self._get_estimated_count()
+        if estimated_count is not None:
+            return self._get_estimated_page(number, estimated_count)
+
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page + self.orphans
+        object_list = list(
+            self.object_list.annotate(**{self.count_annotation: Window(expression=Count('pk'))})[bottom:top],
+        )
+        if not object_list and number > 1:
+            # `OFFSET` is out of range, the window doesn't return any rows - count objects to validate the page
+            return super(WindowCountPaginator, self).page(number)
+
+        self.__dict__['count'] = getattr(object_list[0], self.count_annotation) if object_list else 0
+        number = self.validate_number(number)
+        if bottom + len(object_list) < self.count:
+            object_list = object_list[:self.per_page]
+        return self._get_page(object_list, number, self)
+
+    def _get_estimated_page(self, number: int, estimated_count: int):
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page + self.orphans
+        # one more row shows whether there are objects after the page
+        object_list = list(self.object_list[bottom:top + 1])
+        if len(object_list) > top - bottom:
+            # the estimation may be below the real count, but the next page exists for sure
+            self.__dict__['count'] = max(estimated_count, top + 1)
+            return self._get_page(object_list[:self.per_page], number, self)
+
+        # the page is the last one (or past the real rows), so the estimation is off and the real count is used
+        self.is_count_estimated = False
+        if not object_list and number > 1:
+            self.__dict__['count'] = self.object_list.count()
+        else:
+            self.__dict__['count'] = bottom + len(object_list)
+        number = self.validate_number(number)
+        return self._get_page(object_list, number, self)
+
+    def _is_window_count_supported(self) -> bool:
+        # `COUNT(*) OVER ()` is calculated before `DISTINCT`, so it would count duplicates as well
+        return isinstance(self.object_list, QuerySet) and not self.object_list.query.distinct
+
+    def _get_estimated_count(self) -> Optional[int]:
+        if not isinstance(self.object_list, QuerySet):
+            return None
+        estimated_count = get_queryset_estimated_count_above_threshold(self.object_list, self.estimate_threshold)
+        self.is_count_estimated = estimated_count is not None
+        return estimated_count
+
+    @staticmethod
+    def _validate_number_type(number) -> int:
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+
+class KeysetPage(collections.abc.Sequence):
+    """Page of the `KeysetPaginator`."""
+
+    is_keyset = True
+
+    def __init__(
+            self,
+            object_list: list,
+            paginator: 'KeysetPaginator',
+            next_cursor: Optional[str] = None,
+            previous_cursor: Optional[str] = None,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Page (keyset) of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginator that uses the position of the last seen object (cursor) instead of `OFFSET`.
+
+    Objects are ordered by the unique combination of `ordering` fields (e.g. `('-created', '-id')`),
+    so the next page is fetched with `WHERE (created, id) < (last_created, last_id)` and can use a matching index.
+    The total count isn't needed for navigation, so `count` is the planner estimation
+    if it is above `estimate_threshold` rows (as in `WindowCountPaginator`).
+    """
+
+    def __init__(
+            self,
+            object_list: QuerySet,
+            per_page: int,
+            ordering: Sequence[str],
+            estimate_threshold: Optional[int] = PAGINATION_ESTIMATED_COUNT_THRESHOLD,
+    ):
+        if len({field_name.startswith('-') for field_name in ordering}) != 1:
+            raise ValueError("All `ordering` fields must have the same direction.")
+
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.field_names = tuple(field_name.lstrip('-') for field_name in ordering)
+        self.fields = [object_list.model._meta.get_field(field_name) for field_name in self.field_names]
+        self.descending = ordering[0].startswith('-')
+        self.estimate_threshold = estimate_threshold
+        self.is_count_estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        estimated_count = get_queryset_estimated_count_above_threshold(self.object_list, self.estimate_threshold)
+        if estimated_count is not None:
+            self.is_count_estimated = True
+            return estimated_count
+        return self.object_list.count()
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """Get page that starts right after the `cursor` position (or the first page if `cursor` is empty)."""
+        position, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+
+        queryset = self.object_list.order_by(*(self._get_reversed_ordering() if reverse else self.ordering))
+        if position is not None:
+            queryset = queryset.filter(self._get_position_filter(position, reverse))
+
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+
+        if not object_list:
+            return KeysetPage(object_list, self)
+        if reverse:
+            next_cursor = self.encode_cursor(object_list[-1])
+            previous_cursor = self.encode_cursor(object_list[0], reverse=True) if has_more else None
+        else:
+            next_cursor = self.encode_cursor(object_list[-1]) if has_more else None
+            previous_cursor = self.encode_cursor(object_list[0], reverse=True) if position is not None else None
+        return KeysetPage(object_list, self, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+    def encode_cursor(self, obj: Union[Model, dict], reverse: bool = False) -> str:
+        if isinstance(obj, dict):
+            # `values()` row
+            obj = self.object_list.model(**{field.attname: obj[field.name] for field in self.fields})
+        position = [field.value_to_string(obj) for field in self.fields]
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> Tuple[list, bool]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if len(payload['p']) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, payload['p'])]
+            return position, bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise InvalidPage(_('Invalid cursor'))
+
+    def _get_reversed_ordering(self) -> Tuple[str, ...]:
+        if self.descending:
+            return self.field_names
+        return tuple(f"-{field_name}" for field_name in self.field_names)
+
+    def _get_position_filter(self, position: list, reverse: bool) -> Q:
+        lookup = 'lt' if self.descending != reverse else 'gt'
+
+        position_filter = Q()
+        for index, field_name in enumerate(self.field_names):
+            condition = Q(**{f"{field_name}__{lookup}": position[index]})
+            for previous_field_name, previous_value in zip(self.field_names[:index], position[:index]):
+                condition &= Q(**{previous_field_name: previous_value})
+            position_filter |= condition
+
+        # redundant range condition on the leading field, so the planner can start an index range scan
+        return Q(**{f"{self.field_names[0]}__{lookup}e": position[0]}) & position_filter
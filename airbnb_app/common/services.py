@@ -1,13 +1,23 @@
+import hashlib
+import json
 import logging
+import re
+import uuid
 from typing import Any, List
 
 from twilio.base.exceptions import TwilioRestException
 
+from django.conf import settings
+from django.http import HttpRequest
+from django.utils.http import quote_etag
+
 from configs.redis_conf import redis_instance
 from configs.twilio_conf import twilio_client
 
 from .collections import FormWithModel, TwilioShortPayload
-from .constants import VERIFICATION_CODE_STATUS_FAILED
+from .constants import (
+    CACHE_VERSIONS_EPOCH_KEY, PAGE_CACHE_IGNORED_QUERY_PARAMS, PAGE_CACHE_KEY_PREFIX, VERIFICATION_CODE_STATUS_FAILED,
+)
 from .types import AbstractForm
 
 
@@ -51,6 +61,26 @@ def set_key_with_timeout(key: str, timeout: int, value: int) -> Any:
     return redis_instance.setex(key, timeout, value)
 
 
+def is_bot_or_prefetch_request(request: HttpRequest) -> bool:
+    """Return True if request is made by a bot (see `VISITS_BOT_USER_AGENT_REGEX`) or by a browser prefetch."""
+    if 'prefetch' in request.headers.get('Purpose', request.headers.get('Sec-Purpose', '')).lower():
+        return True
+    if request.headers.get('X-Moz', '').lower() == 'prefetch':
+        return True
+    user_agent: str = request.headers.get('User-Agent', '')
+    return bool(re.search(settings.VISITS_BOT_USER_AGENT_REGEX, user_agent, re.IGNORECASE))
+
+
+def get_visitor_id(request: HttpRequest) -> str:
+    """Get ID of the visitor: user pk, session key or a hash of IP address and User-Agent."""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.session.session_key:
+        return f"session:{request.session.session_key}"
+    fingerprint = f"{request.META.get('REMOTE_ADDR', '')}|{request.headers.get('User-Agent', '')}"
+    return f"fingerprint:{hashlib.sha1(fingerprint.encode()).hexdigest()}"
+
+
 def _send_sms_by_twilio(body: str, sms_from: str, sms_to: str) -> TwilioShortPayload:
     """Sends SMS message using Twilio provider.
 
@@ -88,3 +118,43 @@ def _send_sms_by_twilio(body: str, sms_from: str, sms_to: str) -> TwilioShortPay
                 f"Twilio SID: {message.sid}",
         )
         return TwilioShortPayload(status=message.status, sid=message.sid)
+
+
+def get_cache_versions(version_keys: List[str]) -> List[str]:
+    """Get current values of the cache version counters stored in Redis (missing counters are 0).
+
+    Versions are prefixed with the epoch, so counters that have been lost (e.g. Redis was flushed)
+    start from scratch in a new epoch and never repeat previous versions.
+    """
+    if not version_keys:
+        return []
+    epoch, *versions = redis_instance.mget([CACHE_VERSIONS_EPOCH_KEY, *version_keys])
+    if epoch is None:
+        redis_instance.set(CACHE_VERSIONS_EPOCH_KEY, uuid.uuid4().hex, nx=True)
+        epoch = redis_instance.get(CACHE_VERSIONS_EPOCH_KEY)
+    return [f"{epoch}:{version or 0}" for version in versions]
+
+
+def get_page_cache_key(request: HttpRequest, versions: List[str]) -> str:
+    """Get cache key of the rendered page.
+
+    Key is built from the release version, absolute url (without query), normalized GET params, mobile flag
+    (see `MobileUserAgentMiddleware`) and the page cache `versions`.
+    """
+    query_params = sorted(
+        (param, value)
+        for param, values in request.GET.lists() if param not in PAGE_CACHE_IGNORED_QUERY_PARAMS
+        for value in values
+    )
+    page_key = json.dumps(
+        [
+            settings.RELEASE_VERSION, request.build_absolute_uri(request.path), query_params,
+            getattr(request, 'is_mobile_agent', False), versions,
+        ],
+    )
+    return f"{PAGE_CACHE_KEY_PREFIX}:{hashlib.sha1(page_key.encode()).hexdigest()}"
+
+
+def get_etag(etag_data: Any) -> str:
+    """Get quoted strong ETag of the JSON serializable `etag_data`."""
+    return quote_etag(hashlib.sha1(json.dumps(etag_data, default=str).encode()).hexdigest())
@@ -1,5 +1,7 @@
 import base64
 
+from storages.backends.s3boto3 import S3Boto3Storage
+
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 
@@ -22,3 +24,20 @@ def create_invalid_image(filename: str) -> SimpleUploadedFile:
         name=filename,
         content=b"_",  # invalid image
     )
+
+
+def create_local_s3_storage() -> S3Boto3Storage:
+    """Creates S3 storage of a local S3-compatible server, e.g. MinIO (only for testing purposes).
+
+    Presigned urls are signed locally, so the server isn't required unless files are uploaded.
+    """
+    return S3Boto3Storage(
+        access_key='minio-access-key',
+        secret_key='minio-secret-key',
+        bucket_name='airbnb-test',
+        endpoint_url='http://localhost:9000',
+        region_name='us-east-1',
+        location='media',
+        default_acl='public-read',
+        file_overwrite=False,
+    )
@@ -0,0 +1,185 @@
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger
+from django.test import TestCase, override_settings
+
+from addresses.models import Address
+
+from ..pagination import (
+    KeysetPaginator, WindowCountPaginator, get_cached_queryset_estimated_count, get_queryset_estimated_count,
+)
+
+
+class WindowCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Address.objects.create(country='Russia', city='Moscow', street=f"Arbat, {i}")
+
+    def test_page_and_count_in_single_query(self):
+        """Test that paginator fetches the page and the total count in a single query."""
+        paginator = WindowCountPaginator(Address.objects.order_by('id'), per_page=2, estimate_threshold=None)
+
+        with self.assertNumQueries(1):
+            page = paginator.page(2)
+            self.assertEqual(paginator.count, 5)
+            self.assertEqual(paginator.num_pages, 3)
+        self.assertListEqual(list(page), list(Address.objects.order_by('id')[2:4]))
+
+    def test_page_with_orphans(self):
+        """Test that paginator adds orphans to the last page."""
+        paginator = WindowCountPaginator(
+            Address.objects.order_by('id'), per_page=2, orphans=1, estimate_threshold=None,
+        )
+
+        self.assertEqual(len(paginator.page(1)), 2)
+        self.assertEqual(len(paginator.page(2)), 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_page_out_of_range(self):
+        """Test that paginator raises EmptyPage if the page is out of range."""
+        paginator = WindowCountPaginator(Address.objects.order_by('id'), per_page=2, estimate_threshold=None)
+
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+
+    def test_page_not_an_integer(self):
+        """Test that paginator raises PageNotAnInteger if the page is not an integer."""
+        paginator = WindowCountPaginator(Address.objects.order_by('id'), per_page=2, estimate_threshold=None)
+
+        with self.assertRaises(PageNotAnInteger):
+            paginator.page('first')
+
+    def test_empty_first_page(self):
+        """Test that paginator returns an empty first page if there are no objects."""
+        paginator = WindowCountPaginator(Address.objects.none().order_by('id'), per_page=2, estimate_threshold=None)
+
+        self.assertEqual(len(paginator.page(1)), 0)
+        self.assertEqual(paginator.count, 0)
+
+    def test_distinct_queryset_uses_count(self):
+        """Test that paginator counts objects of the distinct queryset with the default COUNT query."""
+        paginator = WindowCountPaginator(
+            Address.objects.order_by('id').distinct(), per_page=2, estimate_threshold=None,
+        )
+
+        page = paginator.page(1)
+
+        self.assertNotIn(paginator.count_annotation, page.object_list.query.annotations)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(len(page), 2)
+
+    def test_estimated_count_above_threshold(self):
+        """Test that paginator uses the planner estimation if it is above the `estimate_threshold`."""
+        queryset = Address.objects.order_by('id')
+        paginator = WindowCountPaginator(queryset, per_page=2, estimate_threshold=0)
+
+        paginator.page(1)
+
+        self.assertTrue(paginator.is_count_estimated)
+        # the estimation isn't used if it is below the rows of the fetched page
+        self.assertEqual(paginator.count, max(get_queryset_estimated_count(queryset), 3))
+
+    def test_estimated_count_last_page(self):
+        """Test that paginator uses the real count if the page with the estimated count is the last one."""
+        paginator = WindowCountPaginator(Address.objects.order_by('id'), per_page=2, estimate_threshold=0)
+
+        page = paginator.page(3)
+
+        self.assertFalse(paginator.is_count_estimated)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(len(page), 1)
+        self.assertFalse(page.has_next())
+
+    def test_estimated_count_page_out_of_range(self):
+        """Test that paginator validates pages past the real rows by the real count, not by the estimation."""
+        paginator = WindowCountPaginator(Address.objects.order_by('id'), per_page=2, estimate_threshold=0)
+
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+        self.assertEqual(paginator.count, 5)
+
+    @override_settings(
+        PAGINATION_ESTIMATED_COUNT_CACHE_ENABLED=True,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_cached_estimated_count(self):
+        """Test that the planner estimation is cached by the queryset SQL."""
+        queryset = Address.objects.filter(city='Moscow')
+        estimated_count = get_cached_queryset_estimated_count(queryset)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_queryset_estimated_count(queryset.order_by('id')), estimated_count)
+        with self.assertNumQueries(1):
+            get_cached_queryset_estimated_count(queryset.filter(street='Arbat'))
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for city in ('Moscow', 'Rome', 'Moscow', 'Paris', 'Rome'):
+            Address.objects.create(country='Russia', city=city, street='Arbat')
+
+    def test_pages_follow_ordering(self):
+        """Test that paginator walks through all objects in the `ordering` using cursors."""
+        paginator = KeysetPaginator(Address.objects.all(), per_page=2, ordering=('city', 'id'))
+
+        page1 = paginator.page()
+        page2 = paginator.page(page1.next_cursor)
+        page3 = paginator.page(page2.next_cursor)
+
+        self.assertListEqual(
+            [*page1, *page2, *page3],
+            list(Address.objects.order_by('city', 'id')),
+        )
+        self.assertFalse(page1.has_previous())
+        self.assertTrue(page2.has_previous())
+        self.assertTrue(page2.has_next())
+        self.assertFalse(page3.has_next())
+
+    def test_previous_page(self):
+        """Test that paginator returns the previous page by the `previous_cursor`."""
+        paginator = KeysetPaginator(Address.objects.all(), per_page=2, ordering=('-city', '-id'))
+
+        page1 = paginator.page()
+        page2 = paginator.page(page1.next_cursor)
+        previous_page = paginator.page(page2.previous_cursor)
+
+        self.assertListEqual(list(previous_page), list(page1))
+        self.assertFalse(previous_page.has_previous())
+        self.assertEqual(previous_page.next_cursor, page1.next_cursor)
+
+    def test_page_in_single_query(self):
+        """Test that paginator fetches the page without counting objects."""
+        paginator = KeysetPaginator(Address.objects.all(), per_page=2, ordering=('city', 'id'))
+        cursor = paginator.page().next_cursor
+
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_invalid_cursor(self):
+        """Test that paginator raises InvalidPage if the cursor is invalid."""
+        paginator = KeysetPaginator(Address.objects.all(), per_page=2, ordering=('city', 'id'))
+
+        with self.assertRaises(InvalidPage):
+            paginator.page('invalid')
+
+    def test_mixed_ordering_directions(self):
+        """Test that paginator doesn't accept `ordering` fields with different directions."""
+        with self.assertRaises(ValueError):
+            KeysetPaginator(Address.objects.all(), per_page=2, ordering=('city', '-id'))
+
+    def test_count_below_threshold(self):
+        """Test that paginator counts objects if the planner estimation is below the `estimate_threshold`."""
+        paginator = KeysetPaginator(Address.objects.filter(city='Moscow'), per_page=2, ordering=('city', 'id'))
+        empty_paginator = KeysetPaginator(Address.objects.filter(city='Berlin'), per_page=2, ordering=('city', 'id'))
+
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(empty_paginator.count, 0)
+        self.assertFalse(paginator.is_count_estimated)
+
+    def test_estimated_count_above_threshold(self):
+        """Test that paginator uses the planner estimation if it is above the `estimate_threshold`."""
+        queryset = Address.objects.all()
+        paginator = KeysetPaginator(queryset, per_page=2, ordering=('city', 'id'), estimate_threshold=0)
+
+        self.assertEqual(paginator.count, get_queryset_estimated_count(queryset))
+        self.assertTrue(paginator.is_count_estimated)
@@ -6,7 +6,9 @@ import sentry_sdk
 from twilio.base.exceptions import TwilioRestException
 
 from django.conf import settings
-from django.test import SimpleTestCase, override_settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.test import RequestFactory, SimpleTestCase, override_settings
 
 from accounts.forms import ProfileForm, UserInfoForm
 from accounts.models import CustomUser, Profile
@@ -15,7 +17,8 @@ from ..collections import FormWithModel, TwilioShortPayload
 from ..constants import VERIFICATION_CODE_STATUS_DELIVERED, VERIFICATION_CODE_STATUS_FAILED
 from ..services import (
     _send_sms_by_twilio, create_name_with_prefix, get_field_names_from_form, get_keys_with_prefixes,
-    get_required_fields_from_form_with_model, is_cooldown_ended, set_key_with_timeout,
+    get_required_fields_from_form_with_model, get_visitor_id, is_bot_or_prefetch_request, is_cooldown_ended,
+    set_key_with_timeout,
 )
 
 
@@ -182,3 +185,39 @@ class CommonServicesTests(SimpleTestCase):
         self.assertTrue(message_mock.called)
         self.assertEqual(twilio_payload.status, VERIFICATION_CODE_STATUS_FAILED)
         self.assertIsNone(twilio_payload.sid)
+
+    def test_is_bot_or_prefetch_request_bot(self):
+        """is_bot_or_prefetch_request() returns True if request User-Agent matches bot User-Agent regex."""
+        request = RequestFactory().get('/', HTTP_USER_AGENT='Mozilla/5.0 (compatible; Googlebot/2.1)')
+        self.assertTrue(is_bot_or_prefetch_request(request))
+
+    def test_is_bot_or_prefetch_request_prefetch(self):
+        """is_bot_or_prefetch_request() returns True if request is a browser prefetch."""
+        request = RequestFactory().get('/', HTTP_USER_AGENT='Mozilla/5.0 (X11; Linux x86_64)', HTTP_PURPOSE='prefetch')
+        self.assertTrue(is_bot_or_prefetch_request(request))
+
+    def test_is_bot_or_prefetch_request_browser(self):
+        """is_bot_or_prefetch_request() returns False if request is made by a user's browser."""
+        request = RequestFactory().get('/', HTTP_USER_AGENT='Mozilla/5.0 (X11; Linux x86_64) Firefox/92.0')
+        self.assertFalse(is_bot_or_prefetch_request(request))
+
+    def test_get_visitor_id_authenticated_user(self):
+        """get_visitor_id() returns user pk if user is authenticated."""
+        request = RequestFactory().get('/')
+        request.user = CustomUser(pk=5)
+        request.session = SessionStore()
+
+        self.assertEqual(get_visitor_id(request), 'user:5')
+
+    def test_get_visitor_id_anonymous_user(self):
+        """get_visitor_id() returns the same fingerprint for the same IP address and User-Agent."""
+        request_factory = RequestFactory()
+        request1 = request_factory.get('/', HTTP_USER_AGENT='Firefox', REMOTE_ADDR='10.0.0.1')
+        request2 = request_factory.get('/realty/', HTTP_USER_AGENT='Firefox', REMOTE_ADDR='10.0.0.1')
+        request3 = request_factory.get('/', HTTP_USER_AGENT='Chrome', REMOTE_ADDR='10.0.0.1')
+        for request in (request1, request2, request3):
+            request.user = AnonymousUser()
+            request.session = SessionStore()
+
+        self.assertEqual(get_visitor_id(request1), get_visitor_id(request2))
+        self.assertNotEqual(get_visitor_id(request1), get_visitor_id(request3))
@@ -1,9 +1,11 @@
+import gzip
+
 from django.core.files.storage import FileSystemStorage
 from django.test import SimpleTestCase, override_settings
 
 from airbnb.storage_backends import YandexObjectMediaStorage
 
-from ..utils import select_file_storage
+from ..utils import iter_gzip, select_file_storage
 
 
 class CommonServicesTests(SimpleTestCase):
@@ -34,3 +36,11 @@ class CommonServicesTests(SimpleTestCase):
         """select_file_storage() returns default Django File Storage instance in the `debug` mode."""
         result = select_file_storage()
         self.assertIsInstance(result, FileSystemStorage)
+
+    def test_iter_gzip(self):
+        """iter_gzip() compresses a stream of text chunks to a valid gzip stream."""
+        chunks = ['первая строка\n', '', 'second line\n']
+
+        compressed = b''.join(iter_gzip(iter(chunks)))
+
+        self.assertEqual(gzip.decompress(compressed).decode(), ''.join(chunks))
@@ -1,9 +1,10 @@
-from typing import TypeVar
+import zlib
+from typing import Iterable, Iterator, TypeVar
 
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage, Storage
 
-from airbnb.storage_backends import YandexObjectMediaStorage
+from airbnb.storage_backends import YandexObjectMediaStorage, YandexObjectResizedMediaStorage
 
 
 BaseStorageType = TypeVar('BaseStorageType', bound=Storage)
@@ -13,3 +14,20 @@ def select_file_storage() -> BaseStorageType:
     if settings.USE_S3_BUCKET and not settings.DEBUG:
         return YandexObjectMediaStorage()
     return FileSystemStorage()
+
+
+def select_resized_file_storage() -> BaseStorageType:
+    """Select storage of the image renditions (resized images)."""
+    if settings.USE_S3_BUCKET and not settings.DEBUG:
+        return YandexObjectResizedMediaStorage()
+    return FileSystemStorage(location=settings.RESIZED_MEDIA_ROOT, base_url=settings.RESIZED_MEDIA_URL)
+
+
+def iter_gzip(chunks: Iterable[str], encoding: str = 'utf-8') -> Iterator[bytes]:
+    """Compress a stream of text chunks to a gzip stream without loading it into memory."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # `| 16` - gzip header and trailer
+    for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk.encode(encoding))
+        if compressed_chunk:
+            yield compressed_chunk
+    yield compressor.flush()
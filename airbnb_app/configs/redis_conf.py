@@ -1,3 +1,8 @@
+import asyncio
+import ssl
+import weakref
+
+import aioredis
 import redis
 from redis.sentinel import Sentinel
 
@@ -23,3 +28,37 @@ if not settings.DEBUG:
         password=settings.REDIS_CLUSTER_PASSWORD,
         decode_responses=settings.REDIS_DECODE_RESPONSES,
     )
+
+
+_async_redis_instances: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _create_async_redis_instance() -> aioredis.Redis:
+    encoding = settings.DEFAULT_CHARSET if settings.REDIS_DECODE_RESPONSES else None
+    if settings.DEBUG:
+        return await aioredis.create_redis_pool(
+            (settings.REDIS_HOST, int(settings.REDIS_PORT)),
+            db=int(settings.REDIS_DB),
+            encoding=encoding,
+        )
+    async_sentinel = await aioredis.create_sentinel(
+        settings.REDIS_CLUSTER_SENTINELS,
+        password=settings.REDIS_CLUSTER_PASSWORD,
+        encoding=encoding,
+        ssl=ssl.create_default_context(cafile=settings.REDIS_SSL_CERT_DOCKER_PATH),
+        timeout=1,
+    )
+    return async_sentinel.master_for(settings.REDIS_CLUSTER_NAME)
+
+
+async def get_async_redis_instance() -> aioredis.Redis:
+    """Get asyncio Redis client (e.g. for Channels consumers).
+
+    Connections can't be shared between event loops, so a client is created once per running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_redis_instances:
+        _async_redis_instances[loop] = await _create_async_redis_instance()
+    return _async_redis_instances[loop]
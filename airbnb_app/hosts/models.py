@@ -1,3 +1,5 @@
+from model_utils import FieldTracker
+
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core.validators import MaxValueValidator, MinValueValidator
@@ -22,6 +24,9 @@ class RealtyHost(models.Model):
         ],
     )
 
+    # tracker of the fields that are shown with realty of the host (see `realty.signals`)
+    host_data_tracker = FieldTracker(fields=['host_rating'])
+
     class Meta:
         verbose_name = 'realty host'
         verbose_name_plural = 'realty hosts'
@@ -1,4 +1,4 @@
-from typing import Final
+from typing import Dict, Final, Tuple
 
 
 # Indicates how many cities will be displayed on the home page
@@ -6,3 +6,57 @@ DISPLAYED_CITIES_COUNT = 6
 
 # Indicates char that separates `width` and `height` of the image (e.g., 300x300)
 TARGET_IMAGE_SIZE_SEPARATOR: Final[str] = "x"
+
+# Indicates sizes of the image renditions that are generated on image upload (sizes that are used in templates),
+# they are passed to the `resize_image` cloud function on deploy (its `DEFAULT_VALID_RESIZE_FORMATS` must match them)
+IMAGE_RENDITION_SIZES: Final[Tuple[str, ...]] = (
+    "32x33",
+    "56x56",
+    "128x128",
+    "145x145",
+    "250x200",
+    "300x200",
+    "306x204",
+    "500x400",
+    "600x400",
+    "900x600",
+)
+
+# Indicates image modes that have to be converted to RGB before saving the renditions
+IMAGE_RENDITION_CONVERSION_REQUIRED_MODES: Final[Tuple[str, ...]] = ("RGBA", "P")
+
+# Indicates format of the image renditions
+IMAGE_RENDITION_FORMAT: Final[str] = "jpeg"
+
+# Indicates format of the WebP image renditions
+IMAGE_RENDITION_WEBP_FORMAT: Final[str] = "webp"
+
+# Indicates content types of the image renditions by format (renditions keep the name of the initial image)
+IMAGE_RENDITION_CONTENT_TYPES: Final[Dict[str, str]] = {
+    IMAGE_RENDITION_FORMAT: "image/jpeg",
+    IMAGE_RENDITION_WEBP_FORMAT: "image/webp",
+}
+
+# Indicates suffix of the WebP image renditions (e.g., path/to/300x200/image.png.webp)
+IMAGE_RENDITION_WEBP_SUFFIX: Final[str] = ".webp"
+
+# Indicates the max pixel density that responsive images provide renditions for on desktop
+RESPONSIVE_IMAGE_MAX_PIXEL_DENSITY: Final[int] = 2
+
+# Indicates relative difference of aspect ratios, up to which renditions are considered as having the same ratio
+RESPONSIVE_IMAGE_ASPECT_RATIO_TOLERANCE: Final[float] = 0.02
+
+# Indicates suffix of the model field that lists generated renditions of the image field (e.g., 300x200, 300x200.webp)
+IMAGE_RENDITIONS_FIELD_SUFFIX: Final[str] = "_renditions"
+
+# Indicates content types of the images that can be uploaded directly to the storage, and their file extensions
+DIRECT_UPLOAD_IMAGE_CONTENT_TYPES: Final[Dict[str, str]] = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+}
+
+# Indicates the max size (in bytes) of the image that is uploaded directly to the storage
+DIRECT_UPLOAD_MAX_IMAGE_SIZE: Final[int] = 10 * 1024 * 1024
+
+# Indicates how many seconds the presigned POST for a direct upload is valid for
+DIRECT_UPLOAD_EXPIRES_IN: Final[int] = 10 * 60
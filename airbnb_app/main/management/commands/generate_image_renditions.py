@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile, get_default_profile_image
+from realty.models import RealtyImage
+
+from ...services import get_image_rendition_keys, schedule_image_renditions
+
+
+class Command(BaseCommand):
+    """Custom management command that schedules generation of the missing image renditions."""
+
+    help = (
+        "Schedules generation of renditions of the images that don't have all of them "
+        "(e.g. uploaded before renditions, or before new sizes or formats have been added)"
+    )
+
+    def handle(self, *args, **options):
+        rendition_keys = get_image_rendition_keys()
+        realty_images = RealtyImage.objects.exclude(
+            image_renditions__contains=rendition_keys,
+        ).only('id', 'image', 'image_renditions')
+        profiles = Profile.objects.exclude(
+            profile_image_renditions__contains=rendition_keys,
+        ).exclude(
+            profile_image__in=['', get_default_profile_image()],
+        ).exclude(
+            profile_image__isnull=True,
+        ).only('id', 'profile_image', 'profile_image_renditions')
+
+        scheduled_count = 0
+        for realty_image in realty_images.iterator():
+            scheduled_count += schedule_image_renditions(realty_image, 'image', is_image_changed=False)
+        for profile in profiles.iterator():
+            scheduled_count += schedule_image_renditions(profile, 'profile_image', is_image_changed=False)
+
+        self.stdout.write(self.style.SUCCESS(f"Renditions of {scheduled_count} images have been scheduled"))
@@ -1,15 +1,76 @@
+import posixpath
+import uuid
+from io import BytesIO
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from django.apps import apps
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import models, transaction
 from django.db.models import QuerySet
+from django.db.models.fields.files import FieldFile
 
+from airbnb.celery import app
+from common.utils import select_resized_file_storage
 from realty.models import Realty
+from realty.services.cities import get_cached_fill_up_cities, set_cached_fill_up_cities
+
+from .constants import (
+    DIRECT_UPLOAD_EXPIRES_IN, DIRECT_UPLOAD_IMAGE_CONTENT_TYPES, DIRECT_UPLOAD_MAX_IMAGE_SIZE,
+    IMAGE_RENDITION_CONTENT_TYPES, IMAGE_RENDITION_CONVERSION_REQUIRED_MODES, IMAGE_RENDITION_FORMAT,
+    IMAGE_RENDITION_SIZES, IMAGE_RENDITION_WEBP_FORMAT, IMAGE_RENDITION_WEBP_SUFFIX, IMAGE_RENDITIONS_FIELD_SUFFIX,
+    RESPONSIVE_IMAGE_ASPECT_RATIO_TOLERANCE, RESPONSIVE_IMAGE_MAX_PIXEL_DENSITY, TARGET_IMAGE_SIZE_SEPARATOR,
+)
+
+
+class ResponsiveImage(NamedTuple):
+    src: str
+    srcset: str  # empty if there are no renditions
+    webp_srcset: str  # empty if there are no renditions or WebP renditions are disabled
+
 
-from .constants import TARGET_IMAGE_SIZE_SEPARATOR
+class DirectUpload(NamedTuple):
+    url: str
+    fields: Dict[str, str]  # form fields that have to be posted along with the file
+    name: str  # name of the file in the storage (value of the file field once the upload is confirmed)
 
 
 def get_all_realty_cities() -> QuerySet[str]:
     return Realty.available.order_by().values_list('location__city', flat=True).distinct()
 
 
+def get_fill_up_cities(cities_count: int) -> List[str]:
+    """Get names of `cities_count` cities with available realty, cities are cached in Redis.
+
+    Cached cities are refreshed once they expire (see `REALTY_CITIES_FILL_UP_TTL`), not on every realty change.
+    """
+    cities = get_cached_fill_up_cities(cities_count)
+    if cities is None:
+        cities = list(get_all_realty_cities()[:cities_count])
+        set_cached_fill_up_cities(cities_count, cities)
+    return cities
+
+
+def get_displayed_cities(popular_cities: Sequence[str], cities_count: int) -> List[str]:
+    """Fill up `popular_cities` to `cities_count` cities with the other cities that have available realty.
+
+    Leaderboard of popular cities may have less than `cities_count` cities (e.g. until there are enough visits).
+    """
+    displayed_cities = list(popular_cities[:cities_count])
+    missing_cities_count = cities_count - len(displayed_cities)
+    if missing_cities_count > 0:
+        # twice as many cities, so there are enough cities even if all displayed cities are among them
+        fill_up_cities = get_fill_up_cities(cities_count * 2)
+        displayed_cities.extend(
+            [city for city in fill_up_cities if city not in displayed_cities][:missing_cities_count],
+        )
+    return displayed_cities
+
+
 def get_target_image_url_with_size(*, image_url: str, target_size: str) -> str:
     """Build url with specific size.
 
@@ -25,8 +86,332 @@ def get_target_image_url_with_size(*, image_url: str, target_size: str) -> str:
 
     image_prefix, image_filename = image_url.rsplit("/", 1)
     try:
-        _, _ = list(map(int, target_size.split(TARGET_IMAGE_SIZE_SEPARATOR)))
+        parse_image_size(target_size)
     except ValueError:
         return image_url
     image_prefix = image_prefix.replace(settings.MEDIA_URL, settings.RESIZED_MEDIA_URL)
     return f"{image_prefix}/{target_size}/{image_filename}"
+
+
+def parse_image_size(target_size: str) -> Tuple[int, int]:
+    """Parse `width` and `height` of the size in special format: <`width`x`height`> (e.g., 300x300)."""
+    width, height = map(int, target_size.split(TARGET_IMAGE_SIZE_SEPARATOR))
+    return width, height
+
+
+def get_image_renditions_field_name(field_name: str) -> str:
+    """Get name of the field that lists generated renditions of the image field `field_name`."""
+    return f"{field_name}{IMAGE_RENDITIONS_FIELD_SUFFIX}"
+
+
+def get_image_rendition_key(target_size: str, is_webp: bool = False) -> str:
+    """Get key of the rendition in the list of generated renditions (e.g., 300x200 or 300x200.webp)."""
+    return f"{target_size}{IMAGE_RENDITION_WEBP_SUFFIX}" if is_webp else target_size
+
+
+def get_image_rendition_keys(sizes: Sequence[str] = IMAGE_RENDITION_SIZES) -> List[str]:
+    """Get keys of the renditions in all `sizes` and formats that are generated (see `generate_image_renditions()`)."""
+    rendition_keys = list(sizes)
+    if settings.IMAGE_RENDITIONS_WEBP_ENABLED:
+        rendition_keys.extend(get_image_rendition_key(target_size, is_webp=True) for target_size in sizes)
+    return rendition_keys
+
+
+def get_image_file_url_with_size(*, image_file: FieldFile, target_size: str) -> str:
+    """Build url of the `image_file` with specific size.
+
+    If renditions are enabled, url with size is built only if the rendition of the `target_size` has been generated,
+    otherwise the initial url is returned (instead of the redirect to the on-demand resize).
+    """
+    return get_image_urls_with_sizes(image=image_file, target_sizes=[target_size])[target_size]
+
+
+def get_available_image_renditions(image: Union[FieldFile, str]) -> Optional[FrozenSet[str]]:
+    """Get keys of the generated renditions of the image, None if renditions are generated on demand.
+
+    Renditions are generated on demand if they are disabled.
+    Renditions of the image urls (e.g. default images) aren't tracked, so all of them are considered as available.
+    """
+    if not settings.IMAGE_RENDITIONS_ENABLED:
+        return None
+    if not isinstance(image, FieldFile):
+        return frozenset(get_image_rendition_keys())
+    renditions_field_name = get_image_renditions_field_name(image.field.name)
+    return frozenset(getattr(image.instance, renditions_field_name, None) or ())
+
+
+def get_image_urls_with_sizes(*, image: Union[FieldFile, str], target_sizes: Sequence[str]) -> Dict[str, str]:
+    """Build urls of the image with specific sizes, the initial url of the image is built once.
+
+    Initial url is returned for the sizes, which renditions haven't been generated yet.
+    """
+    image_url = image.url if isinstance(image, FieldFile) else image
+    available_renditions = get_available_image_renditions(image)
+    return {
+        target_size: (
+            get_target_image_url_with_size(image_url=image_url, target_size=target_size)
+            if available_renditions is None or target_size in available_renditions else image_url
+        )
+        for target_size in target_sizes
+    }
+
+
+def get_responsive_image_sizes(target_size: str, max_width: Optional[int] = None) -> List[str]:
+    """Get rendition sizes with the same aspect ratio as the `target_size` (and not wider than `max_width`).
+
+    Sizes are ordered by width.
+    """
+    target_width, target_height = parse_image_size(target_size)
+    target_ratio = target_width / target_height
+
+    responsive_sizes = []
+    for rendition_size in IMAGE_RENDITION_SIZES:
+        width, height = parse_image_size(rendition_size)
+        if abs(width / height - target_ratio) / target_ratio > RESPONSIVE_IMAGE_ASPECT_RATIO_TOLERANCE:
+            continue
+        if max_width is None or width <= max_width:
+            responsive_sizes.append(rendition_size)
+    return sorted(responsive_sizes, key=lambda rendition_size: parse_image_size(rendition_size)[0])
+
+
+def get_responsive_image(image: Union[FieldFile, str], target_size: str, is_mobile: bool = False) -> ResponsiveImage:
+    """Get url of the image with the `target_size` and `srcset` of its renditions with the same aspect ratio.
+
+    Renditions wider than `RESPONSIVE_IMAGE_MAX_PIXEL_DENSITY` x `target_size` width are skipped on desktop,
+    mobile clients get all the renditions, as fluid images may be displayed wider than the `target_size`.
+    Only generated renditions are linked (see `get_available_image_renditions()`).
+    """
+    image_url = image.url if isinstance(image, FieldFile) else image
+    available_renditions = get_available_image_renditions(image)
+    if available_renditions is not None and not available_renditions:
+        return ResponsiveImage(src=image_url, srcset='', webp_srcset='')
+
+    def is_rendition_available(rendition_size: str, is_webp: bool = False) -> bool:
+        rendition_key = get_image_rendition_key(rendition_size, is_webp=is_webp)
+        return available_renditions is None or rendition_key in available_renditions
+
+    target_width, _ = parse_image_size(target_size)
+    max_width = None if is_mobile else target_width * RESPONSIVE_IMAGE_MAX_PIXEL_DENSITY
+    rendition_sizes = [
+        rendition_size
+        for rendition_size in get_responsive_image_sizes(target_size, max_width=max_width)
+        if is_rendition_available(rendition_size)
+    ]
+    image_urls = {
+        rendition_size: get_target_image_url_with_size(image_url=image_url, target_size=rendition_size)
+        for rendition_size in {target_size, *rendition_sizes}
+    }
+    src = image_urls[target_size] if is_rendition_available(target_size) else image_url
+
+    rendition_urls = [
+        (rendition_size, image_urls[rendition_size], parse_image_size(rendition_size)[0])
+        for rendition_size in rendition_sizes
+        if image_urls[rendition_size] != image_url
+    ]
+    if not rendition_urls:
+        return ResponsiveImage(src=src, srcset='', webp_srcset='')
+
+    webp_srcset = ''
+    if settings.IMAGE_RENDITIONS_WEBP_ENABLED:
+        webp_srcset = ', '.join(
+            f"{url}{IMAGE_RENDITION_WEBP_SUFFIX} {width}w"
+            for rendition_size, url, width in rendition_urls
+            if is_rendition_available(rendition_size, is_webp=True)
+        )
+    return ResponsiveImage(
+        src=src,
+        srcset=', '.join(f"{url} {width}w" for _, url, width in rendition_urls),
+        webp_srcset=webp_srcset,
+    )
+
+
+def get_image_rendition_name(image_name: str, target_size: str) -> str:
+    """Get name of the image rendition in the resized storage (e.g., path/to/300x300/image.png)."""
+    image_dir, image_filename = posixpath.split(image_name)
+    return posixpath.join(image_dir, target_size, image_filename)
+
+
+def generate_image_renditions(
+        image_file: FieldFile,
+        sizes: Sequence[str] = IMAGE_RENDITION_SIZES,
+        storage: Storage = None,
+) -> List[str]:
+    """Generate renditions of the `image_file` in all `sizes` and save them to the resized storage.
+
+    The initial image is downloaded and decoded once, renditions are resized from the decoded image.
+
+    Args:
+        image_file(FieldFile): initial image
+        sizes(Sequence[str]): sizes of the renditions in special format: <`width`x`height`> (e.g., 300x300)
+        storage(Storage): storage of the renditions, `select_resized_file_storage()` by default
+
+    Returns:
+        List[str]: names of the generated renditions
+    """
+    storage = storage or select_resized_file_storage()
+    with image_file.open('rb'):
+        image = Image.open(image_file)
+        image.load()
+    if image.mode in IMAGE_RENDITION_CONVERSION_REQUIRED_MODES:
+        image = image.convert("RGB")
+
+    rendition_formats = [(IMAGE_RENDITION_FORMAT, '')]
+    if settings.IMAGE_RENDITIONS_WEBP_ENABLED:
+        rendition_formats.append((IMAGE_RENDITION_WEBP_FORMAT, IMAGE_RENDITION_WEBP_SUFFIX))
+
+    rendition_names = []
+    for target_size in sizes:
+        rendition = image.copy()
+        rendition.thumbnail(size=parse_image_size(target_size))
+        for rendition_format, rendition_suffix in rendition_formats:
+            with BytesIO() as buffer:
+                rendition.save(buffer, rendition_format)
+                rendition_name = f"{get_image_rendition_name(image_file.name, target_size)}{rendition_suffix}"
+                if not getattr(storage, 'file_overwrite', False) and storage.exists(rendition_name):
+                    storage.delete(rendition_name)
+                rendition_content = ContentFile(buffer.getvalue())
+                # storage guesses content type by the name, which has the extension of the initial image
+                rendition_content.content_type = IMAGE_RENDITION_CONTENT_TYPES[rendition_format]
+                rendition_names.append(storage.save(rendition_name, rendition_content))
+    return rendition_names
+
+
+def generate_model_image_renditions(model_label: str, pk: int, field_name: str) -> bool:
+    """Generate renditions of the image field `field_name` of the model instance and list them as generated.
+
+    Renditions aren't listed if the image has been changed during the generation.
+
+    Returns:
+        bool: whether renditions have been generated and listed
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    image_file: FieldFile = getattr(instance, field_name, None)
+    if not image_file:
+        return False
+
+    generate_image_renditions(image_file)
+    updated_count = model.objects.filter(pk=pk, **{field_name: image_file.name}).update(
+        **{get_image_renditions_field_name(field_name): get_image_rendition_keys()},
+    )
+    return bool(updated_count)
+
+
+def schedule_image_renditions(instance: models.Model, field_name: str, is_image_changed: bool = True) -> bool:
+    """Schedule generation of the renditions of the image field `field_name`.
+
+    Renditions of the previous image are unlisted right away, so templates link the initial image.
+    Renditions of the unchanged image (e.g. missing sizes or formats) stay listed until the new ones are generated.
+
+    Returns:
+        bool: whether generation has been scheduled
+    """
+    image_file: FieldFile = getattr(instance, field_name)
+    if not settings.IMAGE_RENDITIONS_ENABLED or not image_file:
+        return False
+
+    renditions_field_name = get_image_renditions_field_name(field_name)
+    if is_image_changed and getattr(instance, renditions_field_name):
+        setattr(instance, renditions_field_name, [])
+        type(instance).objects.filter(pk=instance.pk).update(**{renditions_field_name: []})
+
+    model_label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(
+        lambda: app.send_task(
+            'main.tasks.generate_image_renditions',
+            args=(model_label, pk, field_name),
+            queue='default',
+        ),
+    )
+    return True
+
+
+def is_direct_upload_enabled(storage: Storage) -> bool:
+    """Files can be uploaded directly to the storage only if it supports presigned POST (S3-compatible storage)."""
+    return settings.DIRECT_UPLOADS_ENABLED and isinstance(storage, S3Boto3Storage)
+
+
+def create_direct_image_upload(
+        instance: models.Model,
+        field_name: str,
+        content_type: str,
+        storage: Storage = None,
+) -> DirectUpload:
+    """Create a presigned POST, that uploads an image of the field `field_name` directly to the S3 storage.
+
+    The image gets a random name in the `upload_to` directory of the field,
+    the policy of the POST restricts the name, content type and size of the image.
+
+    Args:
+        instance(models.Model): model instance the image is uploaded for (may be unsaved)
+        field_name(str): name of the image field
+        content_type(str): content type of the image, one of the `DIRECT_UPLOAD_IMAGE_CONTENT_TYPES`
+        storage(Storage): S3 storage of the image, storage of the field by default
+
+    Returns:
+        DirectUpload: url and form fields of the presigned POST, name of the image in the storage
+
+    Raises:
+        ValueError: if images of the `content_type` can't be uploaded
+    """
+    image_extension = DIRECT_UPLOAD_IMAGE_CONTENT_TYPES.get(content_type)
+    if image_extension is None:
+        raise ValueError(f"Invalid content type: `{content_type}`")
+
+    field: models.FileField = instance._meta.get_field(field_name)
+    storage = storage or field.storage
+    image_name = storage.get_available_name(
+        field.generate_filename(instance, f"{uuid.uuid4().hex}.{image_extension}"), max_length=field.max_length,
+    )
+
+    fields = {'Content-Type': content_type}
+    if storage.default_acl:
+        fields['acl'] = storage.default_acl
+    presigned_post = storage.connection.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=posixpath.join(storage.location, image_name).lstrip('/'),
+        Fields=fields,
+        Conditions=[
+            *({key: value} for key, value in fields.items()),
+            ['content-length-range', 1, DIRECT_UPLOAD_MAX_IMAGE_SIZE],
+        ],
+        ExpiresIn=DIRECT_UPLOAD_EXPIRES_IN,
+    )
+    return DirectUpload(url=presigned_post['url'], fields=presigned_post['fields'], name=image_name)
+
+
+def is_direct_image_upload_completed(
+        instance: models.Model,
+        field_name: str,
+        image_name: str,
+        storage: Storage = None,
+) -> bool:
+    """Check that the image `image_name` has been uploaded directly to the storage for the `instance`.
+
+    Image has to be in the `upload_to` directory of the field, its size can't exceed the limit
+    and it has to be a valid image (as the `ImageField` of the form checks), otherwise the uploaded file is deleted.
+    """
+    field: models.FileField = instance._meta.get_field(field_name)
+    storage = storage or field.storage
+
+    upload_dir = posixpath.dirname(field.generate_filename(instance, 'image'))
+    image_dir, image_filename = posixpath.split(image_name)
+    image_extension = posixpath.splitext(image_filename)[1].lstrip('.')
+    if image_dir != upload_dir or image_extension not in DIRECT_UPLOAD_IMAGE_CONTENT_TYPES.values():
+        return False
+    if not storage.exists(image_name) or storage.size(image_name) > DIRECT_UPLOAD_MAX_IMAGE_SIZE:
+        return False
+    if not is_valid_image_file(storage, image_name):
+        storage.delete(image_name)
+        return False
+    return True
+
+
+def is_valid_image_file(storage: Storage, image_name: str) -> bool:
+    """Check that the file `image_name` in the `storage` can be decoded as an image."""
+    try:
+        with storage.open(image_name, 'rb') as image_file:
+            Image.open(image_file).verify()
+    except Exception:  # Pillow raises various exceptions for invalid images (as in `forms.ImageField`)
+        return False
+    return True
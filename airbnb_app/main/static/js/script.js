@@ -193,3 +193,31 @@ function webSocketChatBot() {
 if (!isMobileAgent) {
     webSocketChatBot();
 }
+
+
+// Direct upload: the file is posted straight to the storage with a presigned POST, Django only confirms the upload
+function uploadImageDirectly(file, uploadUrl, confirmUrl) {
+    const postJson = (url, data) => $.ajax({
+        type: 'POST',
+        url: url,
+        contentType: 'application/json; charset=utf-8',
+        dataType: 'json',
+        data: JSON.stringify(data)
+    });
+
+    return postJson(uploadUrl, {content_type: file.type}).then(function (directUpload) {
+        const formData = new FormData();
+        $.each(directUpload.fields, function (name, value) {
+            formData.append(name, value);
+        });
+        formData.append('file', file);  // the file has to be the last field of the form
+
+        return $.ajax({
+            type: 'POST',
+            url: directUpload.url,
+            data: formData,
+            processData: false,
+            contentType: false
+        }).then(() => postJson(confirmUrl, {name: directUpload.name}));
+    });
+}
@@ -0,0 +1,13 @@
+from airbnb.celery import app
+
+from .services import generate_model_image_renditions
+
+
+@app.task(
+    queue='default',
+    time_limit=60,
+    soft_time_limit=50,
+)
+def generate_image_renditions(model_label: str, pk: int, field_name: str, *args, **kwargs):
+    """Generates renditions of all sizes of the uploaded image and marks them as ready."""
+    generate_model_image_renditions(model_label, pk, field_name)
@@ -1,7 +1,14 @@
+from typing import Union
+
 from django import template
 from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.forms.utils import flatatt
+from django.utils.html import format_html
 
-from ..services import get_target_image_url_with_size
+from ..services import (
+    get_image_file_url_with_size, get_responsive_image, get_target_image_url_with_size, parse_image_size,
+)
 
 
 register = template.Library()
@@ -12,6 +19,8 @@ def url_replace(context, **kwargs) -> str:
     """Update url with optional query parameters."""
     query_params = context['request'].GET.copy()
     query_params.pop('page', None)
+    for key in kwargs:
+        query_params.pop(key, None)
     query_params.update(kwargs)
     return query_params.urlencode()
 
@@ -23,6 +32,56 @@ def has_group(user: settings.AUTH_USER_MODEL, group_name: str) -> bool:
 
 
 @register.filter(name='image_size')
-def image_size(image_url: str, target_size: str) -> str:
-    """Return image url with specified size - `target_size`."""
-    return get_target_image_url_with_size(image_url=image_url, target_size=target_size)
+def image_size(image: Union[FieldFile, str], target_size: str) -> str:
+    """Return image url with specified size - `target_size`.
+
+    Image file is linked with size only if its renditions have been generated, image url is always linked with size.
+    """
+    if not image:
+        return ''
+    if isinstance(image, FieldFile):
+        return get_image_file_url_with_size(image_file=image, target_size=target_size)
+    return get_target_image_url_with_size(image_url=image, target_size=target_size)
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(
+        context,
+        image: Union[FieldFile, str],
+        target_size: str,
+        sizes: str = '',
+        mobile_sizes: str = '',
+        **attrs,
+) -> str:
+    """Render `<img>` with `srcset` of the image renditions (in `<picture>` with WebP renditions, if they are enabled).
+
+    `sizes` is the displayed width of the `target_size` by default, `mobile_sizes` is used for mobile user agents
+    (e.g. `100vw` for fluid images), width and height attributes are taken from the `target_size` by default.
+    Rendered image is memoized for the template render, so the same image (e.g. host avatar) is built once.
+
+    Usage:
+        {% responsive_image realty.cover_image '300x200' mobile_sizes='100vw' alt='Realty image' %}
+    """
+    if not image:
+        return ''
+
+    is_mobile = getattr(context.get('request'), 'is_mobile_agent', False)
+    memo_key = ('responsive_image', str(image), target_size, sizes, mobile_sizes, is_mobile, tuple(attrs.items()))
+    if memo_key in context.render_context:
+        return context.render_context[memo_key]
+
+    target_width, target_height = parse_image_size(target_size)
+    responsive = get_responsive_image(image, target_size, is_mobile=is_mobile)
+    image_sizes = (mobile_sizes if is_mobile else '') or sizes or f"{target_width}px"
+    img_attrs = {'width': target_width, 'height': target_height, **attrs}
+    if responsive.srcset:
+        img_attrs.update(srcset=responsive.srcset, sizes=image_sizes)
+    rendered_image = format_html('<img src="{}"{}>', responsive.src, flatatt(img_attrs))
+    if responsive.webp_srcset:
+        rendered_image = format_html(
+            '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+            responsive.webp_srcset, image_sizes, rendered_image,
+        )
+
+    context.render_context[memo_key] = rendered_image
+    return rendered_image
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import CustomUser
+from addresses.models import Address
+from common.testing_utils import create_valid_image
+from hosts.models import RealtyHost
+from realty.models import Realty, RealtyImage, RealtyTypeChoices
+
+from ..constants import IMAGE_RENDITION_SIZES
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_RENDITIONS_ENABLED=True,
+    IMAGE_RENDITIONS_WEBP_ENABLED=True,
+)
+class GenerateImageRenditionsTests(TestCase):
+    def setUp(self) -> None:
+        test_realty = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.APARTMENTS,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=Address.objects.create(country='Russia', city='Moscow', street='Arbat, 20'),
+            host=RealtyHost.objects.create(
+                user=CustomUser.objects.create_user(
+                    email='user1@gmail.com',
+                    first_name='John',
+                    last_name='Doe',
+                    password='test',
+                ),
+            ),
+        )
+        with mock.patch('main.services.app.send_task'):
+            self.realty_image = RealtyImage.objects.create(
+                image=create_valid_image('image.png'), realty=test_realty,
+            )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)  # delete temp media dir
+        super().tearDownClass()
+
+    @mock.patch('main.services.app.send_task')
+    def test_generate_image_renditions_missing_sizes_and_formats(self, send_task_mock: mock.Mock):
+        """Renditions are scheduled for images without all sizes and formats, listed renditions are kept."""
+        previous_renditions = list(IMAGE_RENDITION_SIZES[:3])
+        RealtyImage.objects.filter(pk=self.realty_image.pk).update(image_renditions=previous_renditions)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('generate_image_renditions', stdout=StringIO())
+
+        send_task_mock.assert_called_once_with(
+            'main.tasks.generate_image_renditions',
+            args=('realty.RealtyImage', self.realty_image.pk, 'image'),
+            queue='default',
+        )
+        self.realty_image.refresh_from_db()
+        self.assertListEqual(self.realty_image.image_renditions, previous_renditions)
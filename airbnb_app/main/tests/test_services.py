@@ -1,7 +1,32 @@
+import base64
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+import fakeredis
+from PIL import Image
+
 from django.conf import settings
-from django.test import SimpleTestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import CustomUser, Profile
+from addresses.models import Address
+from common.testing_utils import create_local_s3_storage
+from common.utils import select_resized_file_storage
+from hosts.models import RealtyHost
+from realty.models import Realty, RealtyImage, RealtyTypeChoices
 
-from ..services import get_target_image_url_with_size
+from ..constants import DIRECT_UPLOAD_MAX_IMAGE_SIZE, IMAGE_RENDITION_SIZES
+from ..services import (
+    ResponsiveImage, create_direct_image_upload, generate_image_renditions, generate_model_image_renditions,
+    get_displayed_cities, get_fill_up_cities, get_image_file_url_with_size, get_image_rendition_name,
+    get_responsive_image, get_responsive_image_sizes, get_target_image_url_with_size, is_direct_image_upload_completed,
+    is_direct_upload_enabled,
+)
 
 
 class MainServicesSimpleTests(SimpleTestCase):
@@ -51,3 +76,409 @@ class MainServicesSimpleTests(SimpleTestCase):
 
         result = get_target_image_url_with_size(image_url=image_url, target_size=target_size)
         self.assertEqual(result, image_url)
+
+    def test_get_responsive_image_sizes(self):
+        """get_responsive_image_sizes() returns rendition sizes with the same aspect ratio, ordered by width."""
+        self.assertListEqual(get_responsive_image_sizes('300x200'), ['300x200', '306x204', '600x400', '900x600'])
+        self.assertListEqual(get_responsive_image_sizes('300x200', max_width=600), ['300x200', '306x204', '600x400'])
+        self.assertListEqual(get_responsive_image_sizes('56x56'), ['56x56', '128x128', '145x145'])
+
+    @override_settings(
+        USE_S3_BUCKET=True,  # enable S3 bucket
+    )
+    def test_get_responsive_image(self):
+        """get_responsive_image() returns `srcset` of renditions up to 2x width on desktop and all on mobile."""
+        image_url = f"{settings.MEDIA_URL}path/to/image.png"
+        resized_url = f"{settings.RESIZED_MEDIA_URL}path/to"
+
+        self.assertEqual(
+            get_responsive_image(image_url, '300x200'),
+            ResponsiveImage(
+                src=f"{resized_url}/300x200/image.png",
+                srcset=(
+                    f"{resized_url}/300x200/image.png 300w, {resized_url}/306x204/image.png 306w, "
+                    f"{resized_url}/600x400/image.png 600w"
+                ),
+                webp_srcset='',
+            ),
+        )
+        self.assertTrue(
+            get_responsive_image(image_url, '300x200', is_mobile=True).srcset.endswith('/900x600/image.png 900w'),
+        )
+
+        with self.settings(IMAGE_RENDITIONS_WEBP_ENABLED=True):
+            webp_srcset = get_responsive_image(image_url, '56x56').webp_srcset
+            self.assertTrue(webp_srcset.startswith(f"{resized_url}/56x56/image.png.webp 56w"))
+
+    @override_settings(
+        USE_S3_BUCKET=False,  # disable S3 bucket
+    )
+    def test_get_responsive_image_s3_disabled(self):
+        """get_responsive_image() returns initial url without `srcset` if S3 bucket is disabled."""
+        image_url = f"{settings.MEDIA_URL}path/to/image.png"
+
+        self.assertEqual(
+            get_responsive_image(image_url, '300x200'),
+            ResponsiveImage(src=image_url, srcset='', webp_srcset=''),
+        )
+
+
+class MainServicesCitiesTests(TestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        fakeredis.FakeStrictRedis(server=self.redis_server).flushall()
+        test_host = RealtyHost.objects.create(
+            user=CustomUser.objects.create_user(
+                email='user1@gmail.com',
+                first_name='John',
+                last_name='Doe',
+                password='test',
+            ),
+        )
+        for index, city in enumerate(['Moscow', 'Rome', 'Paris'], start=1):
+            Realty.objects.create(
+                name=f'Realty {index}',
+                description=f'Desc {index}',
+                is_available=True,
+                realty_type=RealtyTypeChoices.APARTMENTS,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40,
+                location=Address.objects.create(country='Country', city=city, street='Street, 20'),
+                host=test_host,
+            )
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_displayed_cities(self):
+        """get_displayed_cities() fills up popular cities with the other DB cities, without duplicates."""
+        displayed_cities = get_displayed_cities(['Rome'], 3)
+
+        self.assertEqual(displayed_cities[0], 'Rome')
+        self.assertCountEqual(displayed_cities, ['Rome', 'Moscow', 'Paris'])
+        self.assertCountEqual(get_displayed_cities([], 5), ['Rome', 'Moscow', 'Paris'])
+        self.assertListEqual(get_displayed_cities(['Rome', 'Paris', 'Berlin'], 2), ['Rome', 'Paris'])
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_displayed_cities_cached(self):
+        """get_displayed_cities() reads cities that fill up popular cities from Redis, not from DB."""
+        get_displayed_cities([], 3)
+
+        with self.assertNumQueries(0):
+            displayed_cities = get_displayed_cities(['Rome'], 3)
+        self.assertCountEqual(displayed_cities, ['Rome', 'Moscow', 'Paris'])
+        self.assertCountEqual(get_fill_up_cities(6), ['Rome', 'Moscow', 'Paris'])
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_fill_up_cities_empty(self):
+        """get_fill_up_cities() caches an empty list of cities as well."""
+        Realty.objects.update(is_available=False)
+        self.assertListEqual(get_fill_up_cities(6), [])
+
+        with self.assertNumQueries(0):
+            self.assertListEqual(get_fill_up_cities(6), [])
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+RESIZED_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_large_image(filename: str) -> SimpleUploadedFile:
+    with io.BytesIO() as buffer:
+        Image.new('RGBA', (600, 400), color=(255, 0, 0, 128)).save(buffer, 'png')
+        return SimpleUploadedFile(name=filename, content=buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    RESIZED_MEDIA_ROOT=RESIZED_MEDIA_ROOT,
+    IMAGE_RENDITIONS_ENABLED=True,
+)
+class MainServicesImageRenditionsTests(TestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        test_location = Address.objects.create(
+            country='Russia',
+            city='Moscow',
+            street='Arbat, 20',
+        )
+        self.test_realty = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.APARTMENTS,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=test_location,
+            host=RealtyHost.objects.create(user=test_user),
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)  # delete temp media dirs
+        shutil.rmtree(RESIZED_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_generate_image_renditions(self):
+        """generate_image_renditions() saves renditions of all sizes to the resized storage."""
+        realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+        image_dir, image_filename = realty_image.image.name.rsplit('/', 1)
+
+        rendition_names = generate_image_renditions(realty_image.image)
+
+        self.assertListEqual(
+            rendition_names,
+            [f"{image_dir}/{size}/{image_filename}" for size in IMAGE_RENDITION_SIZES],
+        )
+        storage = select_resized_file_storage()
+        for size, rendition_name in zip(IMAGE_RENDITION_SIZES, rendition_names):
+            width, height = map(int, size.split('x'))
+            with storage.open(rendition_name) as rendition_file:
+                rendition = Image.open(rendition_file)
+                self.assertEqual(rendition.format, 'JPEG')
+                self.assertLessEqual(rendition.width, width)
+                self.assertLessEqual(rendition.height, height)
+
+        # renditions are overwritten, not saved with a new name
+        self.assertListEqual(generate_image_renditions(realty_image.image), rendition_names)
+
+    def test_generate_image_renditions_content_type(self):
+        """generate_image_renditions() saves renditions with the content type of their format, not of their name."""
+        realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+        storage = mock.Mock(file_overwrite=True)
+        storage.save.side_effect = lambda name, content: name
+
+        with self.settings(IMAGE_RENDITIONS_WEBP_ENABLED=True):
+            generate_image_renditions(realty_image.image, sizes=['300x200'], storage=storage)
+
+        self.assertListEqual(
+            [(name, content.content_type) for name, content in (call.args for call in storage.save.call_args_list)],
+            [
+                (get_image_rendition_name(realty_image.image.name, '300x200'), 'image/jpeg'),
+                (f"{get_image_rendition_name(realty_image.image.name, '300x200')}.webp", 'image/webp'),
+            ],
+        )
+
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('main.services.app.send_task')
+    def test_schedule_image_renditions_on_realty_image_upload(self, send_task_mock: mock.Mock):
+        """Renditions are generated on realty image upload and marked as ready."""
+        with self.captureOnCommitCallbacks(execute=True):
+            realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+
+        send_task_mock.assert_called_once_with(
+            'main.tasks.generate_image_renditions',
+            args=('realty.RealtyImage', realty_image.pk, 'image'),
+            queue='default',
+        )
+        self.assertTrue(generate_model_image_renditions(*send_task_mock.call_args.kwargs['args']))
+        realty_image.refresh_from_db()
+        self.assertListEqual(realty_image.image_renditions, list(IMAGE_RENDITION_SIZES))
+
+        # changes without a new image don't regenerate renditions
+        with self.captureOnCommitCallbacks(execute=True):
+            realty_image.save()
+        self.assertEqual(send_task_mock.call_count, 1)
+
+        # new image resets renditions
+        realty_image.image = create_large_image('new_image.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            realty_image.save()
+        self.assertEqual(send_task_mock.call_count, 2)
+        realty_image.refresh_from_db()
+        self.assertListEqual(realty_image.image_renditions, [])
+
+    @mock.patch('main.services.app.send_task')
+    def test_schedule_image_renditions_on_profile_image_upload(self, send_task_mock: mock.Mock):
+        """Renditions are generated on profile image upload, but not for the default profile image."""
+        profile = Profile.objects.get(user__email='user1@gmail.com')
+        send_task_mock.assert_not_called()
+
+        profile.profile_image = create_large_image('profile.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        send_task_mock.assert_called_once_with(
+            'main.tasks.generate_image_renditions',
+            args=('accounts.Profile', profile.pk, 'profile_image'),
+            queue='default',
+        )
+
+    @override_settings(USE_S3_BUCKET=True)
+    def test_get_image_file_url_with_size(self):
+        """get_image_file_url_with_size() returns url with size only if renditions are ready."""
+        realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+        image_url = realty_image.image.url
+        resized_image_url = get_target_image_url_with_size(image_url=image_url, target_size='300x200')
+
+        self.assertEqual(get_image_file_url_with_size(image_file=realty_image.image, target_size='300x200'), image_url)
+
+        realty_image.image_renditions = list(IMAGE_RENDITION_SIZES)
+        self.assertEqual(
+            get_image_file_url_with_size(image_file=realty_image.image, target_size='300x200'),
+            resized_image_url,
+        )
+        self.assertEqual(get_image_file_url_with_size(image_file=realty_image.image, target_size='10x10'), image_url)
+
+        with self.settings(IMAGE_RENDITIONS_ENABLED=False):
+            realty_image.image_renditions = []
+            self.assertEqual(
+                get_image_file_url_with_size(image_file=realty_image.image, target_size='300x200'),
+                resized_image_url,
+            )
+
+    @override_settings(USE_S3_BUCKET=True)
+    def test_get_responsive_image_renditions_not_ready(self):
+        """get_responsive_image() returns initial url of the image file without `srcset` until renditions are ready."""
+        realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+
+        self.assertEqual(
+            get_responsive_image(realty_image.image, '300x200'),
+            ResponsiveImage(src=realty_image.image.url, srcset='', webp_srcset=''),
+        )
+
+        realty_image.image_renditions = list(IMAGE_RENDITION_SIZES)
+        self.assertNotEqual(get_responsive_image(realty_image.image, '300x200').srcset, '')
+
+    @override_settings(USE_S3_BUCKET=True, IMAGE_RENDITIONS_WEBP_ENABLED=True)
+    def test_get_responsive_image_missing_renditions(self):
+        """get_responsive_image() links only the generated sizes and formats of the image renditions."""
+        realty_image = RealtyImage.objects.create(image=create_large_image('image.png'), realty=self.test_realty)
+        realty_image.image_renditions = ['300x200', '300x200.webp']
+        image_url = realty_image.image.url
+        resized_image_url = get_target_image_url_with_size(image_url=image_url, target_size='300x200')
+
+        self.assertEqual(
+            get_responsive_image(realty_image.image, '300x200'),
+            ResponsiveImage(
+                src=resized_image_url, srcset=f"{resized_image_url} 300w", webp_srcset=f"{resized_image_url}.webp 300w",
+            ),
+        )
+
+        # renditions generated before WebP
+        realty_image.image_renditions = ['300x200']
+        self.assertEqual(get_responsive_image(realty_image.image, '300x200').webp_srcset, '')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    DIRECT_UPLOADS_ENABLED=True,
+)
+class MainServicesDirectUploadTests(TestCase):
+    def setUp(self) -> None:
+        test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        test_location = Address.objects.create(
+            country='Russia',
+            city='Moscow',
+            street='Arbat, 20',
+        )
+        self.test_realty = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.APARTMENTS,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=test_location,
+            host=RealtyHost.objects.create(user=test_user),
+        )
+        self.s3_storage = create_local_s3_storage()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)  # delete temp media dir
+        super().tearDownClass()
+
+    def test_is_direct_upload_enabled(self):
+        """Direct uploads are enabled for S3 storages only."""
+        self.assertTrue(is_direct_upload_enabled(self.s3_storage))
+        self.assertFalse(is_direct_upload_enabled(RealtyImage._meta.get_field('image').storage))
+
+        with self.settings(DIRECT_UPLOADS_ENABLED=False):
+            self.assertFalse(is_direct_upload_enabled(self.s3_storage))
+
+    def test_create_direct_image_upload(self):
+        """create_direct_image_upload() creates a presigned POST restricted to the new image in the upload dir."""
+        direct_upload = create_direct_image_upload(
+            RealtyImage(realty=self.test_realty), 'image', 'image/png', storage=self.s3_storage,
+        )
+
+        self.assertTrue(direct_upload.url.startswith('http://localhost:9000/'))
+        self.assertRegex(direct_upload.name, rf"^upload/images/realty/{self.test_realty.id}/[0-9a-f]{{32}}\.png$")
+        self.assertEqual(direct_upload.fields['key'], f"media/{direct_upload.name}")
+        self.assertEqual(direct_upload.fields['Content-Type'], 'image/png')
+        self.assertEqual(direct_upload.fields['acl'], 'public-read')
+
+        policy = json.loads(base64.b64decode(direct_upload.fields['policy']))
+        self.assertIn({'key': f"media/{direct_upload.name}"}, policy['conditions'])
+        self.assertIn({'Content-Type': 'image/png'}, policy['conditions'])
+        self.assertIn(['content-length-range', 1, DIRECT_UPLOAD_MAX_IMAGE_SIZE], policy['conditions'])
+
+        # every upload gets a new name
+        self.assertNotEqual(
+            create_direct_image_upload(
+                RealtyImage(realty=self.test_realty), 'image', 'image/png', storage=self.s3_storage,
+            ).name,
+            direct_upload.name,
+        )
+
+    def test_create_direct_image_upload_invalid_content_type(self):
+        """create_direct_image_upload() raises ValueError if files of the content type can't be uploaded."""
+        with self.assertRaises(ValueError):
+            create_direct_image_upload(
+                RealtyImage(realty=self.test_realty), 'image', 'text/html', storage=self.s3_storage,
+            )
+
+    def test_is_direct_image_upload_completed(self):
+        """is_direct_image_upload_completed() checks that the image has been uploaded to the upload dir."""
+        realty_image = RealtyImage(realty=self.test_realty)
+        image_name = create_direct_image_upload(realty_image, 'image', 'image/png', storage=self.s3_storage).name
+        storage = RealtyImage._meta.get_field('image').storage  # local stand-in of the bucket
+
+        self.assertFalse(is_direct_image_upload_completed(realty_image, 'image', image_name))
+
+        storage.save(image_name, ContentFile(create_large_image('image.png').read()))
+        self.assertTrue(is_direct_image_upload_completed(realty_image, 'image', image_name))
+
+        # image of another realty
+        other_realty_image = RealtyImage(realty=Realty(id=self.test_realty.id + 1))
+        self.assertFalse(is_direct_image_upload_completed(other_realty_image, 'image', image_name))
+
+        # files outside of the upload dir and non-image files
+        image_dir = image_name.rsplit('/', 1)[0]
+        storage.save(f"{image_dir}/page.html", ContentFile(b'<html></html>'))
+        self.assertFalse(is_direct_image_upload_completed(realty_image, 'image', f"{image_dir}/page.html"))
+        self.assertFalse(
+            is_direct_image_upload_completed(realty_image, 'image', f"{image_dir}/../{image_name.rsplit('/', 1)[1]}"),
+        )
+
+        with mock.patch.object(storage, 'size', return_value=DIRECT_UPLOAD_MAX_IMAGE_SIZE + 1):
+            self.assertFalse(is_direct_image_upload_completed(realty_image, 'image', image_name))
+
+    def test_is_direct_image_upload_completed_invalid_image(self):
+        """is_direct_image_upload_completed() deletes the uploaded file if it isn't a valid image."""
+        realty_image = RealtyImage(realty=self.test_realty)
+        image_name = create_direct_image_upload(realty_image, 'image', 'image/jpeg', storage=self.s3_storage).name
+        storage = RealtyImage._meta.get_field('image').storage  # local stand-in of the bucket
+        storage.save(image_name, ContentFile(b'<html><script>alert(1)</script></html>'))
+
+        self.assertFalse(is_direct_image_upload_completed(realty_image, 'image', image_name))
+        self.assertFalse(storage.exists(image_name))
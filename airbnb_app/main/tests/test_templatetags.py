@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+
+class MainTemplateTagsTests(SimpleTestCase):
+
+    def render(self, template: str, is_mobile_agent: bool = False, **context) -> str:
+        request = RequestFactory().get('/')
+        request.is_mobile_agent = is_mobile_agent
+        return Template("{% load main_extras %}" + template).render(Context({'request': request, **context}))
+
+    @override_settings(
+        USE_S3_BUCKET=True,  # enable S3 bucket
+    )
+    def test_responsive_image(self):
+        """responsive_image renders `<img>` with `srcset`, `sizes` depend on the mobile user agent."""
+        image_url = f"{settings.MEDIA_URL}path/to/image.png"
+        template = "{% responsive_image image '300x200' mobile_sizes='100vw' alt='Realty image' %}"
+
+        rendered = self.render(template, image=image_url)
+        self.assertTrue(rendered.startswith(f'<img src="{settings.RESIZED_MEDIA_URL}path/to/300x200/image.png"'))
+        for attr in (' width="300"', ' height="200"', ' alt="Realty image"'):
+            self.assertIn(attr, rendered)
+        self.assertIn(' sizes="300px"', rendered)
+        self.assertNotIn('900w', rendered)
+
+        rendered = self.render(template, is_mobile_agent=True, image=image_url)
+        self.assertIn(' sizes="100vw"', rendered)
+        self.assertIn('900w', rendered)
+
+    @override_settings(
+        USE_S3_BUCKET=True,  # enable S3 bucket
+        IMAGE_RENDITIONS_WEBP_ENABLED=True,
+    )
+    def test_responsive_image_webp(self):
+        """responsive_image renders `<picture>` with WebP renditions if they are enabled."""
+        rendered = self.render("{% responsive_image image '56x56' %}", image=f"{settings.MEDIA_URL}image.png")
+
+        self.assertTrue(rendered.startswith('<picture><source type="image/webp" srcset="'))
+        self.assertIn('image.png.webp 56w', rendered)
+        self.assertTrue(rendered.endswith('</picture>'))
+
+    @override_settings(
+        USE_S3_BUCKET=False,  # disable S3 bucket
+    )
+    def test_responsive_image_without_renditions(self):
+        """responsive_image renders plain `<img>` without `srcset` if there are no renditions."""
+        image_url = f"{settings.MEDIA_URL}image.png"
+
+        self.assertEqual(
+            self.render("{% responsive_image image '56x56' class='rounded-circle' %}", image=image_url),
+            f'<img src="{image_url}" class="rounded-circle" height="56" width="56">',
+        )
+        self.assertEqual(self.render("{% responsive_image image '56x56' %}", image=''), '')
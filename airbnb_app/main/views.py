@@ -1,12 +1,17 @@
-from django.db.models import QuerySet
+from typing import List
+
 from django.shortcuts import render
 from django.views import generic
 
+from common.mixins import AnonymousPageCacheMixin
+from realty.constants import REALTY_LIST_VERSION_KEY
+from realty.services.cities import get_most_popular_cities
+
 from .constants import DISPLAYED_CITIES_COUNT
-from .services import get_all_realty_cities
+from .services import get_displayed_cities
 
 
-class HomePageView(generic.TemplateView):
+class HomePageView(AnonymousPageCacheMixin, generic.TemplateView):
     """Display home page."""
 
     template_name = 'index.html'
@@ -14,8 +19,11 @@ class HomePageView(generic.TemplateView):
     def get_context_data(self, **kwargs):
         context = super(HomePageView, self).get_context_data(**kwargs)
 
-        # TODO: get most popular cities (by views + booking count, - Redis, sorted set (another milestone)
-        context['popular_cities']: QuerySet = get_all_realty_cities()[:DISPLAYED_CITIES_COUNT]
+        # leaderboard may have less cities than displayed (e.g. until there are enough visits), DB cities fill it up
+        context['popular_cities']: List[str] = get_displayed_cities(
+            get_most_popular_cities(DISPLAYED_CITIES_COUNT),
+            DISPLAYED_CITIES_COUNT,
+        )
         context['meta_description'] = (
             "Find vacation rentals, cabins, beach houses, "
             "unique homes and experiences around the world - "
@@ -24,6 +32,10 @@ class HomePageView(generic.TemplateView):
 
         return context
 
+    def get_page_cache_version_keys(self) -> List[str]:
+        # popular cities change with visits as well, they are refreshed once the page cache expires
+        return [REALTY_LIST_VERSION_KEY]
+
 
 class RobotsView(generic.TemplateView):
     """Display `robots.txt` file."""
@@ -2,18 +2,19 @@ from django.contrib import admin
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
 
-from .models import Amenity, Realty, RealtyImage
+from .models import Amenity, Realty, RealtyImage, RealtyVisitStats
+from .services.realty import update_realty_availability
 
 
 def make_realty_available(modeladmin: "RealtyAdmin", request: HttpRequest, queryset: QuerySet[Realty]) -> None:
-    queryset.update(is_available=True)
+    update_realty_availability(queryset, is_available=True)
 
 
 make_realty_available.short_description = "Make selected realty available"
 
 
 def make_realty_unavailable(modeladmin: "RealtyAdmin", request: HttpRequest, queryset: QuerySet[Realty]) -> None:
-    queryset.update(is_available=False)
+    update_realty_availability(queryset, is_available=False)
 
 
 make_realty_unavailable.short_description = "Make selected realty unavailable"
@@ -40,7 +41,7 @@ class RealtyAdmin(admin.ModelAdmin):
         ('Realty info', {
             'fields': (
                 'description', 'is_available', 'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
-                'visits_count',
+                'visits_count', 'unique_visits_count',
             ),
         }),
     )
@@ -60,3 +61,10 @@ class RealtyImageAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'realty')
     search_fields = ('realty__name',)
     list_filter = ('realty',)
+
+
+@admin.register(RealtyVisitStats)
+class RealtyVisitStatsAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'realty', 'date', 'visits_count')
+    search_fields = ('realty__name',)
+    list_filter = ('date',)
@@ -0,0 +1,76 @@
+from typing import Iterable, Optional, Tuple
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from django.http import HttpResponse
+
+from common.mixins import ConditionalGetMixin
+
+from ..constants import REALTY_API_EXPAND_QUERY_PARAM, REALTY_API_FIELDS_QUERY_PARAM
+
+
+class SparseFieldsetMixin:
+    """Serialize only requested fields (`?fields=`) and expand only requested relations (`?expand=`) on reads.
+
+    Serializer class has to support sparse fieldsets (see `SparseFieldsetSerializerMixin`),
+    views are responsible for fetching only the columns of the fieldset (see `get_sparse_fieldset()`).
+    """
+
+    fields_query_param: str = REALTY_API_FIELDS_QUERY_PARAM
+    expand_query_param: str = REALTY_API_EXPAND_QUERY_PARAM
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fieldset())
+        return super(SparseFieldsetMixin, self).get_serializer(*args, **kwargs)
+
+    def get_sparse_fieldset(self) -> dict:
+        """Get `fields` and `expand` serializer kwargs from the query params, empty if the request isn't a read."""
+        if self.request.method not in ('GET', 'HEAD'):
+            return {}
+
+        serializer_class = self.get_serializer_class()
+        sparse_fieldset = {}
+        fields = self._get_query_param_names(self.fields_query_param, serializer_class.get_sparse_field_names())
+        if fields is not None:
+            sparse_fieldset['fields'] = fields
+        expand = self._get_query_param_names(self.expand_query_param, serializer_class.expandable_field_names)
+        if expand is not None and serializer_class.expandable_field_names:
+            sparse_fieldset['expand'] = expand
+        return sparse_fieldset
+
+    def _get_query_param_names(self, query_param: str, allowed_names: Iterable[str]) -> Optional[Tuple[str, ...]]:
+        if query_param not in self.request.query_params:
+            return None
+
+        names = tuple(filter(None, (name.strip() for name in self.request.query_params[query_param].split(','))))
+        unknown_names = set(names) - set(allowed_names)
+        if unknown_names:
+            raise ValidationError({query_param: [f"Unknown fields: {', '.join(sorted(unknown_names))}."]})
+        return names
+
+
+class ApiConditionalGetMixin(ConditionalGetMixin):
+    """Answer conditional GET requests to DRF API views with 304 Not Modified (see `ConditionalGetMixin`).
+
+    Validators are checked after `initial()`, so unauthorized or throttled requests are never answered with 304.
+    """
+
+    not_modified_response: Optional[HttpResponse] = None
+
+    def dispatch(self, request, *args, **kwargs):
+        # skips the check of the `ConditionalGetMixin`, it is done in the `initial()`
+        return super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs)
+
+    def initial(self, request: Request, *args, **kwargs):
+        super(ApiConditionalGetMixin, self).initial(request, *args, **kwargs)
+        self.not_modified_response = self.get_not_modified_response(request)
+
+    def get(self, request: Request, *args, **kwargs):
+        if self.not_modified_response is not None:
+            return self.not_modified_response
+        return super(ApiConditionalGetMixin, self).get(request, *args, **kwargs)
+
+    def finalize_response(self, request: Request, response: HttpResponse, *args, **kwargs):
+        response = super(ApiConditionalGetMixin, self).finalize_response(request, response, *args, **kwargs)
+        return self.set_conditional_headers(response)
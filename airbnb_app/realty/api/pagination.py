@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Optional
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from django.core.paginator import InvalidPage
+
+from common.pagination import KeysetPage, KeysetPaginator
+
+from ..constants import REALTY_CURSOR_QUERY_PARAM, REALTY_KEYSET_PAGINATION_ORDERING
+
+
+class RealtyPagination(PageNumberPagination):
+    """Page number pagination with an opt-in keyset (cursor) mode.
+
+    Keyset mode is used if there is a `cursor` query parameter (may be empty for the first page).
+    Responses in this mode don't include `count`, `next` and `previous` links contain cursors instead of page numbers.
+    """
+
+    cursor_query_param = REALTY_CURSOR_QUERY_PARAM
+    keyset_ordering = REALTY_KEYSET_PAGINATION_ORDERING
+    keyset_page: Optional[KeysetPage] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super(RealtyPagination, self).paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        paginator = KeysetPaginator(queryset, page_size, ordering=self.keyset_ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            self.keyset_page = paginator.page(cursor)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=cursor, message=str(exc))
+            raise NotFound(msg)
+        return list(self.keyset_page)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super(RealtyPagination, self).get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if self.keyset_page is None:
+            return super(RealtyPagination, self).get_next_link()
+        if not self.keyset_page.has_next():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.keyset_page.next_cursor)
+
+    def get_previous_link(self):
+        if self.keyset_page is None:
+            return super(RealtyPagination, self).get_previous_link()
+        if not self.keyset_page.has_previous():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.keyset_page.previous_cursor)
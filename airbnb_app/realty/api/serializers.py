@@ -1,3 +1,7 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple, Union
+
+from phonenumber_field.phonenumber import to_python
 from rest_framework import serializers
 
 from django.shortcuts import get_object_or_404
@@ -6,7 +10,28 @@ from accounts.models import CustomUser, Profile
 from addresses.models import Address
 from hosts.models import RealtyHost
 
+from ..constants import REALTY_API_BULK_CREATE_MAX_SIZE
 from ..models import Amenity, Realty
+from ..services.realty import bulk_create_realty, get_amenities_by_realty_ids
+
+
+class SparseFieldsetSerializerMixin:
+    """Model serializer that drops all fields except the given `fields` (sparse fieldset).
+
+    Serializer has no expandable relations, `expandable_field_names` is kept for the common sparse fieldset interface.
+    """
+
+    expandable_field_names: Tuple[str, ...] = ()
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        super(SparseFieldsetSerializerMixin, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_sparse_field_names(cls) -> Tuple[str, ...]:
+        return tuple(cls.Meta.fields)
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -85,9 +110,217 @@ class RealtySerializer(serializers.ModelSerializer):
         return new_realty
 
 
-class RealtyUpdateSerializer(serializers.ModelSerializer):
+class RealtyBulkCreateListSerializer(serializers.ListSerializer):
+    def validate(self, attrs: List[dict]):
+        if len(attrs) > REALTY_API_BULK_CREATE_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Ensure this list has no more than {REALTY_API_BULK_CREATE_MAX_SIZE} realty objects.",
+            )
+        return attrs
+
+    def create(self, validated_data: List[dict]) -> List[Realty]:
+        # `host` is passed to the `save()`, so it is the same for all realty
+        return bulk_create_realty(validated_data[0]['host'], validated_data)
+
+
+class RealtyBulkCreateSerializer(serializers.ModelSerializer):
+    """Serializer of new realty that are created in bulk (see `bulk_create_realty()`).
+
+    Amenities are given by names, missing amenities are created.
+    """
+
+    location = AddressSerializer()
+    amenities = serializers.ListField(
+        child=serializers.CharField(max_length=Amenity._meta.get_field('name').max_length),
+        required=False,
+    )
+
+    class Meta:
+        model = Realty
+        fields = [
+            'name', 'description', 'is_available',
+            'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
+            'location', 'amenities',
+        ]
+        list_serializer_class = RealtyBulkCreateListSerializer
+
+
+class RealtyUpdateSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Realty
         fields = [
             'name', 'description', 'is_available', 'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
         ]
+
+
+class RealtyValuesListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        rows = list(data)
+        if 'amenities' not in self.child.field_names:
+            return [self.child.to_representation(row) for row in rows]
+
+        amenities_by_realty_id = get_amenities_by_realty_ids(row['id'] for row in rows)
+        return [
+            self.child.to_representation({**row, 'amenities': amenities_by_realty_id.get(row['id'], [])})
+            for row in rows
+        ]
+
+
+class RealtyValuesSerializer(serializers.BaseSerializer):
+    """Read-only serializer of realty `values()` rows (see `get_values_fields()`).
+
+    Output is the same as the output of `RealtySerializer`.
+
+    Doesn't create model instances and doesn't go through the nested serializers field by field,
+    amenities are fetched for all rows in a single query if the serializer is used with `many=True`.
+
+    Supports sparse fieldsets: only the given `fields` are serialized, relations that aren't in `expand`
+    are serialized as primary keys, so they aren't joined.
+    """
+
+    realty_field_names = (
+        'id', 'name', 'description', 'is_available', 'created',
+        'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
+    )
+    expandable_field_names = ('location', 'host', 'amenities')
+    expanded_values_fields = {
+        'location': ('location__id', 'location__country', 'location__city', 'location__street'),
+        'host': (
+            'host__id', 'host__host_rating',
+            'host__user__id', 'host__user__email', 'host__user__first_name', 'host__user__last_name',
+            'host__user__is_email_confirmed',
+            'host__user__profile__id', 'host__user__profile__profile_image', 'host__user__profile__date_of_birth',
+            'host__user__profile__gender', 'host__user__profile__phone_number',
+            'host__user__profile__is_phone_number_confirmed', 'host__user__profile__description',
+        ),
+    }
+
+    created_field = serializers.DateTimeField()
+    date_of_birth_field = serializers.DateField()
+
+    class Meta:
+        list_serializer_class = RealtyValuesListSerializer
+
+    def __init__(
+            self,
+            *args,
+            fields: Optional[Iterable[str]] = None,
+            expand: Optional[Iterable[str]] = None,
+            **kwargs,
+    ):
+        super(RealtyValuesSerializer, self).__init__(*args, **kwargs)
+        self.field_names = self.get_field_names(fields)
+        self.expanded_field_names = set(self.expandable_field_names if expand is None else expand)
+
+    @classmethod
+    def get_sparse_field_names(cls) -> Tuple[str, ...]:
+        return cls.realty_field_names + cls.expandable_field_names
+
+    @classmethod
+    def get_field_names(cls, fields: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        """Get names of the serialized `fields` in the output order, all fields are serialized by default."""
+        if fields is None:
+            return cls.get_sparse_field_names()
+        fields = set(fields)
+        return tuple(field_name for field_name in cls.get_sparse_field_names() if field_name in fields)
+
+    @classmethod
+    def get_values_fields(
+            cls,
+            fields: Optional[Iterable[str]] = None,
+            expand: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, ...]:
+        """Get `values()` fields of the realty queryset that are needed to serialize the given sparse fieldset."""
+        expand = set(cls.expandable_field_names if expand is None else expand)
+
+        # `id` is always fetched, amenities are fetched by it
+        values_fields = ['id']
+        for field_name in cls.get_field_names(fields):
+            if field_name in cls.expanded_values_fields:
+                values_fields.extend(cls.expanded_values_fields[field_name] if field_name in expand else [field_name])
+            elif field_name not in ('id', 'amenities'):
+                values_fields.append(field_name)
+        return tuple(values_fields)
+
+    def to_representation(self, row: dict):
+        representation = OrderedDict()
+        for field_name in self.field_names:
+            if field_name == 'location':
+                representation['location'] = self._get_location_representation(row)
+            elif field_name == 'host':
+                representation['host'] = self._get_host_representation(row)
+            elif field_name == 'amenities':
+                representation['amenities'] = self._get_amenities_representation(row)
+            elif field_name == 'created':
+                representation['created'] = self.created_field.to_representation(row['created'])
+            else:
+                representation[field_name] = row[field_name]
+        return representation
+
+    def _get_location_representation(self, row: dict) -> Union[OrderedDict, int]:
+        if 'location' not in self.expanded_field_names:
+            return row['location']
+        return OrderedDict([
+            ('id', row['location__id']),
+            ('country', row['location__country']),
+            ('city', row['location__city']),
+            ('street', row['location__street']),
+        ])
+
+    def _get_host_representation(self, row: dict) -> Union[OrderedDict, int]:
+        if 'host' not in self.expanded_field_names:
+            return row['host']
+        return OrderedDict([
+            ('id', row['host__id']),
+            ('user', OrderedDict([
+                ('id', row['host__user__id']),
+                ('email', row['host__user__email']),
+                ('first_name', row['host__user__first_name']),
+                ('last_name', row['host__user__last_name']),
+                ('is_email_confirmed', row['host__user__is_email_confirmed']),
+                ('profile', self._get_profile_representation(row)),
+            ])),
+            ('host_rating', row['host__host_rating']),
+        ])
+
+    def _get_amenities_representation(self, row: dict) -> Union[List[OrderedDict], List[int]]:
+        amenities = row.get('amenities')
+        if amenities is None:
+            amenities = get_amenities_by_realty_ids([row['id']]).get(row['id'], [])
+
+        if 'amenities' not in self.expanded_field_names:
+            return [amenity['id'] for amenity in amenities]
+        return [OrderedDict([('id', amenity['id']), ('name', amenity['name'])]) for amenity in amenities]
+
+    def _get_profile_representation(self, row: dict) -> Optional[OrderedDict]:
+        if row['host__user__profile__id'] is None:
+            return None
+
+        date_of_birth = row['host__user__profile__date_of_birth']
+        phone_number = row['host__user__profile__phone_number']
+        return OrderedDict([
+            ('id', row['host__user__profile__id']),
+            ('profile_image', self._get_profile_image_url(row['host__user__profile__profile_image'])),
+            ('date_of_birth', self.date_of_birth_field.to_representation(date_of_birth) if date_of_birth else None),
+            ('gender', row['host__user__profile__gender']),
+            ('phone_number', self._get_phone_number_representation(phone_number)),
+            ('is_phone_number_confirmed', row['host__user__profile__is_phone_number_confirmed']),
+            ('description', row['host__user__profile__description']),
+        ])
+
+    @staticmethod
+    def _get_phone_number_representation(phone_number: Optional[str]) -> Optional[str]:
+        # raw DB value is stored in the `PHONENUMBER_DB_FORMAT`, model descriptor converts it to `PhoneNumber`
+        if phone_number is None:
+            return None
+        return str(to_python(phone_number, region=Profile._meta.get_field('phone_number').region))
+
+    def _get_profile_image_url(self, image_name: Optional[str]) -> Optional[str]:
+        # the same as `serializers.ImageField`, but without creating `ImageFieldFile`
+        if not image_name:
+            return None
+        url = Profile._meta.get_field('profile_image').storage.url(image_name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
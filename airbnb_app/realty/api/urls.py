@@ -7,5 +7,7 @@ app_name = 'realty'
 
 urlpatterns = [
     path('realty/', views.RealtyListApiView.as_view(), name='realty_list'),
+    path('realty/bulk/', views.RealtyBulkCreateApiView.as_view(), name='realty_bulk_create'),
+    path('realty/export/<str:export_format>/', views.RealtyExportApiView.as_view(), name='realty_export'),
     path('realty/<int:pk>/', views.RealtyDetailApiView.as_view(), name='realty_detail'),
 ]
@@ -1,34 +1,75 @@
+from datetime import datetime
+from typing import Optional
+
 from rest_framework import generics, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 
+from common.services import get_cache_versions
+
+from ..constants import REALTY_EXPORT_CONTENT_TYPES, REALTY_KEYSET_PAGINATION_ORDERING, REALTY_LIST_VERSION_KEY
 from ..filters import RealtyFilter
-from ..services.realty import get_all_available_realty
+from ..services.cache import get_realty_version_key
+from ..services.export import get_realty_export_stream
+from ..services.realty import (
+    get_all_available_realty, get_available_realty_rows, get_available_realty_updated_by_id,
+    get_available_realty_with_api_details, get_or_create_realty_host_by_user, get_realty_rows_by_ids,
+)
+from .mixins import ApiConditionalGetMixin, SparseFieldsetMixin
+from .pagination import RealtyPagination
 from .permissions import IsAbleToAddRealty, IsRealtyOwnerOrReadOnly
-from .serializers import RealtySerializer, RealtyUpdateSerializer
+from .serializers import RealtyBulkCreateSerializer, RealtySerializer, RealtyUpdateSerializer, RealtyValuesSerializer
 
 
 # TODO: refactor API
 
 
-class RealtyListApiView(generics.ListCreateAPIView):
+class RealtyListApiView(ApiConditionalGetMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
     """API view for listing realty objects.
 
     get:
     Return a list of all available Realty objects.
+    Comma-separated `fields` limit the serialized fields, `expand` - relations that are nested (the rest are ids).
 
     post:
     Create a new Realty object.
     """
 
-    queryset = get_all_available_realty()
+    queryset = get_available_realty_with_api_details()
     serializer_class = RealtySerializer
     filterset_class = RealtyFilter
+    pagination_class = RealtyPagination
     permission_classes = (
         IsAbleToAddRealty,
     )
 
+    def get_queryset(self):
+        if self.request.method in ('GET', 'HEAD'):
+            # lean read path: `values()` rows are serialized without model instances
+            values_fields = RealtyValuesSerializer.get_values_fields(**self.get_sparse_fieldset())
+            # keyset pagination encodes cursors from the ordering fields of the rows
+            ordering_fields = [field_name.lstrip('-') for field_name in REALTY_KEYSET_PAGINATION_ORDERING]
+            return get_available_realty_rows(dict.fromkeys([*values_fields, *ordering_fields]))
+        return super(RealtyListApiView, self).get_queryset()
+
+    def get_serializer_class(self):
+        if self.request.method in ('GET', 'HEAD'):
+            return RealtyValuesSerializer
+        return super(RealtyListApiView, self).get_serializer_class()
+
+    def get_etag_data(self) -> list:
+        return [
+            get_cache_versions([REALTY_LIST_VERSION_KEY]),
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT'),
+        ]
+
     def post(self, request: Request, *args, **kwargs):
         # TODO: finish API (`hosts`)
         host_pk = request.user.host.id
@@ -42,11 +83,12 @@ class RealtyListApiView(generics.ListCreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class RealtyDetailApiView(generics.RetrieveUpdateDestroyAPIView):
+class RealtyDetailApiView(ApiConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view for a single Realty object.
 
     retrieve:
     Return a Realty object by the given id.
+    Comma-separated `fields` limit the serialized fields.
 
     put:
     Update some of the Realty object's fields.
@@ -61,3 +103,90 @@ class RealtyDetailApiView(generics.RetrieveUpdateDestroyAPIView):
         IsAuthenticatedOrReadOnly,
         IsRealtyOwnerOrReadOnly,
     )
+
+    def get_queryset(self):
+        queryset = super(RealtyDetailApiView, self).get_queryset()
+        if self.request.method in ('GET', 'HEAD'):
+            # serializer has only local fields of the realty, so only the columns of the sparse fieldset are fetched
+            fields = self.get_sparse_fieldset().get('fields', RealtyUpdateSerializer.get_sparse_field_names())
+            return queryset.values('id', *fields)
+        if self.request.method not in SAFE_METHODS:
+            # host is needed by the permission check of writes
+            queryset = queryset.select_related('host')
+        return queryset
+
+    @cached_property
+    def realty_updated(self) -> Optional[datetime]:
+        return get_available_realty_updated_by_id(self.kwargs['pk'])
+
+    def get_etag_data(self) -> Optional[list]:
+        if self.realty_updated is None:
+            return None
+        return [
+            self.realty_updated,
+            get_cache_versions([get_realty_version_key(self.kwargs['pk'])]),
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT'),
+        ]
+
+    def get_last_modified(self) -> Optional[datetime]:
+        return self.realty_updated
+
+
+class RealtyBulkCreateApiView(generics.GenericAPIView):
+    """API view for creating many Realty objects of the current user at once.
+
+    post:
+    Create Realty objects from the given list, either all of them are created or none.
+    """
+
+    serializer_class = RealtyBulkCreateSerializer
+    permission_classes = (
+        IsAuthenticated,
+        IsAbleToAddRealty,
+    )
+
+    def post(self, request: Request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        realty_host, _ = get_or_create_realty_host_by_user(request.user)
+        new_realty = serializer.save(host=realty_host)
+
+        realty_rows = get_realty_rows_by_ids(
+            [realty.pk for realty in new_realty], RealtyValuesSerializer.get_values_fields(),
+        )
+        return Response(
+            RealtyValuesSerializer(realty_rows, many=True, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class RealtyExportApiView(APIView):
+    """API view for exporting all available Realty objects.
+
+    get:
+    Stream all available Realty objects in the given format (`ndjson` or `csv`), compressed if `compression=gzip`.
+    """
+
+    permission_classes = (
+        IsAuthenticated,
+    )
+
+    def get(self, request: Request, export_format: str, *args, **kwargs):
+        if export_format not in REALTY_EXPORT_CONTENT_TYPES:
+            raise NotFound(f"Unsupported export format: {export_format}.")
+        compression = request.query_params.get('compression')
+        if compression not in (None, 'gzip'):
+            raise ValidationError({'compression': ["Only `gzip` compression is supported."]})
+
+        filename = f"realty.{export_format}"
+        content_type = REALTY_EXPORT_CONTENT_TYPES[export_format]
+        if compression is not None:
+            filename, content_type = f"{filename}.gz", 'application/gzip'
+
+        response = StreamingHttpResponse(
+            get_realty_export_stream(export_format, compress=compression is not None),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RealtyConfig(AppConfig):
     name = 'realty'
+
+    def ready(self):
+        from . import signals  # noqa: F401, F403
@@ -12,3 +12,156 @@ REALTY_FORM_SESSION_PREFIX = 'realty'
 
 # Indicates the name of the variable in the session that stores all multiple-step forms' specific keys
 REALTY_FORM_KEYS_COLLECTOR_NAME = 'realty_form_keys'
+
+# Indicates the ordering of realty for the keyset (cursor) pagination (matches `realty_available_keyset_idx` index)
+REALTY_KEYSET_PAGINATION_ORDERING = ('-created', '-id')
+
+# Indicates the name of the query parameter that enables the keyset (cursor) pagination
+REALTY_CURSOR_QUERY_PARAM = 'cursor'
+
+# Indicates the name of the Redis hash that stores realty visits (`realty_id` -> visits count) that aren't in the DB yet
+REALTY_VISITS_COUNT_KEY = 'realty:views_count'
+
+# Indicates the name of the Redis hash that stores realty visits that are being flushed to the DB
+REALTY_VISITS_COUNT_FLUSHING_KEY = 'realty:views_count:flushing'
+
+# Indicates the name of the Redis hash that stores `visits_count` of realty in the DB after the last flush,
+# so cached pages and ETags don't depend on the flushed visits
+REALTY_VISITS_COUNT_FLUSHED_KEY = 'realty:views_count:flushed'
+
+# Indicates how long (in seconds) the `REALTY_VISITS_COUNT_FLUSHED_KEY` hash is kept after the last flush,
+# it must be longer than the page cache timeout, so cached pages don't outlive the flushed visits
+REALTY_VISITS_COUNT_FLUSHED_KEY_TTL = 60 * 60 * 24
+
+# Indicates the name of the Redis hash that stores new `visits_count` of realty, whose visits are being flushed,
+# so a flush that has failed after the DB update is repeated without counting the visits twice
+REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY = 'realty:views_count:flushing:totals'
+
+# Indicates how many realty objects are updated by a single SQL statement when flushing visits from Redis
+REALTY_VISITS_FLUSH_BATCH_SIZE = 1000
+
+# Indicates the name of the Redis HyperLogLog that stores unique visitors of the realty
+REALTY_UNIQUE_VISITORS_KEY_TEMPLATE = 'realty:{realty_id}:unique_visitors'
+
+# Indicates the name of the Redis set that stores ids of realty with new unique visitors (since the last flush)
+REALTY_UNIQUE_VISITORS_UPDATED_KEY = 'realty:unique_visitors:updated'
+
+# Indicates the name of the Redis hash that stores realty visits (`realty_id` -> visits count) during an hour (UTC)
+REALTY_VISITS_HOURLY_KEY_TEMPLATE = 'realty:visits:hourly:{hour}'
+
+# Indicates the format of the hour in the `REALTY_VISITS_HOURLY_KEY_TEMPLATE`
+REALTY_VISITS_HOURLY_KEY_HOUR_FORMAT = '%Y%m%d%H'
+
+# Indicates how many seconds hourly visits hashes are kept in Redis if they haven't been rolled up
+REALTY_VISITS_HOURLY_KEY_TTL = 60 * 60 * 24 * 3
+
+# Indicates how many past hours are checked for visits that haven't been rolled up into `RealtyVisitStats`
+REALTY_VISITS_ROLLUP_HOURS = 48
+
+# Indicates the name of the Redis sorted set that stores cities' popularity (city slug -> popularity score)
+REALTY_CITIES_POPULARITY_KEY = 'realty:cities:popularity'
+
+# Indicates the name of the Redis hash that stores city names of the `REALTY_CITIES_POPULARITY_KEY` (city slug -> name)
+REALTY_CITIES_NAMES_KEY = 'realty:cities:names'
+
+# Indicates the name of the Redis key that stores names of the cities with available realty (JSON list),
+# they fill up the leaderboard of popular cities on the home page
+REALTY_CITIES_FILL_UP_KEY_TEMPLATE = 'realty:cities:fill_up:{cities_count}'
+
+# Indicates how many seconds names of the cities that fill up the leaderboard are kept in Redis
+REALTY_CITIES_FILL_UP_TTL = 60 * 10
+
+# Indicates how much a single realty visit adds to its city popularity
+REALTY_CITY_POPULARITY_VISIT_SCORE = 1
+
+# Indicates how much a new realty adds to its city popularity
+REALTY_CITY_POPULARITY_NEW_REALTY_SCORE = 10
+
+# Indicates the multiplier that is applied to all cities' popularity on each decay (once a day)
+REALTY_CITIES_POPULARITY_DECAY_FACTOR = 0.9
+
+# Indicates the popularity score, below which a city is removed from the leaderboard
+REALTY_CITIES_POPULARITY_MIN_SCORE = 1
+
+# Indicates the name of the Redis hash that stores available realty count by city (city slug -> realty count)
+REALTY_CITIES_AVAILABLE_COUNT_KEY = 'realty:cities:available_count'
+
+# Indicates the name of the Redis key that stores the version of the realty data (bumped on realty changes)
+REALTY_VERSION_KEY_TEMPLATE = 'realty:{realty_id}:version'
+
+# Indicates the name of the Redis key that stores the version of the list of realty in the city
+REALTY_CITY_VERSION_KEY_TEMPLATE = 'realty:cities:{city_slug}:version'
+
+# Indicates the name of the Redis key that stores the version of the list of realty in all cities
+REALTY_LIST_VERSION_KEY = 'realty:list:version'
+
+# Indicates the name of the Redis hash of available realty, whose detail page has been rendered (realty id -> city)
+REALTY_DETAIL_PAGE_CITIES_KEY = 'realty:detail:cities'
+
+# Indicates the value that is rendered instead of the realty views count in the cached detail page
+REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER = '__page_cache_realty_views_count__'
+
+# Indicates the query parameter of the realty API with comma-separated names of the serialized fields (sparse fieldset)
+REALTY_API_FIELDS_QUERY_PARAM = 'fields'
+
+# Indicates the query parameter of the realty API with comma-separated names of the expanded (nested) relations
+REALTY_API_EXPAND_QUERY_PARAM = 'expand'
+
+# Indicates the maximum number of realty objects that can be created by a single bulk create API request
+REALTY_API_BULK_CREATE_MAX_SIZE = 500
+
+# Indicates how many realty rows are fetched from the server-side cursor at once by the realty export
+REALTY_EXPORT_CHUNK_SIZE = 2000
+
+# Indicates columns of the realty export (in the output order)
+REALTY_EXPORT_FIELDS = (
+    'id', 'name', 'description', 'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
+    'created', 'updated', 'country', 'city', 'street', 'host_id', 'amenities',
+)
+
+# Indicates supported formats of the realty export (format -> content type)
+REALTY_EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Indicates the separator of amenity names in the CSV realty export
+REALTY_EXPORT_CSV_AMENITIES_SEPARATOR = ';'
+
+# Indicates how many amenities can have a bit in the realty amenities mask (a signed bigint without the sign bit)
+REALTY_AMENITIES_MASK_SIZE = 63
+
+# Indicates lower bounds of the beds count buckets of the realty facets (the last bucket is open-ended)
+REALTY_FACETS_BEDS_COUNT_BUCKETS = (1, 2, 3, 4)
+
+# Indicates lower bounds of the guests count buckets of the realty facets (the last bucket is open-ended)
+REALTY_FACETS_GUESTS_COUNT_BUCKETS = (1, 2, 3, 4, 6)
+
+# Indicates lower bounds of the price per night histogram bins of the realty facets (the last bin is open-ended)
+REALTY_FACETS_PRICE_PER_NIGHT_BUCKETS = (0, 50, 100, 200, 500)
+
+# Indicates query params that filter realty lists, only these params are part of the realty facets cache key
+REALTY_FACETS_QUERY_PARAMS = ('q', 'realty_type', 'beds_count', 'guests_count', 'amenities')
+
+# Indicates the prefix of the realty facets cache keys
+REALTY_FACETS_CACHE_KEY_PREFIX = 'realty:facets'
+
+# Indicates how long (in seconds) realty facets are cached
+REALTY_FACETS_CACHE_TIMEOUT = 60 * 10
+
+# Indicates how long (in seconds) the refresh of the realty materialized view is delayed after a write,
+# all writes within the delay are covered by a single refresh
+REALTY_VIEW_REFRESH_DELAY = 5
+
+# Indicates the name of the Redis key that is set while a refresh of the realty materialized view is scheduled
+REALTY_VIEW_REFRESH_SCHEDULED_KEY = 'realty:view:refresh:scheduled'
+
+# Indicates how long (in seconds) a scheduled refresh blocks scheduling of new ones (e.g. if the task has been lost)
+REALTY_VIEW_REFRESH_SCHEDULED_TTL = 60 * 5
+
+# Indicates the name of the Redis set that stores slugs of cities with realty changes that aren't in the view yet
+REALTY_VIEW_REFRESH_CITIES_KEY = 'realty:view:refresh:cities'
+
+# Indicates the minimum number of full text search results, realty search falls back to the fuzzy (trigram) search
+# if there are fewer results (e.g. there is a typo in the query)
+REALTY_SEARCH_FUZZY_FALLBACK_MIN_RESULTS = 1
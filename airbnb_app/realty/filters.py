@@ -1,11 +1,29 @@
 import django_filters
 
-from .models import Realty
+from django.db.models import QuerySet
+
+from .models import Amenity, Realty
+from .services.realty import filter_realty_by_amenities
+
+
+class AmenitiesMaskFilter(django_filters.ModelMultipleChoiceFilter):
+    """Filter realty that have all the selected amenities by the realty amenities mask (without joins)."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('queryset', Amenity.objects.only('id', 'name', 'mask_bit'))
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return filter_realty_by_amenities(qs, value)
 
 
 class RealtyFilter(django_filters.FilterSet):
     """Filter for a Realty model."""
 
+    amenities = AmenitiesMaskFilter()
+
     class Meta:
         model = Realty
         fields = [
@@ -17,9 +35,35 @@ class RealtyShortFilter(django_filters.FilterSet):
     """Short filter for a Realty model."""
 
     guests_count = django_filters.NumberFilter(field_name='max_guests_count')
+    amenities = AmenitiesMaskFilter()
 
     class Meta:
         model = Realty
         fields = [
             'beds_count', 'guests_count', 'amenities',
         ]
+
+    facet_filter_names = ('beds_count', 'guests_count', 'amenities')
+
+    def get_facets_queryset(self) -> QuerySet[Realty]:
+        """Get the queryset filtered by all the filters that don't have facets (see `get_facet_filter_values()`)."""
+        queryset = self.queryset.all()
+        for name, value in self.get_cleaned_data().items():
+            if name not in self.facet_filter_names:
+                queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    def get_facet_filter_values(self) -> dict:
+        """Get selected values of the filters that have facets, facets are counted without their own filters."""
+        cleaned_data = self.get_cleaned_data()
+        return {
+            'beds_count': cleaned_data.get('beds_count'),
+            'guests_count': cleaned_data.get('guests_count'),
+            'amenities': list(cleaned_data.get('amenities') or []),
+        }
+
+    def get_cleaned_data(self) -> dict:
+        if not self.is_bound:
+            return {}
+        self.form.is_valid()
+        return self.form.cleaned_data
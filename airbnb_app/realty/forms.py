@@ -1,7 +1,10 @@
+from typing import Dict
+
 from django import forms
 
 from .constants import MAX_BEDS_COUNT, MAX_GUESTS_COUNT, MAX_REALTY_IMAGES_COUNT
 from .models import Amenity, Realty, RealtyImage, RealtyTypeChoices
+from .services.facets import RealtyFacets
 
 
 REALTY_FORM_WIDGETS = {
@@ -27,6 +30,15 @@ REALTY_FORM_WIDGETS = {
 }
 
 
+def get_label_with_count(label: str, count: int) -> str:
+    return f"{label} ({count})"
+
+
+def get_facet_counts_text(counts: Dict[str, int]) -> str:
+    """Get counts of the facet buckets as a text, e.g. `1 (12), 2 (5), 3+ (0)`."""
+    return ', '.join(get_label_with_count(label, count) for label, count in counts.items())
+
+
 class RealtyTypeForm(forms.Form):
     """Form for selecting realty types."""
 
@@ -35,6 +47,14 @@ class RealtyTypeForm(forms.Form):
         widget=forms.CheckboxSelectMultiple(),
     )
 
+    def set_facet_counts(self, facets: RealtyFacets) -> None:
+        """Add realty counts to the labels of realty types, e.g. `Hotel (124)`."""
+        choices = [
+            (value, get_label_with_count(label, facets.realty_type.get(value, 0)))
+            for value, label in RealtyTypeChoices.choices
+        ]
+        self.fields['realty_type'].choices = choices
+
 
 class RealtyFiltersForm(forms.Form):
     """Form for filtering realty objects."""
@@ -71,6 +91,14 @@ class RealtyFiltersForm(forms.Form):
     )
     amenities.group = 2
 
+    def set_facet_counts(self, facets: RealtyFacets) -> None:
+        """Add realty counts to the labels of amenities, e.g. `wifi (124)`, and by buckets to the number fields."""
+        self.fields['amenities'].label_from_instance = (
+            lambda amenity: get_label_with_count(amenity.name, facets.amenities.get(amenity.pk, 0))
+        )
+        self.fields['beds_count'].help_text = get_facet_counts_text(facets.beds_count)
+        self.fields['guests_count'].help_text = get_facet_counts_text(facets.guests_count)
+
 
 class RealtyForm(forms.ModelForm):
     """Form for editing (creating or updating) a Realty object."""
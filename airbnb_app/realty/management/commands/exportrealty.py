@@ -0,0 +1,40 @@
+from django.core.management.base import ArgumentParser, BaseCommand, CommandError
+
+from realty.constants import REALTY_EXPORT_CHUNK_SIZE, REALTY_EXPORT_CONTENT_TYPES
+from realty.services.export import get_realty_export_stream
+
+
+class Command(BaseCommand):
+    """Custom management command that exports all available realty to NDJSON or CSV."""
+
+    help = "Exports all available realty to NDJSON or CSV"
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            '--format', dest='export_format', choices=list(REALTY_EXPORT_CONTENT_TYPES), default='ndjson',
+            help='Indicates the export format',
+        )
+        parser.add_argument('--output', help='Indicates the path of the output file, stdout by default')
+        parser.add_argument('--gzip', action='store_true', help='Indicates whether the output is compressed with gzip')
+        parser.add_argument(
+            '--chunk-size', type=int, default=REALTY_EXPORT_CHUNK_SIZE,
+            help='Indicates how many realty rows are fetched from the DB at once',
+        )
+
+    def handle(self, *args, **options):
+        output_path = options['output']
+        compress = options['gzip']
+        if compress and output_path is None:
+            raise CommandError("`--output` is required if the export is compressed")
+
+        stream = get_realty_export_stream(options['export_format'], compress=compress, chunk_size=options['chunk_size'])
+        if output_path is None:
+            for chunk in stream:
+                self.stdout.write(chunk, ending='')
+            return
+
+        file_kwargs = {'mode': 'wb'} if compress else {'mode': 'w', 'encoding': 'utf-8', 'newline': ''}
+        with open(output_path, **file_kwargs) as file:
+            for chunk in stream:
+                file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Successfully exported realty to {output_path}"))
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0004_auto_20210327_1837'),
+        ('realty', '0016_alter_amenity_name'),
+    ]
+
+    # Keep the weights in sync with `SearchVector('name', weight='A') + SearchVector('location__city', weight='B') +
+    # SearchVector('description', weight='B')`
+    create_triggers_sql = """
+    CREATE OR REPLACE FUNCTION realty_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector(COALESCE(NEW.name, '')), 'A') ||
+            setweight(
+                to_tsvector(COALESCE((SELECT a.city FROM addresses_address AS a WHERE a.id = NEW.location_id), '')),
+                'B'
+            ) ||
+            setweight(to_tsvector(COALESCE(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER realty_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description, location_id ON realty_realty
+        FOR EACH ROW EXECUTE PROCEDURE realty_search_vector_update();
+
+    CREATE OR REPLACE FUNCTION address_city_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        -- `location_id` is a trigger column of `realty_search_vector_trigger`, so the vector gets recomputed
+        UPDATE realty_realty SET location_id = location_id WHERE location_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER address_city_search_vector_trigger
+        AFTER UPDATE OF city ON addresses_address
+        FOR EACH ROW WHEN (OLD.city IS DISTINCT FROM NEW.city)
+        EXECUTE PROCEDURE address_city_search_vector_update();
+
+    UPDATE realty_realty SET location_id = location_id;
+    """
+
+    drop_triggers_sql = """
+    DROP TRIGGER IF EXISTS address_city_search_vector_trigger ON addresses_address;
+    DROP FUNCTION IF EXISTS address_city_search_vector_update();
+    DROP TRIGGER IF EXISTS realty_search_vector_trigger ON realty_realty;
+    DROP FUNCTION IF EXISTS realty_search_vector_update();
+    """
+
+    operations = [
+        migrations.AddField(
+            model_name='realty',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='search vector'),
+        ),
+        migrations.RunSQL(sql=create_triggers_sql, reverse_sql=drop_triggers_sql),
+        migrations.AddIndex(
+            model_name='realty',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='realty_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0017_realty_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='realty',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-created', '-id'], name='realty_available_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0018_realty_available_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realty',
+            name='unique_visits_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='unique visits count'),
+        ),
+    ]
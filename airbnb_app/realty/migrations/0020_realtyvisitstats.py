@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0019_realty_unique_visits_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RealtyVisitStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('visits_count', models.PositiveIntegerField(default=0, verbose_name='visits count')),
+                ('realty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visit_stats', to='realty.realty', verbose_name='realty')),
+            ],
+            options={
+                'verbose_name': 'realty visit stats',
+                'verbose_name_plural': 'realty visit stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='realtyvisitstats',
+            constraint=models.UniqueConstraint(fields=('realty', 'date'), name='unique_realty_visit_stats_date'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:14
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Keep in sync with `REALTY_AMENITIES_MASK_SIZE`
+AMENITIES_MASK_SIZE = 63
+
+
+def fill_amenities_masks(apps, schema_editor):
+    Amenity = apps.get_model('realty', 'Amenity')
+    Realty = apps.get_model('realty', 'Realty')
+
+    for mask_bit, amenity_id in enumerate(Amenity.objects.order_by('id').values_list('id', flat=True)):
+        if mask_bit >= AMENITIES_MASK_SIZE:
+            break
+        Amenity.objects.filter(pk=amenity_id).update(mask_bit=mask_bit)
+
+    masks = defaultdict(int)
+    realty_amenities = Realty.amenities.through.objects.filter(amenity__mask_bit__isnull=False)
+    for realty_id, mask_bit in realty_amenities.values_list('realty_id', 'amenity__mask_bit').iterator():
+        masks[realty_id] |= 1 << mask_bit
+    realty_ids_by_mask = defaultdict(list)
+    for realty_id, mask in masks.items():
+        realty_ids_by_mask[mask].append(realty_id)
+    for mask, realty_ids in realty_ids_by_mask.items():
+        Realty.objects.filter(pk__in=realty_ids).update(amenities_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0020_realtyvisitstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='amenity',
+            name='mask_bit',
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True, unique=True, verbose_name='amenities mask bit',
+            ),
+        ),
+        migrations.AddField(
+            model_name='realty',
+            name='amenities_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='amenities mask'),
+        ),
+        migrations.RunPython(fill_amenities_masks, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0021_amenities_mask'),
+    ]
+
+    # keep columns in sync with the `RealtyView` model
+    create_materialized_view_sql = """
+    DROP VIEW IF EXISTS realty_view;
+
+    CREATE MATERIALIZED VIEW realty_view AS
+        SELECT
+            r.id,
+            r.name, r.slug, r.description, r.is_available, r.created, r.updated, r.visits_count,
+            r.realty_type, r.beds_count, r.max_guests_count, r.price_per_night, r.amenities_mask, r.search_vector,
+            r.host_id, r.location_id,
+            l.country, l.city, l.street, l.city_slug,
+            u.email, u.first_name, u.last_name,
+            (
+                SELECT i.image
+                FROM realty_realtyimage AS i
+                WHERE i.realty_id = r.id
+                ORDER BY i."order", i.id
+                LIMIT 1
+            ) AS cover_image_name
+        FROM realty_realty AS r
+        INNER JOIN addresses_address AS l
+            ON r.location_id = l.id
+        INNER JOIN hosts_realtyhost AS h
+            ON r.host_id = h.id
+        INNER JOIN accounts_customuser AS u
+            ON h.user_id = u.id;
+
+    -- `REFRESH MATERIALIZED VIEW CONCURRENTLY` requires a unique index
+    CREATE UNIQUE INDEX realty_view_id_idx ON realty_view (id);
+    CREATE INDEX realty_view_available_keyset_idx ON realty_view (created DESC, id DESC) WHERE is_available;
+    CREATE INDEX realty_view_available_city_idx ON realty_view (city_slug, created DESC, id DESC) WHERE is_available;
+    CREATE INDEX realty_view_search_vector_idx ON realty_view USING GIN (search_vector);
+    """
+
+    drop_materialized_view_sql = """
+    DROP MATERIALIZED VIEW IF EXISTS realty_view;
+
+    CREATE OR REPLACE VIEW realty_view AS
+        SELECT
+            r.id,
+            r.name, r.description, r.is_available, r.realty_type, r.beds_count, r.max_guests_count, r.price_per_night,
+            l.country, l.city, l.street,
+            u.email, u.first_name, u.last_name
+        FROM realty_realty AS r
+        LEFT JOIN addresses_address AS l
+            ON r.location_id = l.id
+        LEFT JOIN hosts_realtyhost AS h
+            ON r.host_id = h.id
+        LEFT JOIN accounts_customuser AS u
+            ON h.user_id = u.id
+        ORDER BY r.id;
+    """
+
+    operations = [
+        migrations.RunSQL(sql=create_materialized_view_sql, reverse_sql=drop_materialized_view_sql),
+        migrations.CreateModel(
+            name='RealtyViewAmenity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'db_table': 'realty_realty_amenities',
+                'managed': False,
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='realtyview',
+            options={'managed': False, 'ordering': ('-created',)},
+        ),
+    ]
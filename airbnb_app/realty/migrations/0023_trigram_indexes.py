@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:28
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0022_realty_materialized_view'),
+    ]
+
+    create_realty_view_indexes_sql = """
+    CREATE INDEX realty_view_name_trgm_idx ON realty_view USING GIN (name gin_trgm_ops);
+    CREATE INDEX realty_view_city_trgm_idx ON realty_view USING GIN (city gin_trgm_ops);
+    """
+
+    drop_realty_view_indexes_sql = """
+    DROP INDEX IF EXISTS realty_view_city_trgm_idx;
+    DROP INDEX IF EXISTS realty_view_name_trgm_idx;
+    """
+
+    operations = [
+        migrations.AddIndex(
+            model_name='realty',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='realty_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(sql=create_realty_view_indexes_sql, reverse_sql=drop_realty_view_indexes_sql),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:30
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realty', '0023_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtyimage',
+            name='image_renditions',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=32), blank=True, default=list, editable=False, size=None, verbose_name='image renditions'),
+        ),
+    ]
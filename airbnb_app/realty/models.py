@@ -1,5 +1,13 @@
+from typing import List, Optional
+
+from model_utils import FieldTracker
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.fields.files import ImageFieldFile
 from django.urls import reverse
 from django.utils.text import slugify
 
@@ -18,6 +26,14 @@ class Amenity(models.Model):
         max_length=100,
         unique=True,
     )
+    # bit of the amenity in `Realty.amenities_mask`, amenities over `REALTY_AMENITIES_MASK_SIZE` don't have a bit
+    mask_bit = models.PositiveSmallIntegerField(
+        verbose_name='amenities mask bit',
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'amenity'
@@ -63,6 +79,7 @@ class Realty(models.Model):
     created = models.DateTimeField(verbose_name="creation date", auto_now_add=True)
     updated = models.DateTimeField(verbose_name="update date", auto_now=True)
     visits_count = models.PositiveIntegerField(verbose_name='visits count', default=0)
+    unique_visits_count = models.PositiveIntegerField(verbose_name='unique visits count', default=0)
     realty_type = models.CharField(
         verbose_name="type of the realty",
         max_length=31,
@@ -92,14 +109,32 @@ class Realty(models.Model):
     location = models.OneToOneField(Address, on_delete=models.CASCADE, verbose_name='location')
     host = models.ForeignKey(RealtyHost, on_delete=models.CASCADE, related_name='realty', verbose_name='realty host')
     amenities = models.ManyToManyField(Amenity, related_name='realty', blank=True, verbose_name='amenities')
+    # `1 << mask_bit` of all realty amenities, maintained on amenities changes (see `update_realty_amenities_masks()`)
+    amenities_mask = models.BigIntegerField(verbose_name='amenities mask', default=0, editable=False)
+
+    # weighted `tsvector` (name, location city, description), maintained by a DB trigger (see migration 0017)
+    search_vector = SearchVectorField(verbose_name='search vector', null=True, editable=False)
 
     objects = RealtyManager()
     available = AvailableRealtyManager()
 
+    availability_tracker = FieldTracker(fields=['is_available', 'location'])
+
     class Meta:
         verbose_name = 'realty'
         verbose_name_plural = 'realty'
         ordering = ('-created',)
+        indexes = [
+            GinIndex(fields=['search_vector'], name='realty_search_vector_idx'),
+            # fuzzy search, see `get_available_realty_fuzzy_search_results()`
+            GinIndex(fields=['name'], name='realty_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            # keyset pagination of available realty, see `REALTY_KEYSET_PAGINATION_ORDERING`
+            models.Index(
+                fields=['-created', '-id'],
+                name='realty_available_keyset_idx',
+                condition=models.Q(is_available=True),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -111,18 +146,41 @@ class Realty(models.Model):
     def get_absolute_url(self):
         return reverse('realty:detail', kwargs={"pk": self.id, "slug": self.slug})
 
+    @property
+    def cover_image(self) -> Optional[ImageFieldFile]:
+        """Realty cover image - the image with the lowest `order`.
+
+        Uses `cover_image_name` and `cover_image_renditions` annotations if they are present
+        (see `get_realty_listing_cards()`).
+        """
+        if not hasattr(self, 'cover_image_name'):
+            first_image: Optional[RealtyImage] = self.images.first()
+            return first_image.image if first_image else None
+        return get_cover_image(self.cover_image_name, getattr(self, 'cover_image_renditions', None))
+
     def delete(self, using=None, keep_parents=False):
+        # location has to be deleted after the realty, otherwise the realty is deleted twice (by the cascade as well)
+        deleted = super(Realty, self).delete(using, keep_parents)
         self.location.delete()
-        super(Realty, self).delete(using, keep_parents)
+        return deleted
 
 
 class RealtyView(models.Model):  # noqa: DJ10, DJ08, DJ11
-    """Postgres View."""
+    """Postgres materialized view of realty with flattened location and host user.
+
+    Read model of the realty listings, the view is refreshed concurrently after writes (see `refresh_realty_view()`),
+    so it may be a few seconds behind `Realty`.
+    Has the same interface as `Realty` in the listing cards (see `get_realty_listing_cards()`).
+    """
 
     id = models.PositiveBigIntegerField(primary_key=True)
     name = models.CharField(verbose_name="name", max_length=255)
+    slug = models.SlugField(verbose_name="slug", max_length=255)
     description = models.TextField(verbose_name="description")
     is_available = models.BooleanField(verbose_name='is realty available', default=False)
+    created = models.DateTimeField(verbose_name="creation date")
+    updated = models.DateTimeField(verbose_name="update date")
+    visits_count = models.PositiveIntegerField(verbose_name='visits count', default=0)
     realty_type = models.CharField(
         verbose_name="type of the realty",
         max_length=31,
@@ -147,22 +205,62 @@ class RealtyView(models.Model):  # noqa: DJ10, DJ08, DJ11
             MinValueValidator(1),
         ],
     )
+    amenities_mask = models.BigIntegerField(verbose_name='amenities mask', default=0)
+    search_vector = SearchVectorField(verbose_name='search vector', null=True)
+    amenities = models.ManyToManyField(
+        Amenity, through='RealtyViewAmenity', related_name='+', verbose_name='amenities',
+    )
+    host_id = models.PositiveBigIntegerField(verbose_name='realty host id')
+    location_id = models.PositiveBigIntegerField(verbose_name='location id')
 
     country = models.CharField(verbose_name='location country', max_length=255)
     city = models.CharField(verbose_name='location city', max_length=255)
     street = models.CharField(verbose_name='location street', max_length=255)
+    city_slug = models.SlugField(verbose_name='location city slug', max_length=255)
 
-    email = models.EmailField(
-        verbose_name='host email',
-        max_length=60,
-        unique=True,
-    )
+    email = models.EmailField(verbose_name='host email', max_length=60)
     first_name = models.CharField(verbose_name='host first name', max_length=40)
     last_name = models.CharField(verbose_name='host last name', max_length=40)
 
+    # name of the image with the lowest `order`, NULL if the realty doesn't have images
+    cover_image_name = models.CharField(verbose_name='cover image name', max_length=255, null=True)  # noqa: DJ01
+
+    objects = models.Manager()
+    available = AvailableRealtyManager()
+
     class Meta:
         managed = False
         db_table = 'realty_view'
+        ordering = ('-created',)
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('realty:detail', kwargs={"pk": self.id, "slug": self.slug})
+
+    @property
+    def location(self) -> Address:
+        """Realty location built from the flattened columns (isn't fetched from the DB)."""
+        return Address(
+            id=self.location_id, country=self.country, city=self.city, street=self.street, city_slug=self.city_slug,
+        )
+
+    @property
+    def cover_image(self) -> Optional[ImageFieldFile]:
+        """Realty cover image, uses `cover_image_renditions` annotation (see `get_realty_listing_cards()`)."""
+        return get_cover_image(self.cover_image_name, getattr(self, 'cover_image_renditions', None))
+
+
+class RealtyViewAmenity(models.Model):  # noqa: DJ10, DJ08, DJ11
+    """Amenities of the `RealtyView` rows, maps the `Realty.amenities` through table."""
+
+    realty = models.ForeignKey(RealtyView, on_delete=models.DO_NOTHING, related_name='+')
+    amenity = models.ForeignKey(Amenity, on_delete=models.DO_NOTHING, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'realty_realty_amenities'
 
 
 RealtyImageModelManager = models.Manager.from_queryset(CustomDeleteQueryset)
@@ -180,6 +278,14 @@ class RealtyImage(models.Model):
         storage=select_file_storage,
         upload_to=get_realty_image_upload_path,
     )
+    # keys of the generated renditions, e.g. 300x200 and 300x200.webp (see `main.services`)
+    image_renditions = ArrayField(
+        models.CharField(max_length=32),
+        verbose_name='image renditions',
+        default=list,
+        blank=True,
+        editable=False,
+    )
     realty = models.ForeignKey(
         Realty,
         on_delete=models.CASCADE,
@@ -195,6 +301,9 @@ class RealtyImage(models.Model):
 
     objects = RealtyImageModelManager()
 
+    # image field tracker
+    image_tracker = FieldTracker(fields=['image'])
+
     class Meta:
         verbose_name = 'realty image'
         verbose_name_plural = 'realty images'
@@ -215,3 +324,33 @@ class RealtyImage(models.Model):
                 realty_image.save(update_fields=['order'])
 
         super(RealtyImage, self).delete(using, keep_parents)
+
+
+def get_cover_image(image_name: Optional[str], renditions: Optional[List[str]]) -> Optional[ImageFieldFile]:
+    """Get realty cover image by the image name, without fetching `RealtyImage` from the DB."""
+    if not image_name:
+        return None
+    return RealtyImage(image=image_name, image_renditions=renditions or []).image
+
+
+class RealtyVisitStats(models.Model):
+    """Realty visits count per day."""
+
+    realty = models.ForeignKey(
+        Realty,
+        on_delete=models.CASCADE,
+        related_name='visit_stats',
+        verbose_name='realty',
+    )
+    date = models.DateField(verbose_name='date')
+    visits_count = models.PositiveIntegerField(verbose_name='visits count', default=0)
+
+    class Meta:
+        verbose_name = 'realty visit stats'
+        verbose_name_plural = 'realty visit stats'
+        constraints = [
+            models.UniqueConstraint(fields=['realty', 'date'], name='unique_realty_visit_stats_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.realty_id} {self.date}: {self.visits_count}"
@@ -0,0 +1,64 @@
+from typing import Iterable, Optional, Union
+
+from django.conf import settings
+
+from configs.redis_conf import redis_instance
+
+from ..constants import (
+    REALTY_CITY_VERSION_KEY_TEMPLATE, REALTY_DETAIL_PAGE_CITIES_KEY, REALTY_LIST_VERSION_KEY,
+    REALTY_VERSION_KEY_TEMPLATE,
+)
+from .realty_view import schedule_realty_view_refresh
+
+
+def get_realty_version_key(realty_id: Union[int, str]) -> str:
+    return REALTY_VERSION_KEY_TEMPLATE.format(realty_id=realty_id)
+
+
+def get_city_version_key(city_slug: str) -> str:
+    return REALTY_CITY_VERSION_KEY_TEMPLATE.format(city_slug=city_slug)
+
+
+def set_realty_detail_page_city(realty_id: Union[int, str], city: str) -> None:
+    """Remember that the detail page of the available realty has been rendered, until the realty is changed."""
+    redis_instance.hset(REALTY_DETAIL_PAGE_CITIES_KEY, str(realty_id), city)
+
+
+def get_realty_detail_page_city(realty_id: Union[int, str]) -> Optional[str]:
+    """Get city of the realty, whose detail page has been rendered since its last change, None if there is no such."""
+    return redis_instance.hget(REALTY_DETAIL_PAGE_CITIES_KEY, str(realty_id))
+
+
+def bump_realty_versions(
+        realty_ids: Iterable[Union[int, str]] = (),
+        city_slugs: Iterable[str] = (),
+        include_realty_list: bool = True,
+        refresh_realty_view: bool = True,
+) -> None:
+    """Bump versions of the given realty and realty lists in the given cities.
+
+    Versions are part of the page cache keys and ETags, so bumping them invalidates cached pages and responses.
+    Changed realty is forgotten by the `get_realty_detail_page_city()`, until its detail page is rendered again.
+    Realty lists are read from the materialized view, so its refresh is scheduled as well (if the view is enabled).
+
+    Args:
+        realty_ids(Iterable[Union[int, str]]): ids of changed realty
+        city_slugs(Iterable[str]): slugs of cities, where realty lists have been changed
+        include_realty_list(bool): whether the list of realty in all cities has been changed
+        refresh_realty_view(bool): whether a refresh of the realty materialized view has to be scheduled
+    """
+    city_slugs = list(city_slugs)
+    if refresh_realty_view and settings.REALTY_VIEW_ENABLED:
+        schedule_realty_view_refresh(city_slugs)
+
+    realty_ids = [str(realty_id) for realty_id in realty_ids]
+    pipe = redis_instance.pipeline(transaction=False)
+    for realty_id in realty_ids:
+        pipe.incr(get_realty_version_key(realty_id))
+    if realty_ids:
+        pipe.hdel(REALTY_DETAIL_PAGE_CITIES_KEY, *realty_ids)
+    for city_slug in city_slugs:
+        pipe.incr(get_city_version_key(city_slug))
+    if include_realty_list:
+        pipe.incr(REALTY_LIST_VERSION_KEY)
+    pipe.execute()
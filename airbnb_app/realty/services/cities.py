@@ -0,0 +1,119 @@
+import json
+from typing import Dict, List, Optional
+
+import aioredis
+import redis
+
+from django.utils.text import slugify
+
+from configs.redis_conf import redis_instance
+
+from ..constants import (
+    REALTY_CITIES_AVAILABLE_COUNT_KEY, REALTY_CITIES_FILL_UP_KEY_TEMPLATE, REALTY_CITIES_FILL_UP_TTL,
+    REALTY_CITIES_NAMES_KEY, REALTY_CITIES_POPULARITY_DECAY_FACTOR, REALTY_CITIES_POPULARITY_KEY,
+    REALTY_CITIES_POPULARITY_MIN_SCORE,
+)
+
+
+def add_city_popularity_commands(pipe: redis.client.Pipeline, city: str, score: float) -> None:
+    """Add commands that increase `city` popularity by the `score` to the Redis pipeline."""
+    city_slug = slugify(city)
+    pipe.zincrby(REALTY_CITIES_POPULARITY_KEY, score, city_slug)
+    pipe.hset(REALTY_CITIES_NAMES_KEY, city_slug, city)
+
+
+def increase_city_popularity(city: str, score: float) -> None:
+    increase_cities_popularity({city: score})
+
+
+def increase_cities_popularity(scores_by_city: Dict[str, float]) -> None:
+    """Increase popularity of the given cities (city name -> score) in a single round trip."""
+    pipe = redis_instance.pipeline(transaction=False)
+    for city, score in scores_by_city.items():
+        add_city_popularity_commands(pipe, city, score)
+    pipe.execute()
+
+
+def get_most_popular_cities(cities_count: int) -> List[str]:
+    """Get names of `cities_count` most popular cities (in descending order)."""
+    city_slugs: List[str] = redis_instance.zrevrange(REALTY_CITIES_POPULARITY_KEY, 0, cities_count - 1)
+    if not city_slugs:
+        return []
+    city_names = redis_instance.hmget(REALTY_CITIES_NAMES_KEY, city_slugs)
+    return [city_name or city_slug for city_slug, city_name in zip(city_slugs, city_names)]
+
+
+def get_cached_fill_up_cities(cities_count: int) -> Optional[List[str]]:
+    """Get cached names of `cities_count` cities with available realty that fill up the leaderboard.
+
+    Returns `None` if the cities are not cached.
+    """
+    cities = redis_instance.get(REALTY_CITIES_FILL_UP_KEY_TEMPLATE.format(cities_count=cities_count))
+    if cities is None:
+        return None
+    return json.loads(cities)
+
+
+def set_cached_fill_up_cities(cities_count: int, cities: List[str]) -> None:
+    """Cache names of `cities_count` cities with available realty for `REALTY_CITIES_FILL_UP_TTL` seconds."""
+    redis_instance.set(
+        REALTY_CITIES_FILL_UP_KEY_TEMPLATE.format(cities_count=cities_count),
+        json.dumps(cities),
+        ex=REALTY_CITIES_FILL_UP_TTL,
+    )
+
+
+def decay_cities_popularity(
+        factor: float = REALTY_CITIES_POPULARITY_DECAY_FACTOR,
+        min_score: float = REALTY_CITIES_POPULARITY_MIN_SCORE,
+) -> None:
+    """Multiply all cities' popularity by the `factor` and remove cities with popularity below the `min_score`."""
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.zunionstore(REALTY_CITIES_POPULARITY_KEY, {REALTY_CITIES_POPULARITY_KEY: factor})
+    pipe.zrangebyscore(REALTY_CITIES_POPULARITY_KEY, '-inf', f"({min_score}")
+    pipe.zremrangebyscore(REALTY_CITIES_POPULARITY_KEY, '-inf', f"({min_score}")
+    _, stale_city_slugs, _ = pipe.execute()
+    if stale_city_slugs:
+        redis_instance.hdel(REALTY_CITIES_NAMES_KEY, *stale_city_slugs)
+
+
+def change_available_realty_count_by_city(changes_by_city_slug: Dict[str, int]) -> bool:
+    """Add changes (city slug -> change) to the cached available realty count by city.
+
+    Changes are applied only if the count is cached, otherwise they would be added to an empty hash.
+
+    Returns:
+        bool: whether the changes have been applied
+    """
+    def add_changes(pipe: redis.client.Pipeline) -> bool:
+        if not pipe.exists(REALTY_CITIES_AVAILABLE_COUNT_KEY):
+            return False
+        pipe.multi()
+        for city_slug, change in changes_by_city_slug.items():
+            pipe.hincrby(REALTY_CITIES_AVAILABLE_COUNT_KEY, city_slug, change)
+        return True
+
+    return redis_instance.transaction(add_changes, REALTY_CITIES_AVAILABLE_COUNT_KEY, value_from_callable=True)
+
+
+def set_available_realty_count_by_city(counts_by_city_slug: Dict[str, int]) -> None:
+    """Replace the cached available realty count by city with the given counts (city slug -> realty count)."""
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.delete(REALTY_CITIES_AVAILABLE_COUNT_KEY)
+    if counts_by_city_slug:
+        pipe.hset(REALTY_CITIES_AVAILABLE_COUNT_KEY, mapping=counts_by_city_slug)
+    pipe.execute()
+
+
+async def get_cached_available_realty_count_by_city(async_redis: aioredis.Redis, city: str) -> Optional[int]:
+    """Get available realty count in the `city` from Redis using asyncio client.
+
+    Returns `None` if the available realty count by city is not cached.
+    """
+    pipe = async_redis.pipeline()
+    pipe.exists(REALTY_CITIES_AVAILABLE_COUNT_KEY)
+    pipe.hget(REALTY_CITIES_AVAILABLE_COUNT_KEY, slugify(city))
+    cached_count_exists, realty_count = await pipe.execute()
+    if not cached_count_exists:
+        return None
+    return int(realty_count) if realty_count else 0
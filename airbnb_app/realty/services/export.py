@@ -0,0 +1,110 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from common.utils import iter_gzip
+
+from ..constants import (
+    REALTY_EXPORT_CHUNK_SIZE, REALTY_EXPORT_CONTENT_TYPES, REALTY_EXPORT_CSV_AMENITIES_SEPARATOR, REALTY_EXPORT_FIELDS,
+)
+from ..models import Realty, RealtyView
+from .realty import get_amenities_by_realty_ids
+
+
+class _EchoBuffer:
+    """File-like object that returns written value, so `csv.writer` can be used for streaming."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_realty_export_rows(chunk_size: int = REALTY_EXPORT_CHUNK_SIZE) -> Iterator[dict]:
+    """Iterate over flat rows (see `REALTY_EXPORT_FIELDS`) of all available realty with constant memory.
+
+    Rows are fetched from a server-side cursor by `chunk_size`, amenity names are fetched once per chunk.
+    Rows are read from the materialized `RealtyView` if it is enabled.
+    """
+    realty_fields = (
+        'id', 'name', 'description', 'realty_type', 'beds_count', 'max_guests_count', 'price_per_night',
+        'created', 'updated', 'host_id',
+    )
+    if settings.REALTY_VIEW_ENABLED:
+        # location columns are already flattened in the view
+        rows = RealtyView.available.order_by('id').values(*realty_fields, 'country', 'city', 'street')
+    else:
+        rows = Realty.available.order_by('id').values(
+            *realty_fields,
+            country=F('location__country'), city=F('location__city'), street=F('location__street'),
+        )
+    rows = rows.iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk: List[dict] = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        amenities_by_realty_id = get_amenities_by_realty_ids(row['id'] for row in chunk)
+        for row in chunk:
+            row['amenities'] = [amenity['name'] for amenity in amenities_by_realty_id.get(row['id'], [])]
+            yield {field_name: row[field_name] for field_name in REALTY_EXPORT_FIELDS}
+
+
+def iter_realty_export_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    """Serialize realty export rows to NDJSON lines."""
+    for row in rows:
+        yield f"{json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)}\n"
+
+
+def iter_realty_export_csv(rows: Iterable[dict]) -> Iterator[str]:
+    """Serialize realty export rows to CSV lines (with a header), amenity names are joined into a single column."""
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(REALTY_EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_get_csv_value(value) for value in row.values()])
+
+
+def get_realty_export_stream(
+        export_format: str,
+        compress: bool = False,
+        chunk_size: int = REALTY_EXPORT_CHUNK_SIZE,
+) -> Iterator:
+    """Get a lazy stream of the realty export in the given format.
+
+    Args:
+        export_format(str): one of the `REALTY_EXPORT_CONTENT_TYPES`
+        compress(bool): whether the stream is compressed with gzip
+        chunk_size(int): number of realty rows fetched from the DB at once
+
+    Returns:
+        Iterator: `str` chunks, or `bytes` chunks if the stream is compressed
+    """
+    if export_format not in REALTY_EXPORT_CONTENT_TYPES:
+        raise ValueError(f"Unsupported realty export format: {export_format}")
+
+    serialize = iter_realty_export_csv if export_format == 'csv' else iter_realty_export_ndjson
+    lines = serialize(get_realty_export_rows(chunk_size))
+    chunks = _join_lines(lines, chunk_size)
+    return iter_gzip(chunks) if compress else chunks
+
+
+def _join_lines(lines: Iterable[str], lines_count: int) -> Iterator[str]:
+    # a chunk per line would mean a write (and a compression call) per realty
+    while True:
+        chunk = ''.join(islice(lines, lines_count))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _get_csv_value(value):
+    if isinstance(value, list):
+        return REALTY_EXPORT_CSV_AMENITIES_SEPARATOR.join(value)
+    if isinstance(value, datetime):
+        # the same format as in the NDJSON export
+        return DjangoJSONEncoder().default(value)
+    return value
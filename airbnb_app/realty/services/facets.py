@@ -0,0 +1,179 @@
+import hashlib
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.http import QueryDict
+
+from common.services import get_cache_versions
+
+from ..constants import (
+    REALTY_FACETS_BEDS_COUNT_BUCKETS, REALTY_FACETS_CACHE_KEY_PREFIX, REALTY_FACETS_CACHE_TIMEOUT,
+    REALTY_FACETS_GUESTS_COUNT_BUCKETS, REALTY_FACETS_PRICE_PER_NIGHT_BUCKETS, REALTY_FACETS_QUERY_PARAMS,
+    REALTY_LIST_VERSION_KEY,
+)
+from ..models import Amenity, Realty, RealtyTypeChoices
+from .cache import get_city_version_key
+from .realty import get_realty_amenities_filter
+
+
+class FacetBucket(NamedTuple):
+    label: str
+    lower: int
+    upper: Optional[int]  # exclusive, `None` for the last (open-ended) bucket
+
+
+class RealtyFacets(NamedTuple):
+    """Realty counts by the values of the realty filters."""
+
+    realty_type: Dict[str, int]
+    beds_count: Dict[str, int]
+    guests_count: Dict[str, int]
+    price_per_night: Dict[str, int]
+    amenities: Dict[int, int]  # amenity id -> realty count
+
+
+class RealtyFacetsFilters(NamedTuple):
+    """Selected values of the realty filters that have facets."""
+
+    realty_types: Sequence[str] = ()
+    beds_count: Optional[int] = None
+    guests_count: Optional[int] = None
+    amenities: Sequence[Amenity] = ()
+
+
+def get_facet_buckets(lower_bounds: Sequence[int]) -> List[FacetBucket]:
+    """Get buckets with the given lower bounds, labels are `2`, `3-4` or `5+` (for the last bucket)."""
+    buckets = []
+    for lower, upper in zip(lower_bounds, [*lower_bounds[1:], None]):
+        if upper is None:
+            label = f"{lower}+"
+        elif upper - lower == 1:
+            label = f"{lower}"
+        else:
+            label = f"{lower}-{upper - 1}"
+        buckets.append(FacetBucket(label=label, lower=lower, upper=upper))
+    return buckets
+
+
+def get_realty_facets(realty_qs: QuerySet[Realty], filters: Optional[RealtyFacetsFilters] = None) -> RealtyFacets:
+    """Count realty in the `realty_qs` by type, beds and guests buckets, price histogram bins and amenities.
+
+    All counts are computed by a single aggregate query (a filtered aggregate per facet value).
+    Every facet is counted with all the selected `filters` except its own one,
+    so the counts show how many realty are found if a value of the facet is checked as well.
+    Amenities are counted by bits of `Realty.amenities_mask`, so amenities without a mask bit aren't counted.
+
+    Args:
+        realty_qs(QuerySet[Realty]): realty filtered by all the filters except the `filters`
+        filters(Optional[RealtyFacetsFilters]): selected values of the realty filters that have facets
+
+    Returns:
+        RealtyFacets: realty counts by the values of the realty filters
+    """
+    filters = filters or RealtyFacetsFilters()
+    realty_qs = realty_qs.order_by()
+
+    facet_filters: Dict[str, Q] = {}
+    if filters.realty_types:
+        facet_filters['realty_type'] = Q(realty_type__in=filters.realty_types)
+    if filters.beds_count is not None:
+        facet_filters['beds_count'] = Q(beds_count=filters.beds_count)
+    if filters.guests_count is not None:
+        facet_filters['guests_count'] = Q(max_guests_count=filters.guests_count)
+    if filters.amenities:
+        realty_qs, facet_filters['amenities'] = get_realty_amenities_filter(realty_qs, filters.amenities)
+
+    def get_other_filters(facet: str) -> Q:
+        other_filters = Q()
+        for filter_facet, facet_filter in facet_filters.items():
+            if filter_facet != facet:
+                other_filters &= facet_filter
+        return other_filters
+
+    aggregates = {}
+    facet_values: Dict[str, Tuple[str, object]] = {}
+
+    def add_facet_value(facet: str, value: object, aggregate) -> None:
+        alias = f"facet_{len(aggregates)}"
+        aggregates[alias] = aggregate
+        facet_values[alias] = (facet, value)
+
+    realty_type_filters = get_other_filters('realty_type')
+    for realty_type in RealtyTypeChoices.values:
+        add_facet_value(
+            'realty_type', realty_type, Count('id', filter=Q(realty_type=realty_type) & realty_type_filters),
+        )
+
+    bucket_facets = (
+        ('beds_count', 'beds_count', REALTY_FACETS_BEDS_COUNT_BUCKETS),
+        ('guests_count', 'max_guests_count', REALTY_FACETS_GUESTS_COUNT_BUCKETS),
+        ('price_per_night', 'price_per_night', REALTY_FACETS_PRICE_PER_NIGHT_BUCKETS),
+    )
+    for facet, field_name, lower_bounds in bucket_facets:
+        other_filters = get_other_filters(facet)
+        for bucket in get_facet_buckets(lower_bounds):
+            bucket_filter = Q(**{f"{field_name}__gte": bucket.lower})
+            if bucket.upper is not None:
+                bucket_filter &= Q(**{f"{field_name}__lt": bucket.upper})
+            add_facet_value(facet, bucket.label, Count('id', filter=bucket_filter & other_filters))
+
+    amenities_filters = get_other_filters('amenities')
+    amenity_bits = Amenity.objects.filter(mask_bit__isnull=False).order_by('id').values_list('id', 'mask_bit')
+    for amenity_id, mask_bit in amenity_bits:
+        add_facet_value(
+            'amenities', amenity_id,
+            Sum(F('amenities_mask').bitrightshift(mask_bit).bitand(1), filter=amenities_filters or None),
+        )
+
+    facets: Dict[str, dict] = {facet: {} for facet in RealtyFacets._fields}
+    for alias, count in realty_qs.aggregate(**aggregates).items():
+        facet, value = facet_values[alias]
+        facets[facet][value] = int(count or 0)
+    return RealtyFacets(**facets)
+
+
+def get_realty_facets_cache_key(city_slug: Optional[str], query_params: QueryDict, versions: List[str]) -> str:
+    """Get cache key of the realty facets.
+
+    Key is built from the city, normalized filter params (see `REALTY_FACETS_QUERY_PARAMS`) and the `versions`.
+    """
+    filters = [
+        (param, sorted({value for value in query_params.getlist(param) if value}))
+        for param in REALTY_FACETS_QUERY_PARAMS
+    ]
+    facets_key = json.dumps([city_slug, [(param, values) for param, values in filters if values], versions])
+    return f"{REALTY_FACETS_CACHE_KEY_PREFIX}:{hashlib.sha1(facets_key.encode()).hexdigest()}"
+
+
+def get_cached_realty_facets(
+        realty_qs: QuerySet[Realty],
+        query_params: QueryDict,
+        city_slug: Optional[str] = None,
+        filters: Optional[RealtyFacetsFilters] = None,
+) -> RealtyFacets:
+    """Get realty facets of the `realty_qs` from the cache, facets are computed on a cache miss.
+
+    Cached facets are invalidated by the version of the realty list in the city (or in all cities).
+
+    Args:
+        realty_qs(QuerySet[Realty]): realty filtered by all the filters except the `filters`
+        query_params(QueryDict): query params of the realty filters
+        city_slug(Optional[str]): slug of the city of the realty list, `None` for all cities
+        filters(Optional[RealtyFacetsFilters]): selected values of the realty filters that have facets
+
+    Returns:
+        RealtyFacets: realty counts by the values of the realty filters
+    """
+    if not settings.REALTY_FACETS_CACHE_ENABLED:
+        return get_realty_facets(realty_qs, filters)
+
+    version_key = get_city_version_key(city_slug) if city_slug else REALTY_LIST_VERSION_KEY
+    cache_key = get_realty_facets_cache_key(city_slug, query_params, get_cache_versions([version_key]))
+    facets: Optional[RealtyFacets] = cache.get(cache_key)
+    if facets is None:
+        facets = get_realty_facets(realty_qs, filters)
+        cache.set(cache_key, facets, REALTY_FACETS_CACHE_TIMEOUT)
+    return facets
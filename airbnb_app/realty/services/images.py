@@ -1,7 +1,15 @@
-from typing import List, Union
+from typing import List, Optional, Union
 
-from ..models import CustomDeleteQueryset, RealtyImage
+from django.db import transaction
+
+from main.services import (
+    DirectUpload, create_direct_image_upload, is_direct_image_upload_completed, is_direct_upload_enabled,
+)
+
+from ..models import CustomDeleteQueryset, Realty, RealtyImage
+from .cache import bump_realty_versions
 from .order import ImageOrder
+from .realty import touch_realty_by_ids
 
 
 def get_images_by_realty_id(realty_id: Union[int, str]) -> 'CustomDeleteQueryset[RealtyImage]':
@@ -16,3 +24,39 @@ def update_images_order(new_order: List[ImageOrder]) -> None:
     """Update images order with the given `new_order`."""
     for image_order in new_order:
         get_image_by_id(image_order.image_id).update(order=image_order.order)
+
+    # `QuerySet.update()` doesn't send any signals, cover images of the realty may have been changed
+    realty_ids_with_city_slugs = list(
+        RealtyImage.objects.filter(
+            id__in=[image_order.image_id for image_order in new_order],
+        ).values_list('realty_id', 'realty__location__city_slug').order_by().distinct(),
+    )
+    touch_realty_by_ids(realty_id for realty_id, _ in realty_ids_with_city_slugs)
+    transaction.on_commit(lambda: bump_realty_versions(
+        realty_ids=[realty_id for realty_id, _ in realty_ids_with_city_slugs],
+        city_slugs={city_slug for _, city_slug in realty_ids_with_city_slugs},
+    ))
+
+
+def is_realty_image_direct_upload_enabled() -> bool:
+    return is_direct_upload_enabled(RealtyImage._meta.get_field('image').storage)
+
+
+def create_realty_image_upload(realty: Realty, content_type: str) -> DirectUpload:
+    """Create a presigned POST, that uploads a new image of the `realty` directly to the storage."""
+    return create_direct_image_upload(RealtyImage(realty=realty), 'image', content_type)
+
+
+def confirm_realty_image_upload(realty: Realty, image_name: str) -> Optional[RealtyImage]:
+    """Create RealtyImage of the image that has been uploaded directly to the storage.
+
+    Renditions of the image are scheduled by the `post_save` signal, as for the images uploaded with the form.
+
+    Returns:
+        Optional[RealtyImage]: new image, None if the image hasn't been uploaded or has already been confirmed
+    """
+    if not is_direct_image_upload_completed(RealtyImage(realty=realty), 'image', image_name):
+        return None
+    if RealtyImage.objects.filter(image=image_name).exists():
+        return None
+    return RealtyImage.objects.create(realty=realty, image=image_name)
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple, Union
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from django.conf import settings
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db.models import F, QuerySet
-
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.text import slugify
+
+from addresses.models import Address
 from common.session_handler import SessionHandler
 from configs.redis_conf import redis_instance
 from hosts.models import RealtyHost
 
-from ..constants import REALTY_FORM_SESSION_PREFIX
-from ..models import Amenity, Realty
+from ..constants import (
+    REALTY_AMENITIES_MASK_SIZE, REALTY_CITY_POPULARITY_NEW_REALTY_SCORE, REALTY_CITY_POPULARITY_VISIT_SCORE,
+    REALTY_FORM_SESSION_PREFIX, REALTY_SEARCH_FUZZY_FALLBACK_MIN_RESULTS, REALTY_UNIQUE_VISITORS_KEY_TEMPLATE,
+    REALTY_UNIQUE_VISITORS_UPDATED_KEY, REALTY_VISITS_COUNT_FLUSHED_KEY, REALTY_VISITS_COUNT_FLUSHED_KEY_TTL,
+    REALTY_VISITS_COUNT_FLUSHING_KEY, REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY, REALTY_VISITS_COUNT_KEY,
+    REALTY_VISITS_FLUSH_BATCH_SIZE, REALTY_VISITS_HOURLY_KEY_HOUR_FORMAT, REALTY_VISITS_HOURLY_KEY_TEMPLATE,
+    REALTY_VISITS_HOURLY_KEY_TTL, REALTY_VISITS_ROLLUP_HOURS,
+)
+from ..models import Amenity, Realty, RealtyImage, RealtyView, RealtyVisitStats
+from .cache import bump_realty_versions
+from .cities import (
+    add_city_popularity_commands, change_available_realty_count_by_city, increase_cities_popularity,
+    set_available_realty_count_by_city,
+)
 
 
 def get_amenity_ids_from_session(session_handler: SessionHandler) -> Optional[QuerySet[int]]:
@@ -29,6 +49,76 @@ def get_all_available_realty() -> 'QuerySet[Realty]':
     return Realty.available.all()
 
 
+def get_available_realty_listing(city_slug: Optional[str] = None) -> 'QuerySet[Union[Realty, RealtyView]]':
+    """Get available realty for the realty lists, optionally in the city with the given `city_slug`.
+
+    Rows of the materialized `RealtyView` are used if it is enabled (see `REALTY_VIEW_ENABLED`),
+    so lists, filters and search don't join locations.
+    """
+    if not settings.REALTY_VIEW_ENABLED:
+        return get_available_realty_by_city_slug(city_slug) if city_slug else get_all_available_realty()
+    if city_slug:
+        return RealtyView.available.filter(city_slug=city_slug)
+    return RealtyView.available.all()
+
+
+def get_available_realty_with_details() -> 'QuerySet[Realty]':
+    """Get all available realty with everything that is displayed on the realty detail page.
+
+    Location and host (with user and profile) are joined, images and amenities are prefetched.
+    """
+    return Realty.available.select_related(
+        'location', 'host__user__profile',
+    ).prefetch_related(
+        'images', 'amenities',
+    )
+
+
+def get_available_realty_with_api_details() -> 'QuerySet[Realty]':
+    """Get all available realty with everything that is serialized by the realty API (see `RealtySerializer`).
+
+    Location and host (with user and profile) are joined, amenities are prefetched.
+    """
+    return Realty.available.select_related(
+        'location', 'host__user__profile',
+    ).prefetch_related(
+        Prefetch('amenities', queryset=Amenity.objects.order_by('id')),
+    )
+
+
+def get_available_realty_rows(fields: Iterable[str]) -> 'QuerySet[dict]':
+    """Get `values()` rows of all available realty, `fields` may span relations (e.g. `location__city`)."""
+    return Realty.available.values(*fields)
+
+
+def get_amenities_by_realty_ids(realty_ids: Iterable[Union[int, str]]) -> Dict[int, List[dict]]:
+    """Get amenities (`id` and `name`) of the given realty in a single query, ordered by id."""
+    amenities_by_realty_id: Dict[int, List[dict]] = defaultdict(list)
+    realty_amenities = Realty.amenities.through.objects.filter(
+        realty_id__in=list(realty_ids),
+    ).order_by(
+        'amenity_id',
+    ).values_list('realty_id', 'amenity_id', 'amenity__name')
+    for realty_id, amenity_id, amenity_name in realty_amenities:
+        amenities_by_realty_id[realty_id].append({'id': amenity_id, 'name': amenity_name})
+    return amenities_by_realty_id
+
+
+def get_available_realty_updated_by_id(realty_id: Union[int, str]) -> Optional[datetime]:
+    """Get update date of the available realty, None if there is no such realty."""
+    return Realty.available.filter(pk=realty_id).values_list('updated', flat=True).first()
+
+
+def get_realty_ids_with_city_slugs_by_host_user(user_id: Union[int, str]) -> List[Tuple[int, str]]:
+    """Get ids and city slugs of all realty of the host with the given `user_id`."""
+    return list(Realty.objects.filter(host__user_id=user_id).values_list('id', 'location__city_slug'))
+
+
+def touch_realty_by_ids(realty_ids: Iterable[Union[int, str]]) -> None:
+    """Set `updated` of the realty to the current date, e.g. after realty images or amenities have been changed."""
+    Realty.objects.filter(pk__in=list(realty_ids)).update(updated=timezone.now())
+
+
 def get_available_realty_by_host(realty_host: RealtyHost) -> 'QuerySet[Realty]':
     return Realty.available.filter(host=realty_host)
 
@@ -55,6 +145,42 @@ def get_available_realty_filtered_by_type(
     return Realty.available.filter(realty_type__in=realty_types)
 
 
+def get_realty_listing_cards(
+        realty_qs: 'QuerySet[Union[Realty, RealtyView]]',
+) -> 'QuerySet[Union[Realty, RealtyView]]':
+    """Get `realty_qs` with all the data needed to render realty listing cards.
+
+    Location is joined, amenities are prefetched and the cover image (image with the lowest `order`)
+    is annotated as `cover_image_name` (with `cover_image_renditions`),
+    so the number of queries doesn't depend on the number of cards.
+    `RealtyView` rows already have location and cover image columns, so only amenities are prefetched.
+
+    Args:
+        realty_qs(QuerySet[Union[Realty, RealtyView]]): realty to display
+
+    Returns:
+        QuerySet[Union[Realty, RealtyView]]: realty with related data
+    """
+    amenities = Prefetch('amenities', queryset=Amenity.objects.order_by('name'))
+    # renditions are listed after the view refresh, so they are always read from the `RealtyImage`
+    cover_image_renditions = RealtyImage.objects.filter(
+        realty=OuterRef('pk'),
+        image=OuterRef('cover_image_name'),
+    ).values('image_renditions')[:1]
+    if realty_qs.model is RealtyView:
+        return realty_qs.prefetch_related(amenities).annotate(
+            cover_image_renditions=Subquery(cover_image_renditions),
+        )
+
+    cover_image = RealtyImage.objects.filter(realty=OuterRef('pk')).order_by('order', 'id').values('image')[:1]
+    return realty_qs.select_related('location').prefetch_related(
+        amenities,
+    ).annotate(
+        cover_image_name=Subquery(cover_image),
+        cover_image_renditions=Subquery(cover_image_renditions),
+    )
+
+
 def get_last_realty() -> Realty:
     return Realty.objects.last()
 
@@ -71,47 +197,571 @@ def get_available_realty_count_by_city(city: str) -> int:
     return Realty.available.filter(location__city__iexact=city).count()
 
 
-def get_available_realty_search_results(query: Optional[str] = None) -> 'QuerySet[Realty]':
+def get_available_realty_count_changes_by_realty(realty: Realty, created: bool) -> Dict[str, int]:
+    """Get changes of the available realty count by city (city slug -> change) after the `realty` was saved.
+
+    Must be called before `realty.availability_tracker` is reset (e.g. in the `post_save` signal handler).
+    """
+    changes: Counter[str] = Counter()
+    if not created and realty.availability_tracker.previous('is_available'):
+        previous_location_id = realty.availability_tracker.previous('location')
+        if previous_location_id == realty.location_id:
+            changes[realty.location.city_slug] -= 1
+        else:
+            previous_city_slug = Address.objects.filter(pk=previous_location_id).values_list('city_slug', flat=True)
+            for city_slug in previous_city_slug:
+                changes[city_slug] -= 1
+    if realty.is_available:
+        changes[realty.location.city_slug] += 1
+    return {city_slug: change for city_slug, change in changes.items() if change}
+
+
+def get_available_realty_count_changes_by_address(address: Address) -> Dict[str, int]:
+    """Get changes of the available realty count by city (city slug -> change) after the `address` was saved.
+
+    Must be called before `address.city_tracker` is reset (e.g. in the `post_save` signal handler).
+    """
+    previous_city_slug = address.city_tracker.previous('city_slug')
+    if not previous_city_slug or previous_city_slug == address.city_slug:
+        return {}
+    realty_count = Realty.available.filter(location_id=address.pk).count()
+    if not realty_count:
+        return {}
+    return {previous_city_slug: -realty_count, address.city_slug: realty_count}
+
+
+def update_realty_availability(realty_qs: QuerySet[Realty], is_available: bool) -> int:
+    """Set `is_available` of all realty in the `realty_qs` and update the cached available realty count by city.
+
+    `QuerySet.update()` doesn't send any signals, so the cached count and page cache versions have to be updated here.
+
+    Args:
+        realty_qs(QuerySet[Realty]): realty to update
+        is_available(bool): new `is_available` value
+
+    Returns:
+        int: number of realty objects that have been changed
+    """
+    with transaction.atomic():
+        changed_realty = list(
+            realty_qs.exclude(is_available=is_available).select_for_update().values_list('id', 'location__city_slug'),
+        )
+        if not changed_realty:
+            return 0
+        Realty.objects.filter(id__in=[realty_id for realty_id, _ in changed_realty]).update(is_available=is_available)
+
+        change = 1 if is_available else -1
+        changes: Counter[str] = Counter()
+        for _, city_slug in changed_realty:
+            changes[city_slug] += change
+
+        def update_cached_data():
+            apply_available_realty_count_changes(changes)
+            bump_realty_versions(
+                realty_ids=[realty_id for realty_id, _ in changed_realty], city_slugs=changes.keys(),
+            )
+
+        transaction.on_commit(update_cached_data)
+    return len(changed_realty)
+
+
+def get_amenity_mask(amenities: Iterable[Amenity]) -> int:
+    """Get the realty amenities mask of the given amenities, amenities without a mask bit are skipped."""
+    mask = 0
+    for amenity in amenities:
+        if amenity.mask_bit is not None:
+            mask |= 1 << amenity.mask_bit
+    return mask
+
+
+def filter_realty_by_amenities(
+        realty_qs: QuerySet[Union[Realty, RealtyView]],
+        amenities: Iterable[Amenity],
+) -> QuerySet[Union[Realty, RealtyView]]:
+    """Filter realty that have all the given amenities (see `get_realty_amenities_filter()`)."""
+    realty_qs, amenities_filter = get_realty_amenities_filter(realty_qs, amenities)
+    return realty_qs.filter(amenities_filter)
+
+
+def get_realty_amenities_filter(
+        realty_qs: QuerySet[Union[Realty, RealtyView]],
+        amenities: Iterable[Amenity],
+) -> Tuple[QuerySet[Union[Realty, RealtyView]], Q]:
+    """Get a filter of realty that have all the given amenities, it may be used in filtered aggregates as well.
+
+    Amenities with a mask bit are checked by a single `amenities_mask & required = required` predicate
+    instead of a join per amenity; amenities without a mask bit (see `REALTY_AMENITIES_MASK_SIZE`) are checked
+    by a subquery.
+
+    Returns:
+        Tuple[QuerySet, Q]: `realty_qs` with the alias of the required amenities mask and the filter
+    """
+    amenities = list(amenities)
+    amenities_filter = Q()
+    for amenity in amenities:
+        if amenity.mask_bit is None:
+            # works for `RealtyView` rows as well
+            amenities_filter &= Q(pk__in=Realty.amenities.through.objects.filter(amenity=amenity).values('realty_id'))
+
+    required_mask = get_amenity_mask(amenities)
+    if not required_mask:
+        return realty_qs, amenities_filter
+    realty_qs = realty_qs.alias(required_amenities_mask=F('amenities_mask').bitand(required_mask))
+    return realty_qs, amenities_filter & Q(required_amenities_mask=required_mask)
+
+
+def update_realty_amenities_masks(realty_ids: Iterable[Union[int, str]]) -> Dict[int, int]:
+    """Recalculate `amenities_mask` of the given realty from their amenities, one query per distinct mask.
+
+    Returns:
+        Dict[int, int]: new masks (realty id -> amenities mask)
+    """
+    masks = dict.fromkeys((int(realty_id) for realty_id in realty_ids), 0)
+    if not masks:
+        return masks
+    realty_amenities = Realty.amenities.through.objects.filter(
+        realty_id__in=list(masks), amenity__mask_bit__isnull=False,
+    )
+    for realty_id, mask_bit in realty_amenities.values_list('realty_id', 'amenity__mask_bit'):
+        masks[realty_id] |= 1 << mask_bit
+
+    realty_ids_by_mask: Dict[int, List[int]] = defaultdict(list)
+    for realty_id, mask in masks.items():
+        realty_ids_by_mask[mask].append(realty_id)
+    for mask, ids in realty_ids_by_mask.items():
+        Realty.objects.filter(pk__in=ids).update(amenities_mask=mask)
+    return masks
+
+
+def assign_amenity_mask_bits() -> Dict[int, int]:
+    """Assign free bits of the realty amenities mask to amenities without a bit, in the order of creation.
+
+    Realty of amenities that have got a bit (e.g. a bit of a deleted amenity) get their masks recalculated.
+
+    Returns:
+        Dict[int, int]: assigned bits (amenity id -> mask bit)
+    """
+    with transaction.atomic():
+        amenities = list(Amenity.objects.select_for_update().order_by('id').values_list('id', 'mask_bit'))
+        used_bits = {mask_bit for _, mask_bit in amenities if mask_bit is not None}
+        free_bits = (mask_bit for mask_bit in range(REALTY_AMENITIES_MASK_SIZE) if mask_bit not in used_bits)
+        assigned_bits = dict(zip((amenity_id for amenity_id, mask_bit in amenities if mask_bit is None), free_bits))
+
+        for amenity_id, mask_bit in assigned_bits.items():
+            Amenity.objects.filter(pk=amenity_id).update(mask_bit=mask_bit)
+        if assigned_bits:
+            update_realty_amenities_masks(
+                Realty.amenities.through.objects.filter(
+                    amenity_id__in=list(assigned_bits),
+                ).values_list('realty_id', flat=True).distinct(),
+            )
+    return assigned_bits
+
+
+def get_or_create_amenities_by_names(names: Iterable[str]) -> Dict[str, Amenity]:
+    """Get amenities with the given names (name -> amenity), missing amenities are inserted in one statement."""
+    names = set(names)
+    if not names:
+        return {}
+    Amenity.objects.bulk_create([Amenity(name=name) for name in names], ignore_conflicts=True)
+    amenities_by_name = {amenity.name: amenity for amenity in Amenity.objects.filter(name__in=names)}
+
+    # `bulk_create()` doesn't send `post_save`, so new amenities don't have mask bits yet
+    if any(amenity.mask_bit is None for amenity in amenities_by_name.values()) and assign_amenity_mask_bits():
+        amenities_by_name = {amenity.name: amenity for amenity in Amenity.objects.filter(name__in=names)}
+    return amenities_by_name
+
+
+def bulk_create_realty(realty_host: RealtyHost, realty_data: List[dict]) -> List[Realty]:
+    """Create realty of the `realty_host` with locations and amenities in a fixed number of queries.
+
+    `bulk_create()` doesn't call `save()` and doesn't send any signals,
+    so slugs, the cached available realty count, cities popularity and page cache versions are updated here.
+
+    Args:
+        realty_host(RealtyHost): host of the new realty
+        realty_data(List[dict]): realty fields with nested `location` and `amenities` (list of names)
+
+    Returns:
+        List[Realty]: created realty
+    """
+    with transaction.atomic():
+        amenities_by_name = get_or_create_amenities_by_names(
+            amenity_name for data in realty_data for amenity_name in data.get('amenities', [])
+        )
+
+        locations = [
+            Address(
+                **data['location'],
+                city_slug=slugify(data['location']['city']),
+                country_slug=slugify(data['location']['country']),
+            )
+            for data in realty_data
+        ]
+        Address.objects.bulk_create(locations)
+
+        # `host` may be given by the serializer, it is the same for all realty
+        nested_field_names = ('location', 'amenities', 'host')
+        new_realty = [
+            Realty(
+                **{field_name: value for field_name, value in data.items() if field_name not in nested_field_names},
+                slug=slugify(data['name']),
+                location=location,
+                host=realty_host,
+                amenities_mask=get_amenity_mask(
+                    amenities_by_name[amenity_name] for amenity_name in data.get('amenities', [])
+                ),
+            )
+            for data, location in zip(realty_data, locations)
+        ]
+        Realty.objects.bulk_create(new_realty)
+
+        realty_amenities = [
+            Realty.amenities.through(realty_id=realty.pk, amenity_id=amenities_by_name[amenity_name].pk)
+            for realty, data in zip(new_realty, realty_data)
+            for amenity_name in set(data.get('amenities', []))
+        ]
+        Realty.amenities.through.objects.bulk_create(realty_amenities)
+
+        available_count_changes: Counter[str] = Counter()
+        popularity_scores: Counter[str] = Counter()
+        for realty in new_realty:
+            if realty.is_available:
+                available_count_changes[realty.location.city_slug] += 1
+                popularity_scores[realty.location.city] += REALTY_CITY_POPULARITY_NEW_REALTY_SCORE
+
+        def update_cached_data():
+            if available_count_changes:
+                apply_available_realty_count_changes(available_count_changes)
+                increase_cities_popularity(popularity_scores)
+            bump_realty_versions(
+                realty_ids=[realty.pk for realty in new_realty],
+                city_slugs={location.city_slug for location in locations},
+            )
+
+        transaction.on_commit(update_cached_data)
+    return new_realty
+
+
+def get_realty_rows_by_ids(realty_ids: Iterable[Union[int, str]], fields: Iterable[str]) -> 'QuerySet[dict]':
+    """Get `values()` rows of the realty with the given ids (available or not), ordered by id."""
+    return Realty.objects.filter(pk__in=list(realty_ids)).order_by('id').values(*fields)
+
+
+def update_cached_available_realty_count_by_city() -> None:
+    """Recalculate the cached available realty count by city from DB."""
+    counts_by_city_slug = dict(
+        Realty.available.values_list('location__city_slug').annotate(realty_count=Count('id')).order_by(),
+    )
+    set_available_realty_count_by_city(counts_by_city_slug)
+
+
+def apply_available_realty_count_changes(changes_by_city_slug: Dict[str, int]) -> None:
+    """Add changes (city slug -> change) to the cached available realty count by city.
+
+    If the count is not cached yet (e.g. right after deployment), it is calculated from DB instead,
+    so must be called after the changes have been committed.
+    """
+    if not change_available_realty_count_by_city(changes_by_city_slug):
+        update_cached_available_realty_count_by_city()
+
+
+def get_available_realty_search_results(
+        query: Optional[str] = None,
+        realty_qs: Optional['QuerySet[Union[Realty, RealtyView]]'] = None,
+) -> 'QuerySet[Union[Realty, RealtyView]]':
     """Get all available realty filtered by a `query`.
 
     If `query` isn't passed, return all available realty objects.
+    If full text search finds fewer than `REALTY_SEARCH_FUZZY_FALLBACK_MIN_RESULTS` realty (e.g. there is a typo),
+    it is blended with the trigram similarity of realty name and city
+    (see `get_available_realty_fuzzy_search_results()`).
 
     Args:
         query(Optional[str]): search query
+        realty_qs(Optional[QuerySet[Union[Realty, RealtyView]]]): available realty to search in
 
     Returns:
         CustomDeleteQueryset[Realty]: filtered realty
     """
-    if query:
-        search_vector = (
-            SearchVector('name', weight='A') +
-            SearchVector('location__city', weight='B') +
-            SearchVector('description', weight='B')
-        )
-        search_query = SearchQuery(query.lower())
+    if realty_qs is None:
+        realty_qs = Realty.available.all()
+    if not query:
+        return realty_qs
+
+    search_query = SearchQuery(query.lower())
+    # `search_vector` is a stored, trigger-maintained column, so the match is served by the GIN index
+    search_results = realty_qs.annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+    ).filter(search_vector=search_query, rank__gte=0.2).order_by('-rank')
+
+    if search_results[:REALTY_SEARCH_FUZZY_FALLBACK_MIN_RESULTS].count() >= REALTY_SEARCH_FUZZY_FALLBACK_MIN_RESULTS:
+        return search_results
+    return get_available_realty_fuzzy_search_results(query, realty_qs)
+
+
+def get_available_realty_fuzzy_search_results(
+        query: str,
+        realty_qs: 'QuerySet[Union[Realty, RealtyView]]',
+) -> 'QuerySet[Union[Realty, RealtyView]]':
+    """Get realty that match the `query` by full text search or by trigram similarity of the realty name or city.
+
+    Realty are ordered by the sum of the search rank and the best trigram similarity.
+    Trigram matches use the `%` operator, so they are served by the `gin_trgm_ops` indexes.
+    """
+    search_query = SearchQuery(query.lower())
+    # `RealtyView` has a flattened location
+    city_field_name = 'city' if realty_qs.model is RealtyView else 'location__city'
+
+    return realty_qs.filter(
+        Q(search_vector=search_query) |
+        Q(name__trigram_similar=query) |
+        Q(**{f"{city_field_name}__trigram_similar": query}),
+    ).annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        similarity=Greatest(TrigramSimilarity('name', query), TrigramSimilarity(city_field_name, query)),
+    ).order_by(
+        (F('rank') + F('similarity')).desc(),
+    )
+
+
+def update_realty_visits_count(
+        realty_id: Union[int, str],
+        visitor_id: Optional[str] = None,
+        city: Optional[str] = None,
+) -> int:
+    """Count realty visit in Redis.
+
+    If `visitor_id` is given, it is added to the realty unique visitors HyperLogLog as well.
+    If `city` is given, its popularity is increased.
 
-        return Realty.available.annotate(
-            rank=SearchRank(search_vector, search_query),
-        ).filter(rank__gte=0.2).order_by('-rank')
-    return Realty.available.all()
+    Args:
+        realty_id(Union[int, str]): realty id
+        visitor_id(Optional[str]): visitor id (see `get_visitor_id()`)
+        city(Optional[str]): realty location city
 
+    Returns:
+        int: realty visits count that hasn't been flushed to the DB yet
+    """
+    hourly_key = _get_realty_visits_hourly_key(timezone.now())
 
-def update_realty_visits_count(realty_id: Union[int, str]) -> int:
-    return int(redis_instance.incr(f"realty:{str(realty_id)}:views_count"))
+    pipe = redis_instance.pipeline(transaction=False)
+    pipe.hincrby(REALTY_VISITS_COUNT_KEY, str(realty_id), 1)
+    pipe.hincrby(hourly_key, str(realty_id), 1)
+    pipe.expire(hourly_key, REALTY_VISITS_HOURLY_KEY_TTL)
+    if visitor_id is not None:
+        pipe.pfadd(REALTY_UNIQUE_VISITORS_KEY_TEMPLATE.format(realty_id=realty_id), visitor_id)
+        pipe.sadd(REALTY_UNIQUE_VISITORS_UPDATED_KEY, str(realty_id))
+    if city:
+        add_city_popularity_commands(pipe, city, REALTY_CITY_POPULARITY_VISIT_SCORE)
+    return int(pipe.execute()[0])
 
 
 def get_cached_realty_visits_count_by_realty_id(realty_id: Union[int, str]) -> int:
-    views_count = redis_instance.get(f"realty:{str(realty_id)}:views_count")
-    return int(views_count) if views_count is not None else 0
+    # visits that are being flushed right now aren't in the DB yet as well
+    pipe = redis_instance.pipeline(transaction=False)
+    pipe.hget(REALTY_VISITS_COUNT_KEY, str(realty_id))
+    pipe.hget(REALTY_VISITS_COUNT_FLUSHING_KEY, str(realty_id))
+    return sum(int(views_count) for views_count in pipe.execute() if views_count is not None)
+
+
+def get_realty_visits_count(realty_id: Union[int, str], visits_count: int) -> int:
+    """Get total visits count of the realty: visits in DB and visits in Redis that aren't in the DB yet.
+
+    DB visits count after the last flush is read from Redis as well, so `visits_count` (e.g. stored in a cached page)
+    is used only if the realty visits haven't been flushed since Redis has started.
+
+    Args:
+        realty_id(Union[int, str]): realty id
+        visits_count(int): `visits_count` of the realty in DB
+
+    Returns:
+        int: total visits count
+    """
+    # all counters are read atomically, so a concurrent flush doesn't count visits twice
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.hget(REALTY_VISITS_COUNT_FLUSHED_KEY, str(realty_id))
+    pipe.hget(REALTY_VISITS_COUNT_KEY, str(realty_id))
+    pipe.hget(REALTY_VISITS_COUNT_FLUSHING_KEY, str(realty_id))
+    flushed_visits_count, *new_visits_counts = pipe.execute()
+    if flushed_visits_count is not None:
+        visits_count = int(flushed_visits_count)
+    return visits_count + sum(int(views_count) for views_count in new_visits_counts if views_count is not None)
+
+
+def get_cached_realty_unique_visits_count_by_realty_id(realty_id: Union[int, str]) -> int:
+    return int(redis_instance.pfcount(REALTY_UNIQUE_VISITORS_KEY_TEMPLATE.format(realty_id=realty_id)))
 
 
 def update_realty_visits_from_redis() -> None:
-    for key in redis_instance.scan_iter(match="realty:*:views_count"):
-        realty_id = int(key.split(":")[1])
-        visits_count = redis_instance.get(name=key)
-        Realty.objects.filter(
-            id=realty_id,
-        ).update(
-            visits_count=F('visits_count') + visits_count,
-        )
-        redis_instance.set(name=key, value=0)
+    """Add realty visits counted in Redis to the `visits_count` field in DB.
+
+    Visits hash is atomically renamed, so new visits are counted in a fresh hash while the old one is being flushed.
+    If the previous flush has failed, its leftovers are flushed first and new visits wait for the next run.
+    New `visits_count` values are stored in Redis before the DB update and set in DB as is,
+    so a flush that has failed after the DB commit is repeated with the same values instead of counting visits twice.
+    """
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.renamenx(REALTY_VISITS_COUNT_KEY, REALTY_VISITS_COUNT_FLUSHING_KEY)
+    pipe.hgetall(REALTY_VISITS_COUNT_FLUSHING_KEY)
+    pipe.hgetall(REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY)
+    # `RENAMENX` fails if there are no new visits, `HGETALL` returns leftovers (if any) in this case
+    _, visits, visits_totals = pipe.execute(raise_on_error=False)
+    if not visits:
+        return
+
+    if not visits_totals:
+        visits_totals = {
+            str(realty_id): visits_count + int(visits[str(realty_id)])
+            for realty_id, visits_count in Realty.objects.filter(
+                id__in=[int(realty_id) for realty_id in visits],
+            ).values_list('id', 'visits_count')
+        }
+        if visits_totals:
+            redis_instance.hset(REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY, mapping=visits_totals)
+
+    visits_by_realty_id = [(int(realty_id), int(visits_count)) for realty_id, visits_count in visits_totals.items()]
+    flushed_visits_by_realty_id = _update_realty_counters('visits_count', visits_by_realty_id)
+    # realty versions aren't bumped: cached detail pages store `visits_count` from DB,
+    # but new DB values are read from Redis instead (see `get_realty_visits_count()`)
+    pipe = redis_instance.pipeline(transaction=True)
+    if flushed_visits_by_realty_id:
+        pipe.hset(REALTY_VISITS_COUNT_FLUSHED_KEY, mapping=dict(flushed_visits_by_realty_id))
+    pipe.expire(REALTY_VISITS_COUNT_FLUSHED_KEY, REALTY_VISITS_COUNT_FLUSHED_KEY_TTL)
+    pipe.delete(REALTY_VISITS_COUNT_FLUSHING_KEY, REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY)
+    pipe.execute()
+
+
+def delete_realty_flushed_visits_count(realty_id: Union[int, str]) -> None:
+    """Delete `visits_count` of the deleted realty flushed last from Redis."""
+    redis_instance.hdel(REALTY_VISITS_COUNT_FLUSHED_KEY, str(realty_id))
+
+
+def update_realty_unique_visits_from_redis() -> None:
+    """Set `unique_visits_count` field in DB to the Redis HyperLogLog estimations of realty visited since the last run.
+
+    Counters are absolute, so a failed run only postpones the update until the next one.
+    """
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.smembers(REALTY_UNIQUE_VISITORS_UPDATED_KEY)
+    pipe.delete(REALTY_UNIQUE_VISITORS_UPDATED_KEY)
+    realty_ids = sorted(int(realty_id) for realty_id in pipe.execute()[0])
+    if not realty_ids:
+        return
+
+    try:
+        pipe = redis_instance.pipeline(transaction=False)
+        for realty_id in realty_ids:
+            pipe.pfcount(REALTY_UNIQUE_VISITORS_KEY_TEMPLATE.format(realty_id=realty_id))
+        _update_realty_counters('unique_visits_count', list(zip(realty_ids, pipe.execute())))
+    except Exception:
+        redis_instance.sadd(REALTY_UNIQUE_VISITORS_UPDATED_KEY, *realty_ids)
+        raise
+
+
+def roll_up_realty_visits_stats() -> None:
+    """Add hourly realty visits from Redis to daily `RealtyVisitStats`.
+
+    Only finished hours are rolled up. Each hourly hash is atomically renamed before reading,
+    so it is never rolled up twice; leftovers of a failed roll-up are picked up by the next run.
+    """
+    current_hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    hours = [current_hour - timedelta(hours=i) for i in range(1, REALTY_VISITS_ROLLUP_HOURS + 1)]
+    flushing_keys = [f"{_get_realty_visits_hourly_key(hour)}:flushing" for hour in hours]
+
+    pipe = redis_instance.pipeline(transaction=True)
+    for hour, flushing_key in zip(hours, flushing_keys):
+        pipe.renamenx(_get_realty_visits_hourly_key(hour), flushing_key)
+        pipe.hgetall(flushing_key)
+    # `RENAMENX` fails if there were no visits during the hour, results of `HGETALL` are every second item
+    hourly_visits: List[Dict[str, str]] = pipe.execute(raise_on_error=False)[1::2]
+
+    daily_visits: Dict[Tuple[int, date], int] = defaultdict(int)
+    for hour, visits in zip(hours, hourly_visits):
+        visits_date = timezone.localtime(hour).date()
+        for realty_id, visits_count in visits.items():
+            daily_visits[(int(realty_id), visits_date)] += int(visits_count)
+    if not daily_visits:
+        return
+
+    rows = [(realty_id, visits_date, visits_count) for (realty_id, visits_date), visits_count in daily_visits.items()]
+    stats_table = RealtyVisitStats._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(rows), REALTY_VISITS_FLUSH_BATCH_SIZE):
+            batch = rows[i:i + REALTY_VISITS_FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s, %s, %s)'] * len(batch))
+            # visits of deleted realty are skipped by the join
+            cursor.execute(
+                f"INSERT INTO {stats_table} (realty_id, date, visits_count) "
+                f"SELECT visits.realty_id, visits.date, visits.visits_count "
+                f"FROM (VALUES {values}) AS visits (realty_id, date, visits_count) "
+                f"JOIN {Realty._meta.db_table} AS realty ON realty.id = visits.realty_id "
+                f"ON CONFLICT (realty_id, date) "
+                f"DO UPDATE SET visits_count = {stats_table}.visits_count + EXCLUDED.visits_count",
+                [param for row in batch for param in row],
+            )
+    redis_instance.delete(*flushing_keys)
+
+
+def get_host_realty_visits_by_day(realty_host: RealtyHost, days: int) -> Dict[date, int]:
+    """Get total visits of all `realty_host` realty per day for the last `days` days (including today).
+
+    Visits of the current hour aren't rolled up yet (see `roll_up_realty_visits_stats()`).
+
+    Args:
+        realty_host(RealtyHost): realty host
+        days(int): number of days
+
+    Returns:
+        Dict[date, int]: visits count by date (in ascending order), days without visits are included as well
+    """
+    today = timezone.localdate()
+    start_date = today - timedelta(days=days - 1)
+    visits_by_date = dict(
+        RealtyVisitStats.objects.filter(
+            realty__host=realty_host,
+            date__gte=start_date,
+        ).values('date').annotate(
+            total_visits_count=Sum('visits_count'),
+        ).order_by().values_list('date', 'total_visits_count'),
+    )
+    return {
+        start_date + timedelta(days=i): visits_by_date.get(start_date + timedelta(days=i), 0)
+        for i in range(days)
+    }
+
+
+def _get_realty_visits_hourly_key(moment: datetime) -> str:
+    hour = moment.astimezone(dt_timezone.utc).strftime(REALTY_VISITS_HOURLY_KEY_HOUR_FORMAT)
+    return REALTY_VISITS_HOURLY_KEY_TEMPLATE.format(hour=hour)
+
+
+def _update_realty_counters(
+        field_name: str,
+        counters_by_realty_id: List[Tuple[int, int]],
+) -> List[Tuple[int, int]]:
+    """Update realty counter field with `UPDATE ... FROM (VALUES ...)` statements in batches.
+
+    Args:
+        field_name(str): name of the counter field
+        counters_by_realty_id(List[Tuple[int, int]]): pairs of realty id and a counter value
+
+    Returns:
+        List[Tuple[int, int]]: pairs of realty id and the new counter value (deleted realty are skipped)
+    """
+    column = Realty._meta.get_field(field_name).column
+    new_counters_by_realty_id = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(counters_by_realty_id), REALTY_VISITS_FLUSH_BATCH_SIZE):
+            batch = counters_by_realty_id[i:i + REALTY_VISITS_FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s, %s)'] * len(batch))
+            cursor.execute(
+                f"UPDATE {Realty._meta.db_table} AS realty "
+                f"SET {column} = counters.value "
+                f"FROM (VALUES {values}) AS counters (id, value) "
+                f"WHERE realty.id = counters.id "
+                f"RETURNING realty.id, realty.{column}",
+                [param for realty_counter in batch for param in realty_counter],
+            )
+            new_counters_by_realty_id.extend(cursor.fetchall())
+    return new_counters_by_realty_id
@@ -0,0 +1,61 @@
+from typing import Iterable, Set
+
+from django.db import connection
+
+from airbnb.celery import app
+from configs.redis_conf import redis_instance
+
+from ..constants import (
+    REALTY_VIEW_REFRESH_CITIES_KEY, REALTY_VIEW_REFRESH_DELAY, REALTY_VIEW_REFRESH_SCHEDULED_KEY,
+    REALTY_VIEW_REFRESH_SCHEDULED_TTL,
+)
+from ..models import RealtyView
+
+
+def schedule_realty_view_refresh(city_slugs: Iterable[str] = ()) -> bool:
+    """Schedule a debounced refresh of the realty materialized view.
+
+    Writes within `REALTY_VIEW_REFRESH_DELAY` share a single refresh,
+    slugs of the changed cities are collected, so versions of their realty lists are bumped after the refresh.
+
+    Returns:
+        bool: whether a new refresh has been scheduled
+    """
+    city_slugs = list(city_slugs)
+    pipe = redis_instance.pipeline(transaction=False)
+    if city_slugs:
+        pipe.sadd(REALTY_VIEW_REFRESH_CITIES_KEY, *city_slugs)
+    pipe.set(REALTY_VIEW_REFRESH_SCHEDULED_KEY, 1, nx=True, ex=REALTY_VIEW_REFRESH_SCHEDULED_TTL)
+    is_scheduled = bool(pipe.execute()[-1])
+
+    if is_scheduled:
+        app.send_task(
+            'realty.tasks.refresh_realty_materialized_view',
+            countdown=REALTY_VIEW_REFRESH_DELAY,
+            queue='default',
+        )
+    return is_scheduled
+
+
+def refresh_realty_view() -> Set[str]:
+    """Refresh the realty materialized view, reads aren't blocked by the refresh (`CONCURRENTLY`).
+
+    Returns:
+        Set[str]: slugs of cities that have been changed since the refresh was scheduled
+    """
+    # writes from now on schedule a new refresh, as they may not get into this one
+    pipe = redis_instance.pipeline(transaction=True)
+    pipe.delete(REALTY_VIEW_REFRESH_SCHEDULED_KEY)
+    pipe.smembers(REALTY_VIEW_REFRESH_CITIES_KEY)
+    pipe.delete(REALTY_VIEW_REFRESH_CITIES_KEY)
+    _, city_slugs, _ = pipe.execute()
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {RealtyView._meta.db_table}")
+    except Exception:
+        # cities are refreshed by the next refresh
+        if city_slugs:
+            redis_instance.sadd(REALTY_VIEW_REFRESH_CITIES_KEY, *city_slugs)
+        raise
+    return set(city_slugs)
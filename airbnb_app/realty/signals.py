@@ -0,0 +1,171 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from addresses.models import Address
+from common.decorators import disable_for_loaddata
+from hosts.models import RealtyHost
+from main.services import schedule_image_renditions
+
+from .constants import REALTY_CITY_POPULARITY_NEW_REALTY_SCORE
+from .models import Amenity, Realty, RealtyImage
+from .services.cache import bump_realty_versions
+from .services.cities import increase_city_popularity
+from .services.realty import (
+    apply_available_realty_count_changes, assign_amenity_mask_bits, delete_realty_flushed_visits_count,
+    filter_realty_by_amenities, get_available_realty_count_changes_by_address,
+    get_available_realty_count_changes_by_realty, get_realty_ids_with_city_slugs_by_host_user, touch_realty_by_ids,
+    update_realty_amenities_masks,
+)
+
+
+@receiver(post_save, sender=Realty)
+@disable_for_loaddata
+def handle_realty_creation(sender, instance: Realty, created, **kwargs):
+    if created and instance.is_available:
+        city = instance.location.city
+        transaction.on_commit(lambda: increase_city_popularity(city, REALTY_CITY_POPULARITY_NEW_REALTY_SCORE))
+
+
+@receiver(post_save, sender=Realty)
+@disable_for_loaddata
+def update_cached_data_on_realty_save(sender, instance: Realty, created, **kwargs):
+    changes = get_available_realty_count_changes_by_realty(instance, created)
+    realty_id, city_slugs = instance.pk, {instance.location.city_slug, *changes}
+
+    def update_cached_data():
+        if changes:
+            apply_available_realty_count_changes(changes)
+        bump_realty_versions(realty_ids=[realty_id], city_slugs=city_slugs)
+
+    transaction.on_commit(update_cached_data)
+
+
+@receiver(post_delete, sender=Realty)
+def update_cached_data_on_realty_delete(sender, instance: Realty, **kwargs):
+    realty_id, city_slug, is_available = instance.pk, instance.location.city_slug, instance.is_available
+
+    def update_cached_data():
+        if is_available:
+            apply_available_realty_count_changes({city_slug: -1})
+        delete_realty_flushed_visits_count(realty_id)
+        bump_realty_versions(realty_ids=[realty_id], city_slugs=[city_slug])
+
+    transaction.on_commit(update_cached_data)
+
+
+@receiver(post_save, sender=Address)
+@disable_for_loaddata
+def update_cached_data_on_address_save(sender, instance: Address, created, **kwargs):
+    if created:
+        return
+    realty_id = Realty.objects.filter(location_id=instance.pk).values_list('id', flat=True).first()
+    if realty_id is None:
+        return
+    changes = get_available_realty_count_changes_by_address(instance)
+    city_slugs = {instance.city_slug, *changes}
+    touch_realty_by_ids([realty_id])
+
+    def update_cached_data():
+        if changes:
+            apply_available_realty_count_changes(changes)
+        bump_realty_versions(realty_ids=[realty_id], city_slugs=city_slugs)
+
+    transaction.on_commit(update_cached_data)
+
+
+def update_realty_on_host_data_change(user_id: int) -> None:
+    realty_ids_with_city_slugs = get_realty_ids_with_city_slugs_by_host_user(user_id)
+    if not realty_ids_with_city_slugs:
+        return
+    touch_realty_by_ids(realty_id for realty_id, _ in realty_ids_with_city_slugs)
+
+    transaction.on_commit(lambda: bump_realty_versions(
+        realty_ids=[realty_id for realty_id, _ in realty_ids_with_city_slugs],
+        city_slugs={city_slug for _, city_slug in realty_ids_with_city_slugs},
+    ))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@disable_for_loaddata
+def update_realty_on_host_user_change(sender, instance: settings.AUTH_USER_MODEL, created, **kwargs):
+    if not created and instance.host_data_tracker.changed():
+        update_realty_on_host_data_change(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@disable_for_loaddata
+def update_realty_on_host_profile_change(sender, instance: Profile, created, **kwargs):
+    if not created and instance.host_data_tracker.changed():
+        update_realty_on_host_data_change(instance.user_id)
+
+
+@receiver(post_save, sender=RealtyHost)
+@disable_for_loaddata
+def update_realty_on_host_change(sender, instance: RealtyHost, created, **kwargs):
+    if not created and instance.host_data_tracker.changed():
+        update_realty_on_host_data_change(instance.user_id)
+
+
+@receiver(post_save, sender=RealtyImage)
+@receiver(post_delete, sender=RealtyImage)
+@disable_for_loaddata
+def update_realty_on_realty_image_change(sender, instance: RealtyImage, **kwargs):
+    realty_id, city_slug = instance.realty_id, instance.realty.location.city_slug
+    touch_realty_by_ids([realty_id])
+    transaction.on_commit(lambda: bump_realty_versions(realty_ids=[realty_id], city_slugs=[city_slug]))
+
+
+@receiver(post_save, sender=RealtyImage)
+@disable_for_loaddata
+def generate_realty_image_renditions(sender, instance: RealtyImage, created, **kwargs):
+    if created or instance.image_tracker.has_changed('image'):
+        schedule_image_renditions(instance, 'image')
+
+
+@receiver(m2m_changed, sender=Realty.amenities.through)
+def update_realty_on_realty_amenities_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # `instance` is an amenity; realty of the cleared amenity are unknown, so only the list of all realty is bumped
+        realty_ids_with_city_slugs = list(
+            Realty.objects.filter(pk__in=pk_set or []).values_list('id', 'location__city_slug'),
+        )
+        if action == 'post_clear' and instance.mask_bit is not None:
+            # masks still have the bit of the cleared amenity
+            update_realty_amenities_masks(
+                filter_realty_by_amenities(Realty.objects.all(), [instance]).values_list('id', flat=True),
+            )
+        else:
+            update_realty_amenities_masks(pk_set or [])
+    else:
+        realty_ids_with_city_slugs = [(instance.pk, instance.location.city_slug)]
+        instance.amenities_mask = update_realty_amenities_masks([instance.pk])[instance.pk]
+    touch_realty_by_ids(realty_id for realty_id, _ in realty_ids_with_city_slugs)
+
+    transaction.on_commit(lambda: bump_realty_versions(
+        realty_ids=[realty_id for realty_id, _ in realty_ids_with_city_slugs],
+        city_slugs={city_slug for _, city_slug in realty_ids_with_city_slugs},
+    ))
+
+
+@receiver(post_save, sender=Amenity)
+@disable_for_loaddata
+def assign_amenity_mask_bit_on_amenity_creation(sender, instance: Amenity, created, **kwargs):
+    if created and instance.mask_bit is None:
+        instance.mask_bit = assign_amenity_mask_bits().get(instance.pk)
+
+
+@receiver(post_delete, sender=Amenity)
+def release_amenity_mask_bit_on_amenity_delete(sender, instance: Amenity, **kwargs):
+    if instance.mask_bit is None:
+        return
+    # `realty_amenities` rows have already been deleted, so recalculated masks don't have the bit of the amenity
+    update_realty_amenities_masks(
+        filter_realty_by_amenities(Realty.objects.all(), [instance]).values_list('id', flat=True),
+    )
+    # the bit can be given to an amenity that doesn't have one
+    assign_amenity_mask_bits()
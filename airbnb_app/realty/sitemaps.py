@@ -1,6 +1,9 @@
+from typing import Union
+
 from django.contrib.sitemaps import Sitemap
 
-from .models import Realty
+from .models import Realty, RealtyView
+from .services.realty import get_available_realty_listing
 
 
 class RealtySiteMap(Sitemap):
@@ -10,7 +13,7 @@ class RealtySiteMap(Sitemap):
     priority = 0.9
 
     def items(self):
-        return Realty.available.all()
+        return get_available_realty_listing()
 
-    def lastmod(self, obj: Realty):
+    def lastmod(self, obj: Union[Realty, RealtyView]):
         return obj.updated
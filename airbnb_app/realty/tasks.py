@@ -1,6 +1,12 @@
 from airbnb.celery import app
 
-from .services.realty import update_realty_visits_from_redis
+from .services.cache import bump_realty_versions
+from .services.cities import decay_cities_popularity
+from .services.realty import (
+    roll_up_realty_visits_stats, update_cached_available_realty_count_by_city, update_realty_unique_visits_from_redis,
+    update_realty_visits_from_redis,
+)
+from .services.realty_view import refresh_realty_view
 
 
 @app.task(
@@ -10,5 +16,50 @@ from .services.realty import update_realty_visits_from_redis
     lock_ttl=60,
 )
 def update_realty_visits_count_from_redis(*args, **kwargs):
-    """Updates `visits_count` value in DB from Redis."""
+    """Updates `visits_count` and `unique_visits_count` values in DB from Redis."""
     update_realty_visits_from_redis()
+    update_realty_unique_visits_from_redis()
+
+
+@app.task(
+    queue='default',
+    time_limit=60,
+    soft_time_limit=50,
+    lock_ttl=60 * 10,
+)
+def roll_up_realty_visits_stats_from_redis(*args, **kwargs):
+    """Adds hourly realty visits from Redis to the daily RealtyVisitStats in DB."""
+    roll_up_realty_visits_stats()
+
+
+@app.task(
+    queue='default',
+    time_limit=30,
+    soft_time_limit=20,
+    lock_ttl=60 * 10,
+)
+def decay_realty_cities_popularity(*args, **kwargs):
+    """Decreases popularity of all cities, so cities without new visits drop out of the leaderboard."""
+    decay_cities_popularity()
+
+
+@app.task(
+    queue='default',
+    time_limit=60,
+    soft_time_limit=50,
+    lock_ttl=60 * 10,
+)
+def reconcile_cached_available_realty_count_by_city(*args, **kwargs):
+    """Recalculates available realty count by city in Redis, so changes that bypassed signals are fixed."""
+    update_cached_available_realty_count_by_city()
+
+
+@app.task(
+    queue='default',
+    time_limit=60,
+    soft_time_limit=50,
+)
+def refresh_realty_materialized_view(*args, **kwargs):
+    """Refreshes the realty materialized view and invalidates realty lists rendered from the outdated view."""
+    city_slugs = refresh_realty_view()
+    bump_realty_versions(city_slugs=city_slugs, refresh_realty_view=False)
@@ -1,8 +1,14 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
 from io import StringIO
 
 from model_bakery import baker
 
-from django.core.management import call_command, color_style, load_command_class
+from django.core.management import CommandError, call_command, color_style, load_command_class
 from django.test import TestCase
 
 from accounts.models import CustomUser
@@ -83,3 +89,40 @@ class PopulateRealtyTests(TestCase):
 
         with self.assertRaises(ValueError):
             call_command('populaterealty', 0, stdout=output)
+
+
+class ExportRealtyTests(TestCase):
+    def setUp(self) -> None:
+        baker.make('Realty', _quantity=3, is_available=True)
+        baker.make('Realty', is_available=False)
+
+    def test_command_output_ndjson(self):
+        """Command writes all available realty to stdout as NDJSON by default."""
+        output = StringIO()
+
+        call_command('exportrealty', '--chunk-size', 2, stdout=output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            list(Realty.available.order_by('id').values_list('id', flat=True)),
+        )
+
+    def test_command_output_gzip_file(self):
+        """Command writes compressed CSV to the given file."""
+        output_dir = tempfile.mkdtemp()
+        output_path = os.path.join(output_dir, 'realty.csv.gz')
+
+        try:
+            call_command('exportrealty', '--format', 'csv', '--gzip', '--output', output_path, stdout=StringIO())
+            with gzip.open(output_path, 'rt', encoding='utf-8', newline='') as file:
+                rows = list(csv.DictReader(file))
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        self.assertEqual(len(rows), 3)
+
+    def test_gzip_requires_output(self):
+        """Command raises an error if the compressed export has no output file."""
+        with self.assertRaises(CommandError):
+            call_command('exportrealty', '--gzip', stdout=StringIO())
@@ -0,0 +1,178 @@
+import datetime
+from unittest import mock
+
+import fakeredis
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import CustomUser, ProfileGenderChoices
+from addresses.models import Address
+from hosts.models import RealtyHost
+
+from ..api.serializers import RealtySerializer, RealtyValuesSerializer
+from ..models import Amenity, Realty, RealtyTypeChoices
+from ..services.realty import get_available_realty_rows, get_available_realty_with_api_details
+
+
+class RealtyValuesSerializerTests(TestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        test_user1 = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        test_user1.profile.date_of_birth = datetime.date(1990, 5, 17)
+        test_user1.profile.gender = ProfileGenderChoices.MALE
+        test_user1.profile.phone_number = '+79851686043'
+        test_user1.profile.description = 'Host 1'
+        test_user1.profile.save()
+        test_user2 = CustomUser.objects.create_user(
+            email='user2@gmail.com',
+            first_name='Jane',
+            last_name='Doe',
+            password='test',
+        )
+        test_user2.profile.profile_image = None
+        test_user2.profile.save()
+
+        wifi, kitchen = Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen')
+        for index, test_user in enumerate([test_user1, test_user2, test_user1]):
+            realty = Realty.objects.create(
+                name=f'Realty {index}',
+                description=f'Desc {index}',
+                is_available=True,
+                realty_type=RealtyTypeChoices.HOTEL,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40 + index,
+                location=Address.objects.create(country='Russia', city='Moscow', street=f'Arbat, {index}'),
+                host=RealtyHost.objects.get_or_create(user=test_user)[0],
+            )
+            if index:
+                realty.amenities.add(kitchen, wifi)
+
+    def test_output_is_the_same_as_realty_serializer(self):
+        """Test that serialized `values()` rows are rendered byte-identical to `RealtySerializer` output."""
+        context = {'request': APIRequestFactory().get(reverse('api:realty_list'))}
+
+        expected = JSONRenderer().render(
+            RealtySerializer(get_available_realty_with_api_details(), many=True, context=context).data,
+        )
+        rows = get_available_realty_rows(RealtyValuesSerializer.get_values_fields())
+        actual = JSONRenderer().render(RealtyValuesSerializer(rows, many=True, context=context).data)
+
+        self.assertEqual(actual, expected)
+
+    def test_output_of_single_row_is_the_same_as_realty_serializer(self):
+        """Test that a single serialized `values()` row is the same as `RealtySerializer` output."""
+        realty = get_available_realty_with_api_details().filter(amenities__isnull=False).first()
+
+        row = get_available_realty_rows(RealtyValuesSerializer.get_values_fields()).get(pk=realty.pk)
+
+        self.assertEqual(
+            JSONRenderer().render(RealtyValuesSerializer(row).data),
+            JSONRenderer().render(RealtySerializer(realty).data),
+        )
+
+    def test_queries_count(self):
+        """Test that serializing a list of rows takes a single query for amenities of all realty."""
+        rows = list(get_available_realty_rows(RealtyValuesSerializer.get_values_fields()))
+
+        with self.assertNumQueries(1):
+            RealtyValuesSerializer(rows, many=True).data  # noqa: B018
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_list_api_view_queries_count(self):
+        """Test that realty API list view fetches the page in a fixed number of queries."""
+        # count + page rows + amenities
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:realty_list'))
+
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_list_api_view_keyset_pagination(self):
+        """Test that keyset pagination of the realty API works with `values()` rows."""
+        first_page = self.client.get(reverse('api:realty_list'), {'cursor': ''}).json()
+        second_page = self.client.get(first_page['next']).json()
+
+        self.assertEqual(
+            [realty['name'] for realty in first_page['results'] + second_page['results']],
+            ['Realty 2', 'Realty 1', 'Realty 0'],
+        )
+        self.assertIsNone(second_page['next'])
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_list_api_view_sparse_fieldset(self):
+        """Test that realty API list serializes only requested fields, relations aren't joined."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api:realty_list'), {'fields': 'id,name,price_per_night'})
+
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'name', 'price_per_night'])
+        self.assertEqual(len(queries.captured_queries), 2)  # count + page rows, no amenities
+        self.assertNotIn('JOIN', queries.captured_queries[-1]['sql'])
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_list_api_view_expand(self):
+        """Test that realty API list serializes relations that aren't expanded as primary keys."""
+        realty = Realty.objects.filter(amenities__isnull=False).first()
+
+        response = self.client.get(
+            reverse('api:realty_list'), {'fields': 'name,location,host,amenities', 'expand': 'location', 'cursor': ''},
+        )
+        realty_data = next(data for data in response.json()['results'] if data['name'] == realty.name)
+
+        self.assertEqual(realty_data['location']['street'], realty.location.street)
+        self.assertEqual(realty_data['host'], realty.host_id)
+        self.assertEqual(sorted(realty_data['amenities']), sorted(realty.amenities.values_list('id', flat=True)))
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_api_views_unknown_fields(self):
+        """Test that realty API returns 400 if there are unknown fields in the sparse fieldset."""
+        realty = Realty.objects.first()
+
+        list_response = self.client.get(reverse('api:realty_list'), {'expand': 'name'})
+        detail_response = self.client.get(reverse('api:realty_detail', kwargs={'pk': realty.pk}), {'fields': 'host'})
+
+        self.assertEqual(list_response.status_code, 400)
+        self.assertIn('expand', list_response.json())
+        self.assertEqual(detail_response.status_code, 400)
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_detail_api_view_sparse_fieldset(self):
+        """Test that realty API detail serializes only requested fields."""
+        realty = Realty.objects.first()
+
+        response = self.client.get(reverse('api:realty_detail', kwargs={'pk': realty.pk}), {'fields': 'name'})
+
+        self.assertEqual(response.json(), {'name': realty.name})
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_list_api_view_amenities_filter(self):
+        """Test that realty API list filters realty with all given amenities by the amenities mask."""
+        amenity_ids = list(Amenity.objects.values_list('id', flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('api:realty_list'), {'fields': 'name', 'amenities': amenity_ids, 'cursor': ''},
+            )
+
+        self.assertEqual([realty['name'] for realty in response.json()['results']], ['Realty 2', 'Realty 1'])
+        self.assertIn('amenities_mask', queries.captured_queries[-1]['sql'])
+        self.assertNotIn('JOIN', queries.captured_queries[-1]['sql'])
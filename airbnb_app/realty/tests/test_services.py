@@ -1,10 +1,18 @@
+import csv
+import datetime
+import gzip
+import io
+import json
 import shutil
 import tempfile
 from unittest import mock
 
 import fakeredis
+import fakeredis.aioredis
 
+from django.http import QueryDict
 from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import utc
 
 from accounts.models import CustomUser
 from addresses.models import Address
@@ -12,18 +20,38 @@ from common.session_handler import SessionHandler
 from common.testing_utils import create_valid_image
 from hosts.models import RealtyHost
 
-from ..constants import REALTY_FORM_KEYS_COLLECTOR_NAME, REALTY_FORM_SESSION_PREFIX
-from ..models import Amenity, Realty, RealtyImage, RealtyTypeChoices
+from ..constants import (
+    REALTY_CITIES_AVAILABLE_COUNT_KEY, REALTY_CITIES_NAMES_KEY, REALTY_CITIES_POPULARITY_KEY,
+    REALTY_CITY_POPULARITY_NEW_REALTY_SCORE, REALTY_EXPORT_FIELDS, REALTY_FORM_KEYS_COLLECTOR_NAME,
+    REALTY_FORM_SESSION_PREFIX, REALTY_UNIQUE_VISITORS_UPDATED_KEY, REALTY_VIEW_REFRESH_CITIES_KEY,
+    REALTY_VIEW_REFRESH_DELAY, REALTY_VIEW_REFRESH_SCHEDULED_KEY, REALTY_VISITS_COUNT_FLUSHED_KEY,
+    REALTY_VISITS_COUNT_FLUSHING_KEY, REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY, REALTY_VISITS_COUNT_KEY,
+)
+from ..models import Amenity, Realty, RealtyImage, RealtyTypeChoices, RealtyView, RealtyVisitStats
+from ..services.cache import bump_realty_versions, get_realty_version_key
+from ..services.cities import (
+    change_available_realty_count_by_city, decay_cities_popularity, get_cached_available_realty_count_by_city,
+    get_most_popular_cities, increase_city_popularity, set_available_realty_count_by_city,
+)
+from ..services.export import get_realty_export_rows, get_realty_export_stream
+from ..services.facets import (
+    FacetBucket, RealtyFacetsFilters, get_cached_realty_facets, get_facet_buckets, get_realty_facets,
+)
 from ..services.images import get_image_by_id, get_images_by_realty_id, update_images_order
 from ..services.order import ImageOrder, convert_response_to_orders
 from ..services.realty import (
-    get_all_available_realty, get_amenity_ids_from_session, get_available_realty_by_city_slug,
-    get_available_realty_by_host, get_available_realty_by_ids, get_available_realty_count_by_city,
-    get_available_realty_filtered_by_type, get_available_realty_search_results,
-    get_cached_realty_visits_count_by_realty_id, get_last_realty, get_n_latest_available_realty,
-    get_n_latest_available_realty_ids, get_or_create_realty_host_by_user, update_realty_visits_count,
-    update_realty_visits_from_redis,
+    bulk_create_realty, filter_realty_by_amenities, get_all_available_realty, get_amenity_ids_from_session,
+    get_amenity_mask, get_available_realty_by_city_slug, get_available_realty_by_host, get_available_realty_by_ids,
+    get_available_realty_count_by_city, get_available_realty_count_changes_by_address,
+    get_available_realty_count_changes_by_realty, get_available_realty_filtered_by_type, get_available_realty_listing,
+    get_available_realty_search_results, get_cached_realty_unique_visits_count_by_realty_id,
+    get_cached_realty_visits_count_by_realty_id, get_host_realty_visits_by_day, get_last_realty,
+    get_n_latest_available_realty, get_n_latest_available_realty_ids, get_or_create_realty_host_by_user,
+    get_realty_listing_cards, get_realty_visits_count, roll_up_realty_visits_stats,
+    update_cached_available_realty_count_by_city, update_realty_availability, update_realty_unique_visits_from_redis,
+    update_realty_visits_count, update_realty_visits_from_redis,
 )
+from ..services.realty_view import refresh_realty_view, schedule_realty_view_refresh
 
 
 MEDIA_ROOT = tempfile.mkdtemp()
@@ -250,6 +278,147 @@ class RealtyServicesRealtyTests(TestCase):
         test_city = 'Rome'
         self.assertEqual(get_available_realty_count_by_city(test_city), 2)
 
+    def test_get_available_realty_count_changes_by_realty(self):
+        """get_available_realty_count_changes_by_realty() returns changes of available realty count by city."""
+        test_realty: Realty = Realty.objects.get(slug='realty-1')
+        test_realty.is_available = False
+        changes = get_available_realty_count_changes_by_realty(test_realty, created=False)
+        self.assertDictEqual(changes, {'moscow': -1})
+
+        test_realty.is_available = True
+        test_realty.location = Address.objects.create(country='Russia', city='Saint Petersburg', street='Nevsky')
+        changes = get_available_realty_count_changes_by_realty(test_realty, created=False)
+        self.assertDictEqual(changes, {'moscow': -1, 'saint-petersburg': 1})
+
+        test_realty.name = 'Realty 1 (new)'
+        test_realty.location = Address.objects.get(city='Moscow')
+        changes = get_available_realty_count_changes_by_realty(test_realty, created=False)
+        self.assertDictEqual(changes, {})
+
+    def test_get_available_realty_count_changes_by_address(self):
+        """get_available_realty_count_changes_by_address() moves available realty to a new city."""
+        test_address: Address = Realty.objects.get(slug='realty-1').location
+        test_address.street = 'Arbat, 21'
+        test_address.save()
+        self.assertDictEqual(get_available_realty_count_changes_by_address(test_address), {})
+
+        test_address.city = 'Kazan'
+        test_address.city_slug = 'kazan'
+        self.assertDictEqual(get_available_realty_count_changes_by_address(test_address), {'moscow': -1, 'kazan': 1})
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_availability(self):
+        """update_realty_availability() updates realty and the cached available realty count by city."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        update_cached_available_realty_count_by_city()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            updated_count = update_realty_availability(Realty.objects.all(), is_available=False)
+
+        self.assertEqual(updated_count, 3)
+        self.assertFalse(Realty.available.exists())
+        self.assertDictEqual(redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '0', 'rome': '0'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            updated_count = update_realty_availability(Realty.objects.filter(location__city='Rome'), is_available=True)
+
+        self.assertEqual(updated_count, 2)
+        self.assertDictEqual(redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '0', 'rome': '2'})
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_cached_available_realty_count_by_city(self):
+        """update_cached_available_realty_count_by_city() replaces the cached count with the count from DB."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        redis_instance.hset(REALTY_CITIES_AVAILABLE_COUNT_KEY, mapping={'moscow': 5, 'paris': 1})
+
+        update_cached_available_realty_count_by_city()
+
+        self.assertDictEqual(redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '1', 'rome': '2'})
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_bulk_create_realty(self):
+        """bulk_create_realty() creates realty with locations and amenities, updates cached data."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        update_cached_available_realty_count_by_city()
+        amenities_count = Amenity.objects.count()
+        realty_data = [
+            {
+                'name': f'New realty {index}',
+                'description': 'Desc',
+                'is_available': bool(index),
+                'realty_type': RealtyTypeChoices.HOUSE,
+                'beds_count': 1,
+                'max_guests_count': 2,
+                'price_per_night': 40,
+                'location': {'country': 'Russia', 'city': 'Saint Petersburg', 'street': f'Nevsky, {index}'},
+                'amenities': ['wifi', 'sauna', 'sauna'],
+            }
+            for index in range(3)
+        ]
+
+        # savepoint + amenities (insert + select) + mask bit of the new amenity (savepoint + lock + update +
+        # realty of the amenity + release, select) + addresses + realty + realty amenities + release
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(13):
+            new_realty = bulk_create_realty(RealtyHost.objects.first(), realty_data)
+
+        self.assertEqual(len(new_realty), 3)
+        self.assertEqual(Amenity.objects.count(), amenities_count + 1)
+        created_realty = Realty.objects.get(pk=new_realty[1].pk)
+        self.assertEqual(
+            created_realty.amenities_mask, get_amenity_mask(Amenity.objects.filter(name__in=['wifi', 'sauna'])),
+        )
+        self.assertEqual(created_realty.slug, 'new-realty-1')
+        self.assertEqual(created_realty.location.city_slug, 'saint-petersburg')
+        self.assertQuerysetEqual(
+            created_realty.amenities.order_by('name'), ['sauna', 'wifi'], transform=lambda amenity: amenity.name,
+        )
+        self.assertEqual(redis_instance.hget(REALTY_CITIES_AVAILABLE_COUNT_KEY, 'saint-petersburg'), '2')
+        self.assertEqual(
+            redis_instance.zscore(REALTY_CITIES_POPULARITY_KEY, 'saint-petersburg'),
+            2 * REALTY_CITY_POPULARITY_NEW_REALTY_SCORE,
+        )
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_available_realty_count_signals(self):
+        """Realty and Address signals update the cached available realty count by city."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        test_realty: Realty = Realty.objects.get(slug='realty-2')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            test_realty.location.city = 'Milan'
+            test_realty.location.save()
+        # the count is not cached yet, so it is calculated from DB
+        self.assertDictEqual(
+            redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '1', 'rome': '1', 'milan': '1'},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            test_realty.is_available = False
+            test_realty.save()
+        self.assertDictEqual(
+            redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '1', 'rome': '1', 'milan': '0'},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Realty.objects.get(slug='realty-3').delete()
+        self.assertDictEqual(
+            redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '1', 'rome': '0', 'milan': '0'},
+        )
+
     def test_get_available_realty_search_results_no_query(self):
         """get_available_realty_search_results() returns all available Realty objects if `query` is not given."""
         self.assertListEqual(
@@ -266,6 +435,42 @@ class RealtyServicesRealtyTests(TestCase):
             [Realty.objects.get(slug='realty-1')],
         )
 
+    def test_get_available_realty_search_results_by_city(self):
+        """get_available_realty_search_results() matches the `query` against the Realty location city."""
+        test_query = 'moscow'
+
+        self.assertListEqual(
+            list(get_available_realty_search_results(test_query)),
+            [Realty.objects.get(slug='realty-1')],
+        )
+
+    def test_get_available_realty_search_results_location_city_changed(self):
+        """get_available_realty_search_results() uses the up-to-date city after the Realty location was changed."""
+        test_location = Address.objects.get(street='Arbat, 20')
+        test_location.city = 'Paris'
+        test_location.save()
+
+        self.assertListEqual(list(get_available_realty_search_results('moscow')), [])
+        self.assertListEqual(
+            list(get_available_realty_search_results('paris')),
+            [Realty.objects.get(slug='realty-1')],
+        )
+
+    def test_get_available_realty_search_results_with_typo(self):
+        """get_available_realty_search_results() falls back to the trigram similarity if nothing has been found."""
+        self.assertListEqual(
+            list(get_available_realty_search_results('Moskow')),
+            [Realty.objects.get(slug='realty-1')],
+        )
+        self.assertListEqual(list(get_available_realty_search_results('Barcelna')), [])
+
+    def test_get_available_realty_search_results_without_fuzzy_fallback(self):
+        """get_available_realty_search_results() doesn't use the trigram similarity if full text search has results."""
+        search_results = get_available_realty_search_results('moscow')
+
+        self.assertNotIn('similarity', str(search_results.query))
+        self.assertIn('similarity', str(get_available_realty_search_results('moskow').query))
+
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_get_cached_realty_visits_count_by_id(self):
@@ -275,10 +480,23 @@ class RealtyServicesRealtyTests(TestCase):
         redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
         redis_instance.flushall()
 
-        redis_instance.set(f"realty:{str(realty_id)}:views_count", realty_visits_count)
+        redis_instance.hset(REALTY_VISITS_COUNT_KEY, str(realty_id), realty_visits_count)
 
         self.assertEqual(get_cached_realty_visits_count_by_realty_id(realty_id), realty_visits_count)
 
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_cached_realty_visits_count_by_id_while_flushing(self):
+        """get_cached_realty_visits_count_by_id() includes visits that are being flushed to the DB."""
+        realty_id = 5
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        redis_instance.hset(REALTY_VISITS_COUNT_KEY, str(realty_id), 2)
+        redis_instance.hset(REALTY_VISITS_COUNT_FLUSHING_KEY, str(realty_id), 3)
+
+        self.assertEqual(get_cached_realty_visits_count_by_realty_id(realty_id), 5)
+
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_update_realty_visits_count(self):
@@ -294,6 +512,8 @@ class RealtyServicesRealtyTests(TestCase):
 
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_update_realty_visits_from_redis(self):
         """update_realty_visits_from_redis() updates `visits_count` field in DB using Redis values."""
         realty = Realty.objects.first()
@@ -303,11 +523,626 @@ class RealtyServicesRealtyTests(TestCase):
 
         self.assertEqual(realty.visits_count, 0)
 
-        redis_instance.set(f"realty:{realty.id}:views_count", visits_count)
+        redis_instance.hset(REALTY_VISITS_COUNT_KEY, str(realty.id), visits_count)
         update_realty_visits_from_redis()
         realty.refresh_from_db()
 
         self.assertEqual(realty.visits_count, visits_count)
+        self.assertFalse(redis_instance.exists(REALTY_VISITS_COUNT_KEY, REALTY_VISITS_COUNT_FLUSHING_KEY))
+        self.assertEqual(redis_instance.hget(REALTY_VISITS_COUNT_FLUSHED_KEY, str(realty.id)), str(visits_count))
+        self.assertGreater(redis_instance.ttl(REALTY_VISITS_COUNT_FLUSHED_KEY), 0)
+        # counters aren't part of the realty version, so cached pages and ETags stay valid
+        self.assertFalse(redis_instance.exists(get_realty_version_key(realty.id)))
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_realty_visits_count(self):
+        """get_realty_visits_count() adds Redis visits to the DB visits count flushed last (or the given one)."""
+        realty = Realty.objects.first()
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        update_realty_visits_count(realty.id)
+        update_realty_visits_count(realty.id)
+        self.assertEqual(get_realty_visits_count(realty.id, 5), 7)
+
+        # `visits_count` stored before the flush (e.g. in a cached page) is outdated
+        update_realty_visits_from_redis()
+        update_realty_visits_count(realty.id)
+        self.assertEqual(get_realty_visits_count(realty.id, 0), 3)
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_visits_from_redis_multiple_realty(self):
+        """update_realty_visits_from_redis() adds Redis values to the `visits_count` of all visited realty."""
+        realty1, realty2, realty3 = Realty.objects.all()
+        Realty.objects.filter(id=realty1.id).update(visits_count=5)
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        update_realty_visits_count(realty1.id)
+        update_realty_visits_count(realty1.id)
+        update_realty_visits_count(realty2.id)
+        update_realty_visits_from_redis()
+
+        for realty in (realty1, realty2, realty3):
+            realty.refresh_from_db()
+
+        self.assertEqual(realty1.visits_count, 7)
+        self.assertEqual(realty2.visits_count, 1)
+        self.assertEqual(realty3.visits_count, 0)
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_visits_from_redis_failed_flush(self):
+        """update_realty_visits_from_redis() flushes leftovers of the failed flush, new visits are kept for later."""
+        realty = Realty.objects.first()
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        redis_instance.hset(REALTY_VISITS_COUNT_FLUSHING_KEY, str(realty.id), 3)
+        update_realty_visits_count(realty.id)
+        update_realty_visits_from_redis()
+        realty.refresh_from_db()
+
+        self.assertEqual(realty.visits_count, 3)
+        self.assertEqual(get_cached_realty_visits_count_by_realty_id(realty.id), 1)
+
+        update_realty_visits_from_redis()
+        realty.refresh_from_db()
+
+        self.assertEqual(realty.visits_count, 4)
+        self.assertEqual(get_cached_realty_visits_count_by_realty_id(realty.id), 0)
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_visits_from_redis_failed_after_commit(self):
+        """update_realty_visits_from_redis() doesn't count visits twice if the flush has failed after the DB update."""
+        realty = Realty.objects.first()
+        Realty.objects.filter(id=realty.id).update(visits_count=8)
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        redis_instance.hset(REALTY_VISITS_COUNT_FLUSHING_KEY, str(realty.id), 3)
+        redis_instance.hset(REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY, str(realty.id), 8)
+        update_realty_visits_from_redis()
+        realty.refresh_from_db()
+
+        self.assertEqual(realty.visits_count, 8)
+        self.assertEqual(redis_instance.hget(REALTY_VISITS_COUNT_FLUSHED_KEY, str(realty.id)), '8')
+        self.assertFalse(
+            redis_instance.exists(REALTY_VISITS_COUNT_FLUSHING_KEY, REALTY_VISITS_COUNT_FLUSHING_TOTALS_KEY),
+        )
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_flushed_visits_count_deleted_with_realty(self):
+        """Flushed `visits_count` of the realty is deleted from Redis after the realty has been deleted."""
+        realty = Realty.objects.first()
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        update_realty_visits_count(realty.id)
+        update_realty_visits_from_redis()
+        with self.captureOnCommitCallbacks(execute=True):
+            realty.delete()
+
+        self.assertIsNone(redis_instance.hget(REALTY_VISITS_COUNT_FLUSHED_KEY, str(realty.id)))
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_visits_count_unique_visitors(self):
+        """update_realty_visits_count() counts unique visitors if `visitor_id` is given."""
+        realty_id = 5
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        update_realty_visits_count(realty_id, visitor_id='user:1')
+        update_realty_visits_count(realty_id, visitor_id='user:1')
+        update_realty_visits_count(realty_id, visitor_id='user:2')
+
+        self.assertEqual(get_cached_realty_visits_count_by_realty_id(realty_id), 3)
+        self.assertEqual(get_cached_realty_unique_visits_count_by_realty_id(realty_id), 2)
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_visits_count_city_popularity(self):
+        """update_realty_visits_count() increases city popularity if `city` is given."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        update_realty_visits_count(1, city='Saint Petersburg')
+        update_realty_visits_count(2, city='Moscow')
+        update_realty_visits_count(3, city='Moscow')
+
+        self.assertListEqual(get_most_popular_cities(5), ['Moscow', 'Saint Petersburg'])
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_update_realty_unique_visits_from_redis(self):
+        """update_realty_unique_visits_from_redis() sets `unique_visits_count` field in DB to Redis estimations."""
+        realty1, realty2, _ = Realty.objects.all()
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        for visitor_id in ('user:1', 'user:2', 'user:1', 'session:abc'):
+            update_realty_visits_count(realty1.id, visitor_id=visitor_id)
+        update_realty_visits_count(realty2.id)
+        update_realty_unique_visits_from_redis()
+        realty1.refresh_from_db()
+        realty2.refresh_from_db()
+
+        self.assertEqual(realty1.unique_visits_count, 3)
+        self.assertEqual(realty2.unique_visits_count, 0)
+        self.assertFalse(redis_instance.exists(REALTY_UNIQUE_VISITORS_UPDATED_KEY))
+
+        # counters are absolute, so flushing again with new visitors doesn't count old ones twice
+        update_realty_visits_count(realty1.id, visitor_id='user:3')
+        update_realty_unique_visits_from_redis()
+        realty1.refresh_from_db()
+
+        self.assertEqual(realty1.unique_visits_count, 4)
+
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_roll_up_realty_visits_stats(self):
+        """roll_up_realty_visits_stats() adds visits of finished hours to the daily RealtyVisitStats."""
+        realty1, realty2, _ = Realty.objects.all()
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        visits_date = datetime.date(2021, 6, 1)
+
+        with mock.patch('django.utils.timezone.now', return_value=datetime.datetime(2021, 6, 1, 12, 30, tzinfo=utc)):
+            update_realty_visits_count(realty1.id)
+            update_realty_visits_count(realty1.id)
+            update_realty_visits_count(realty2.id)
+            roll_up_realty_visits_stats()  # current hour isn't rolled up
+
+        self.assertFalse(RealtyVisitStats.objects.exists())
+
+        with mock.patch('django.utils.timezone.now', return_value=datetime.datetime(2021, 6, 1, 13, 5, tzinfo=utc)):
+            update_realty_visits_count(realty1.id)
+            roll_up_realty_visits_stats()
+            roll_up_realty_visits_stats()  # rolled up hours are skipped
+
+        self.assertEqual(RealtyVisitStats.objects.get(realty=realty1, date=visits_date).visits_count, 2)
+        self.assertEqual(RealtyVisitStats.objects.get(realty=realty2, date=visits_date).visits_count, 1)
+
+        with mock.patch('django.utils.timezone.now', return_value=datetime.datetime(2021, 6, 1, 14, 5, tzinfo=utc)):
+            roll_up_realty_visits_stats()
+
+        self.assertEqual(RealtyVisitStats.objects.get(realty=realty1, date=visits_date).visits_count, 3)
+
+    def test_get_host_realty_visits_by_day(self):
+        """get_host_realty_visits_by_day() returns total visits of the host realty for each of the last `days` days."""
+        realty1, realty2, realty3 = Realty.objects.order_by('id')
+        today = datetime.date(2021, 6, 10)
+        RealtyVisitStats.objects.bulk_create([
+            RealtyVisitStats(realty=realty1, date=today, visits_count=3),
+            RealtyVisitStats(realty=realty2, date=today, visits_count=2),
+            RealtyVisitStats(realty=realty1, date=today - datetime.timedelta(days=2), visits_count=5),
+            RealtyVisitStats(realty=realty1, date=today - datetime.timedelta(days=3), visits_count=7),
+            RealtyVisitStats(realty=realty3, date=today, visits_count=10),  # another host
+        ])
+
+        with mock.patch('django.utils.timezone.now', return_value=datetime.datetime(2021, 6, 10, 12, 0, tzinfo=utc)):
+            visits_by_day = get_host_realty_visits_by_day(realty1.host, days=3)
+
+        self.assertDictEqual(
+            visits_by_day,
+            {
+                today - datetime.timedelta(days=2): 5,
+                today - datetime.timedelta(days=1): 0,
+                today: 5,
+            },
+        )
+
+
+class RealtyServicesExportTests(TestCase):
+    def setUp(self) -> None:
+        test_host = RealtyHost.objects.create(
+            user=CustomUser.objects.create_user(
+                email='user1@gmail.com',
+                first_name='John',
+                last_name='Doe',
+                password='test',
+            ),
+        )
+        wifi, kitchen = Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen')
+        for index in range(3):
+            realty = Realty.objects.create(
+                name=f'Realty, "{index}"',
+                description='Line 1\nLine 2',
+                is_available=index != 1,
+                realty_type=RealtyTypeChoices.APARTMENTS,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40,
+                location=Address.objects.create(country='Russia', city='Moscow', street=f'Arbat, {index}'),
+                host=test_host,
+            )
+            realty.amenities.add(kitchen, wifi)
+
+    def test_get_realty_export_rows(self):
+        """get_realty_export_rows() returns flat rows of available realty with amenity names."""
+        rows = list(get_realty_export_rows(chunk_size=1))
+
+        self.assertEqual([row['name'] for row in rows], ['Realty, "0"', 'Realty, "2"'])
+        self.assertEqual(list(rows[0]), list(REALTY_EXPORT_FIELDS))
+        self.assertEqual(rows[0]['city'], 'Moscow')
+        self.assertEqual(rows[0]['amenities'], ['wifi', 'kitchen'])
+
+    def test_get_realty_export_stream_ndjson(self):
+        """get_realty_export_stream() returns a line per realty in NDJSON format."""
+        content = ''.join(get_realty_export_stream('ndjson', chunk_size=1))
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['street'] for row in rows], ['Arbat, 0', 'Arbat, 2'])
+        self.assertEqual(rows[1]['description'], 'Line 1\nLine 2')
+
+    def test_get_realty_export_stream_csv_gzip(self):
+        """get_realty_export_stream() returns a compressed CSV with a header."""
+        content = gzip.decompress(b''.join(get_realty_export_stream('csv', compress=True))).decode()
+
+        rows = list(csv.DictReader(io.StringIO(content, newline='')))
+        self.assertEqual(rows[0]['name'], 'Realty, "0"')
+        self.assertEqual(rows[0]['amenities'], 'wifi;kitchen')
+        self.assertEqual(len(rows), 2)
+
+    def test_get_realty_export_stream_unknown_format(self):
+        """get_realty_export_stream() raises ValueError if the format is not supported."""
+        with self.assertRaises(ValueError):
+            get_realty_export_stream('xml')
+
+
+class RealtyServicesAmenitiesMaskTests(TestCase):
+    def setUp(self) -> None:
+        test_host = RealtyHost.objects.create(
+            user=CustomUser.objects.create_user(
+                email='user1@gmail.com',
+                first_name='John',
+                last_name='Doe',
+                password='test',
+            ),
+        )
+        self.wifi, self.kitchen, self.sauna = (
+            Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen'),
+            Amenity.objects.create(name='sauna'),
+        )
+        self.realty = [
+            Realty.objects.create(
+                name=f'Realty {index}',
+                description=f'Desc {index}',
+                is_available=True,
+                realty_type=RealtyTypeChoices.APARTMENTS,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40,
+                location=Address.objects.create(country='Russia', city='Moscow', street=f'Arbat, {index}'),
+                host=test_host,
+            )
+            for index in range(3)
+        ]
+        self.realty[0].amenities.add(self.wifi)
+        self.realty[1].amenities.add(self.wifi, self.kitchen)
+        self.realty[2].amenities.add(self.wifi, self.kitchen, self.sauna)
+
+    def get_amenities_masks(self):
+        return list(Realty.objects.order_by('name').values_list('amenities_mask', flat=True))
+
+    def test_amenity_mask_bits(self):
+        """New amenities get free mask bits, the bit of a deleted amenity is given to an amenity without a bit."""
+        self.assertEqual([self.wifi.mask_bit, self.kitchen.mask_bit, self.sauna.mask_bit], [0, 1, 2])
+
+        Amenity.objects.filter(pk=self.sauna.pk).update(mask_bit=None)
+        self.kitchen.delete()
+
+        self.assertEqual(Amenity.objects.get(pk=self.sauna.pk).mask_bit, 1)
+        self.assertEqual(self.get_amenities_masks(), [0b1, 0b1, 0b11])
+        self.assertEqual(Amenity.objects.create(name='pool').mask_bit, 2)
+
+    def test_realty_amenities_mask(self):
+        """Realty amenities masks are updated on amenities changes from both sides of the relation."""
+        self.assertEqual(self.get_amenities_masks(), [0b1, 0b11, 0b111])
+
+        self.realty[2].amenities.remove(self.kitchen)
+        self.realty[0].amenities.clear()
+        self.assertEqual(self.realty[0].amenities_mask, 0)
+        self.assertEqual(self.get_amenities_masks(), [0, 0b11, 0b101])
+
+        self.sauna.realty.add(self.realty[0])
+        self.wifi.realty.clear()
+        self.assertEqual(self.get_amenities_masks(), [0b100, 0b10, 0b100])
+
+        self.sauna.delete()
+        self.assertEqual(self.get_amenities_masks(), [0, 0b10, 0])
+
+    def test_filter_realty_by_amenities(self):
+        """filter_realty_by_amenities() returns realty with all given amenities without joins."""
+        realty_qs = filter_realty_by_amenities(Realty.objects.order_by('name'), [self.wifi, self.kitchen])
+
+        self.assertQuerysetEqual(realty_qs, ['Realty 1', 'Realty 2'], transform=lambda realty: realty.name)
+        self.assertNotIn('JOIN', str(realty_qs.query))
+
+    def test_filter_realty_by_amenities_without_mask_bit(self):
+        """filter_realty_by_amenities() joins amenities that don't have a mask bit."""
+        Amenity.objects.filter(pk=self.sauna.pk).update(mask_bit=None)
+        self.sauna.refresh_from_db()
+
+        realty_qs = filter_realty_by_amenities(Realty.objects.order_by('name'), [self.sauna, self.kitchen])
+
+        self.assertQuerysetEqual(realty_qs, ['Realty 2'], transform=lambda realty: realty.name)
+
+
+class RealtyServicesFacetsTests(TestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        test_host = RealtyHost.objects.create(
+            user=CustomUser.objects.create_user(
+                email='user1@gmail.com',
+                first_name='John',
+                last_name='Doe',
+                password='test',
+            ),
+        )
+        self.wifi, self.kitchen = Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen')
+        realty_params = [
+            (RealtyTypeChoices.HOTEL, 1, 2, 40, 'Moscow'),
+            (RealtyTypeChoices.HOTEL, 2, 4, 120, 'Moscow'),
+            (RealtyTypeChoices.HOUSE, 5, 10, 700, 'Moscow'),
+            (RealtyTypeChoices.HOUSE, 3, 6, 60, 'Rome'),
+        ]
+        for index, (realty_type, beds_count, max_guests_count, price_per_night, city) in enumerate(realty_params):
+            realty = Realty.objects.create(
+                name=f'Realty {index}',
+                description=f'Desc {index}',
+                is_available=True,
+                realty_type=realty_type,
+                beds_count=beds_count,
+                max_guests_count=max_guests_count,
+                price_per_night=price_per_night,
+                location=Address.objects.create(country='Russia', city=city, street=f'Arbat, {index}'),
+                host=test_host,
+            )
+            realty.amenities.add(*[self.wifi, self.kitchen][:index])
+
+    def test_get_facet_buckets(self):
+        """get_facet_buckets() returns buckets with labels by the lower bounds."""
+        self.assertEqual(
+            [bucket.label for bucket in get_facet_buckets((0, 50, 100, 101))], ['0-49', '50-99', '100', '101+'],
+        )
+        self.assertEqual(get_facet_buckets((0, 50))[-1], FacetBucket(label='50+', lower=50, upper=None))
+
+    def test_get_realty_facets(self):
+        """get_realty_facets() counts realty by the values of the filters in a single aggregate query."""
+        with self.assertNumQueries(2):  # amenities mask bits + aggregate
+            facets = get_realty_facets(Realty.objects.filter(location__city='Moscow'))
+
+        self.assertDictEqual(
+            facets.realty_type,
+            {RealtyTypeChoices.HOUSE: 1, RealtyTypeChoices.HOTEL: 2, RealtyTypeChoices.APARTMENTS: 0},
+        )
+        self.assertDictEqual(facets.beds_count, {'1': 1, '2': 1, '3': 0, '4+': 1})
+        self.assertDictEqual(facets.guests_count, {'1': 0, '2': 1, '3': 0, '4-5': 1, '6+': 1})
+        self.assertDictEqual(facets.price_per_night, {'0-49': 1, '50-99': 0, '100-199': 1, '200-499': 0, '500+': 1})
+        self.assertDictEqual(facets.amenities, {self.wifi.pk: 2, self.kitchen.pk: 1})
+
+    def test_get_realty_facets_selected_filters(self):
+        """get_realty_facets() counts every facet without its own filter, but with the other filters."""
+        filters = RealtyFacetsFilters(realty_types=[RealtyTypeChoices.HOTEL], beds_count=2, amenities=[self.wifi])
+        with self.assertNumQueries(2):  # amenities mask bits + aggregate
+            facets = get_realty_facets(Realty.objects.filter(location__city='Moscow'), filters)
+
+        # realty with 2 beds and wifi
+        self.assertDictEqual(
+            facets.realty_type,
+            {RealtyTypeChoices.HOUSE: 0, RealtyTypeChoices.HOTEL: 1, RealtyTypeChoices.APARTMENTS: 0},
+        )
+        # hotels with wifi
+        self.assertDictEqual(facets.beds_count, {'1': 0, '2': 1, '3': 0, '4+': 0})
+        # hotels with 2 beds and wifi
+        self.assertDictEqual(facets.guests_count, {'1': 0, '2': 0, '3': 0, '4-5': 1, '6+': 0})
+        self.assertDictEqual(facets.price_per_night, {'0-49': 0, '50-99': 0, '100-199': 1, '200-499': 0, '500+': 0})
+        # hotels with 2 beds
+        self.assertDictEqual(facets.amenities, {self.wifi.pk: 1, self.kitchen.pk: 0})
+
+    def test_get_realty_facets_empty(self):
+        """get_realty_facets() returns zero counts if there is no realty."""
+        facets = get_realty_facets(Realty.objects.none())
+
+        self.assertEqual(facets.amenities, {self.wifi.pk: 0, self.kitchen.pk: 0})
+        self.assertEqual(sum(facets.realty_type.values()), 0)
+
+    @override_settings(
+        REALTY_FACETS_CACHE_ENABLED=True,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_cached_realty_facets(self):
+        """get_cached_realty_facets() caches facets per city and normalized filters until the city version is bumped."""
+        realty_qs = Realty.objects.filter(location__city_slug='moscow')
+        facets = get_cached_realty_facets(realty_qs, QueryDict('amenities=2&amenities=1&page=2'), city_slug='moscow')
+
+        with self.assertNumQueries(0):
+            cached_facets = get_cached_realty_facets(
+                realty_qs, QueryDict('amenities=1&amenities=2'), city_slug='moscow',
+            )
+        self.assertEqual(cached_facets, facets)
+
+        bump_realty_versions(city_slugs=['rome'])
+        with self.assertNumQueries(0):
+            get_cached_realty_facets(realty_qs, QueryDict('amenities=1&amenities=2'), city_slug='moscow')
+
+        bump_realty_versions(city_slugs=['moscow'])
+        with self.assertNumQueries(2):
+            get_cached_realty_facets(realty_qs, QueryDict('amenities=1&amenities=2'), city_slug='moscow')
+        with self.assertNumQueries(2):
+            get_cached_realty_facets(realty_qs, QueryDict('amenities=1'), city_slug='moscow')
+
+
+class RealtyServicesRealtyViewTests(TestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        test_host = RealtyHost.objects.create(
+            user=CustomUser.objects.create_user(
+                email='user1@gmail.com',
+                first_name='John',
+                last_name='Doe',
+                password='test',
+            ),
+        )
+        self.wifi = Amenity.objects.create(name='wifi')
+        for index, city in enumerate(['Moscow', 'Moscow', 'Rome']):
+            realty = Realty.objects.create(
+                name=f'Realty {index}',
+                description=f'Desc {index}',
+                is_available=bool(index),
+                realty_type=RealtyTypeChoices.APARTMENTS,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40,
+                location=Address.objects.create(country='Russia', city=city, street=f'Arbat, {index}'),
+                host=test_host,
+            )
+            realty.amenities.add(self.wifi)
+
+    @mock.patch('realty.services.realty_view.app.send_task')
+    @mock.patch('realty.services.realty_view.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_schedule_realty_view_refresh(self, send_task):
+        """schedule_realty_view_refresh() schedules a single refresh until it starts and collects changed cities."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+
+        self.assertTrue(schedule_realty_view_refresh(['moscow']))
+        self.assertFalse(schedule_realty_view_refresh(['rome']))
+
+        send_task.assert_called_once_with(
+            'realty.tasks.refresh_realty_materialized_view', countdown=REALTY_VIEW_REFRESH_DELAY, queue='default',
+        )
+        self.assertSetEqual(redis_instance.smembers(REALTY_VIEW_REFRESH_CITIES_KEY), {'moscow', 'rome'})
+
+    @mock.patch('realty.services.cache.schedule_realty_view_refresh')
+    @mock.patch('realty.services.cache.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_bump_realty_versions_schedules_realty_view_refresh(self, schedule_refresh):
+        """bump_realty_versions() schedules a refresh of the realty view if the view is enabled."""
+        bump_realty_versions(city_slugs=['moscow'])
+        schedule_refresh.assert_not_called()
+
+        with override_settings(REALTY_VIEW_ENABLED=True):
+            bump_realty_versions(city_slugs=['moscow'])
+            bump_realty_versions(city_slugs=['rome'], refresh_realty_view=False)
+
+        schedule_refresh.assert_called_once_with(['moscow'])
+
+    @override_settings(REALTY_VIEW_ENABLED=True)
+    @mock.patch('realty.services.realty_view.app.send_task')
+    @mock.patch('realty.services.realty_view.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_refresh_realty_view(self, send_task):
+        """refresh_realty_view() refreshes the realty view with changed cities, listings are read from the view."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        redis_instance.flushall()
+        schedule_realty_view_refresh(['moscow'])
+
+        self.assertSetEqual(refresh_realty_view(), {'moscow'})
+
+        self.assertFalse(redis_instance.exists(REALTY_VIEW_REFRESH_SCHEDULED_KEY))
+        realty_list = list(get_realty_listing_cards(get_available_realty_listing(city_slug='moscow')))
+        self.assertIsInstance(realty_list[0], RealtyView)
+        self.assertEqual([realty.name for realty in realty_list], ['Realty 1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(realty_list[0].location.street, 'Arbat, 1')
+            self.assertEqual([amenity.name for amenity in realty_list[0].amenities.all()], ['wifi'])
+            self.assertIsNone(realty_list[0].cover_image)
+        self.assertEqual([row['city'] for row in get_realty_export_rows()], ['Moscow', 'Rome'])
+
+
+class RealtyServicesCitiesTests(SimpleTestCase):
+    redis_server = fakeredis.FakeServer()
+
+    def setUp(self) -> None:
+        fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True).flushall()
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_most_popular_cities(self):
+        """get_most_popular_cities() returns `cities_count` city names with the highest popularity."""
+        increase_city_popularity('Moscow', 5)
+        increase_city_popularity('Saint Petersburg', 10)
+        increase_city_popularity('Rome', 1)
+        increase_city_popularity('Rome', 6)
+
+        self.assertListEqual(get_most_popular_cities(2), ['Saint Petersburg', 'Rome'])
+        self.assertListEqual(get_most_popular_cities(5), ['Saint Petersburg', 'Rome', 'Moscow'])
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_get_most_popular_cities_empty(self):
+        """get_most_popular_cities() returns an empty list if there is no popularity data."""
+        self.assertListEqual(get_most_popular_cities(5), [])
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_change_available_realty_count_by_city(self):
+        """change_available_realty_count_by_city() applies changes only if the count is cached."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+
+        self.assertFalse(change_available_realty_count_by_city({'moscow': -1}))
+        self.assertFalse(redis_instance.exists(REALTY_CITIES_AVAILABLE_COUNT_KEY))
+
+        set_available_realty_count_by_city({'moscow': 2})
+        self.assertTrue(change_available_realty_count_by_city({'moscow': -1, 'rome': 1}))
+        self.assertDictEqual(redis_instance.hgetall(REALTY_CITIES_AVAILABLE_COUNT_KEY), {'moscow': '1', 'rome': '1'})
+
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_decay_cities_popularity(self):
+        """decay_cities_popularity() decreases popularity and removes cities below the `min_score`."""
+        redis_instance = fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True)
+        increase_city_popularity('Moscow', 10)
+        increase_city_popularity('Rome', 1)
+
+        decay_cities_popularity(factor=0.5, min_score=1)
+
+        self.assertEqual(redis_instance.zscore(REALTY_CITIES_POPULARITY_KEY, 'moscow'), 5)
+        self.assertIsNone(redis_instance.zscore(REALTY_CITIES_POPULARITY_KEY, 'rome'))
+        self.assertFalse(redis_instance.hexists(REALTY_CITIES_NAMES_KEY, 'rome'))
+        self.assertListEqual(get_most_popular_cities(5), ['Moscow'])
+
+    async def test_get_cached_available_realty_count_by_city(self):
+        """get_cached_available_realty_count_by_city() returns available realty count in the city from Redis."""
+        async_redis = await fakeredis.aioredis.create_redis_pool(self.redis_server, encoding='utf-8')
+        await async_redis.hset(REALTY_CITIES_AVAILABLE_COUNT_KEY, 'saint-petersburg', 3)
+
+        self.assertEqual(await get_cached_available_realty_count_by_city(async_redis, 'Saint Petersburg'), 3)
+        self.assertEqual(await get_cached_available_realty_count_by_city(async_redis, 'Moscow'), 0)
+
+        await async_redis.delete(REALTY_CITIES_AVAILABLE_COUNT_KEY)
+        self.assertIsNone(await get_cached_available_realty_count_by_city(async_redis, 'Saint Petersburg'))
+
+        async_redis.close()
+        await async_redis.wait_closed()
 
 
 @override_settings(MEDIA_ROOT=MEDIA_ROOT)
@@ -427,6 +1262,38 @@ class RealtyServicesImagesTests(TestCase):
         self.assertEqual(test_image2.order, 0)
         self.assertEqual(test_image3.order, 2)
 
+    def test_get_realty_listing_cards_cover_image(self):
+        """get_realty_listing_cards() annotates Realty objects with the image that has the lowest `order`."""
+        test_realty: Realty = Realty.objects.get(slug='realty-1')
+        first_image: RealtyImage = test_realty.images.all()[0]
+        test_image: RealtyImage = test_realty.images.all()[2]
+        update_images_order([
+            ImageOrder(image_id=first_image.id, order=test_image.order),
+            ImageOrder(image_id=test_image.id, order=first_image.order),
+        ])
+
+        realty_cards = {realty.slug: realty for realty in get_realty_listing_cards(Realty.objects.all())}
+
+        self.assertEqual(realty_cards['realty-1'].cover_image.name, test_image.image.name)
+        self.assertEqual(
+            realty_cards['image-test'].cover_image.name,
+            Realty.objects.get(slug='image-test').images.first().image.name,
+        )
+
+    def test_get_realty_listing_cards_constant_queries_count(self):
+        """get_realty_listing_cards() fetches data for any number of cards with the same number of queries."""
+        wifi = Amenity.objects.create(name='wifi')
+        kitchen = Amenity.objects.create(name='kitchen')
+        for realty in Realty.objects.all():
+            realty.amenities.add(wifi, kitchen)
+
+        for realty_count in (1, 2):
+            with self.assertNumQueries(2):  # realty with locations and cover images + amenities
+                for realty in get_realty_listing_cards(Realty.objects.all())[:realty_count]:
+                    self.assertTrue(realty.location.street)
+                    self.assertTrue(realty.cover_image.url)
+                    self.assertListEqual([amenity.name for amenity in realty.amenities.all()], ['kitchen', 'wifi'])
+
 
 class RealtyServicesOrderTests(SimpleTestCase):
     def test_convert_response_to_orders(self):
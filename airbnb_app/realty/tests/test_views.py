@@ -1,3 +1,4 @@
+import gzip
 import json
 import shutil
 import tempfile
@@ -5,22 +6,36 @@ from unittest import mock
 
 import fakeredis
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from accounts.models import CustomUser
 from addresses.forms import AddressForm
 from addresses.models import Address
 from common.collections import FormWithModel
-from common.services import get_keys_with_prefixes, get_required_fields_from_form_with_model
+from common.constants import PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER
+from common.services import (
+    get_cache_versions, get_etag, get_keys_with_prefixes, get_required_fields_from_form_with_model,
+)
 from common.session_handler import SessionHandler
-from common.testing_utils import create_valid_image
+from common.testing_utils import create_local_s3_storage, create_valid_image
 from hosts.models import RealtyHost
 
 from .. import views
-from ..constants import MAX_REALTY_IMAGES_COUNT, REALTY_FORM_KEYS_COLLECTOR_NAME, REALTY_FORM_SESSION_PREFIX
-from ..forms import RealtyForm, RealtyGeneralInfoForm, RealtyImageFormSet, RealtyTypeForm
+from ..constants import (
+    MAX_REALTY_IMAGES_COUNT, REALTY_FORM_KEYS_COLLECTOR_NAME, REALTY_FORM_SESSION_PREFIX,
+    REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER, REALTY_VISITS_COUNT_KEY,
+)
+from ..forms import RealtyForm, RealtyGeneralInfoForm, RealtyImageFormSet, RealtyTypeForm, get_facet_counts_text
 from ..models import Amenity, Realty, RealtyImage, RealtyTypeChoices
+from ..services.cache import get_realty_version_key
+from ..services.realty import update_realty_visits_from_redis
+from ..services.realty_view import refresh_realty_view
 
 
 MEDIA_ROOT = tempfile.mkdtemp()
@@ -269,6 +284,42 @@ class RealtyListViewTests(TestCase):
         self.assertEqual(response.context['meta_description'], "List of places in All cities")
         self.assertIsInstance(response.context['realty_type_form'], RealtyTypeForm)
 
+    def test_realty_facets(self):
+        """Test that filter forms show realty counts of the filtered realty."""
+        response = self.client.get(reverse('realty:all_by_city', kwargs={'city_slug': 'moscow'}))
+
+        self.assertEqual(response.context['realty_facets'].realty_type[RealtyTypeChoices.APARTMENTS], 4)
+        self.assertContains(response, 'Hotel (1)')
+        self.assertContains(response, 'Apartments (4)')
+        # beds and guests buckets and price histogram
+        realty_facets = response.context['realty_facets']
+        self.assertContains(response, get_facet_counts_text(realty_facets.beds_count))
+        self.assertContains(response, get_facet_counts_text(realty_facets.guests_count))
+        self.assertContains(response, f"$0-49: {realty_facets.price_per_night['0-49']}")
+
+    def test_realty_facets_exclude_own_filter(self):
+        """Test that realty type counts don't depend on the selected realty types."""
+        response = self.client.get(
+            reverse('realty:all_by_city', kwargs={'city_slug': 'moscow'}), {'realty_type': RealtyTypeChoices.HOTEL},
+        )
+
+        self.assertEqual(response.context['realty_facets'].realty_type[RealtyTypeChoices.APARTMENTS], 4)
+        self.assertContains(response, 'Apartments (4)')
+
+    @override_settings(REALTY_VIEW_ENABLED=True)
+    @mock.patch('realty.services.realty_view.redis_instance',
+                fakeredis.FakeStrictRedis(server=fakeredis.FakeServer(), charset="utf-8", decode_responses=True))
+    def test_realty_list_from_realty_view(self):
+        """Test that realty are listed from the realty materialized view if it is enabled."""
+        refresh_realty_view()
+
+        response = self.client.get(reverse('realty:all_by_city', kwargs={'city_slug': 'rome'}))
+
+        self.assertQuerysetEqual(
+            response.context['realty_list'], ['Realty 3'], transform=lambda realty: realty.name,
+        )
+        self.assertContains(response, 'Apartments in Via Condotti, 2')
+
     def test_pagination_is_three(self):
         """Test that results are paginated by 3 elements per page."""
         response = self.client.get(reverse('realty:all'))
@@ -277,6 +328,25 @@ class RealtyListViewTests(TestCase):
         self.assertTrue(response.context['is_paginated'])
         self.assertEqual(len(response.context['realty_list']), 3)
 
+    def test_keyset_pagination_if_cursor_param(self):
+        """Test that results are paginated by cursors if there is a `cursor` query parameter."""
+        response = self.client.get(f"{reverse('realty:all')}?cursor=")
+        page = response.context['page_obj']
+        next_response = self.client.get(f"{reverse('realty:all')}?cursor={page.next_cursor}")
+
+        self.assertTrue(response.context['is_paginated'])
+        self.assertListEqual(
+            [*response.context['realty_list'], *next_response.context['realty_list']],
+            list(Realty.available.order_by('-created', '-id')),
+        )
+        self.assertFalse(page.has_previous())
+        self.assertTrue(next_response.context['page_obj'].has_previous())
+
+    def test_keyset_pagination_invalid_cursor(self):
+        """Test that view returns 404 if the `cursor` query parameter is invalid."""
+        response = self.client.get(f"{reverse('realty:all')}?cursor=invalid")
+        self.assertEqual(response.status_code, 404)
+
     def test_get_queryset_if_no_query_params(self):
         """Test that if there are no query parameters in the URL, queryset includes all available realty objects."""
         response = self.client.get(reverse('realty:all'))
@@ -298,6 +368,18 @@ class RealtyListViewTests(TestCase):
             transform=lambda x: x,
         )
 
+    def test_get_queryset_if_amenities_query_params(self):
+        """Test that if there are `amenities` query parameters, queryset includes only realty with all amenities."""
+        wifi, kitchen = Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen')
+        Realty.objects.get(name='Realty 1').amenities.add(wifi)
+        Realty.objects.get(name='Realty 4').amenities.add(wifi, kitchen)
+
+        response = self.client.get(reverse('realty:all'), {'amenities': [wifi.pk, kitchen.pk]})
+
+        self.assertQuerysetEqual(
+            response.context['realty_list'], ['Realty 4'], transform=lambda realty: realty.name,
+        )
+
     def test_view_url_accessible_by_name_with_city_arg(self):
         """Test that url (with additional args) is accessible by its name."""
         response = self.client.get(reverse('realty:all_by_city', kwargs={'city_slug': 'moscow'}))
@@ -394,6 +476,8 @@ class RealtyDetailViewTests(TestCase):
             transform=lambda x: x,
         )
 
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_view_url_accessible_by_name(self):
@@ -403,6 +487,8 @@ class RealtyDetailViewTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_view_uses_correct_template(self):
@@ -412,6 +498,21 @@ class RealtyDetailViewTests(TestCase):
 
         self.assertTemplateUsed(response, 'realty/realty/detail.html')
 
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_view_queries_count(self):
+        """Test that view fetches realty with all related objects in a fixed number of queries."""
+        test_realty: Realty = Realty.objects.get(slug='realty-1')
+        test_realty.amenities.add(Amenity.objects.create(name='wifi'), Amenity.objects.create(name='kitchen'))
+
+        # realty with location and host (user, profile) + images + amenities
+        with self.assertNumQueries(3):
+            self.client.get(reverse('realty:detail', kwargs={'pk': test_realty.pk, 'slug': test_realty.slug}))
+
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     @mock.patch('realty.services.realty.redis_instance',
                 fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
     def test_correct_context_data(self):
@@ -431,6 +532,435 @@ class RealtyDetailViewTests(TestCase):
         # views count should change
         self.assertEqual(int(response.context['realty_views_count']), 4)
 
+    @mock.patch('common.services.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    @mock.patch('realty.services.realty.redis_instance',
+                fakeredis.FakeStrictRedis(server=redis_server, charset="utf-8", decode_responses=True))
+    def test_bot_visits_are_not_counted(self):
+        """Test that visits from bots aren't counted."""
+        fakeredis.FakeStrictRedis(server=self.redis_server, charset="utf-8", decode_responses=True).flushall()
+        test_realty: Realty = Realty.objects.get(slug='realty-1')
+        url = reverse('realty:detail', kwargs={'pk': test_realty.pk, 'slug': test_realty.slug})
+
+        self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0 (compatible; bingbot/2.0)')
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0 (compatible; Googlebot/2.1)')
+
+        self.assertEqual(int(response.context['realty_views_count']), 0)
+
+
+PAGE_CACHE_REDIS_SERVER = fakeredis.FakeServer()
+
+
+@override_settings(
+    PAGE_CACHE_ENABLED=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'page_cache_tests'}},
+)
+@mock.patch('common.services.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cache.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cities.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.realty.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+class RealtyPageCacheTests(TestCase):
+    def setUp(self) -> None:
+        fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True).flushall()
+        cache.clear()
+
+        self.test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        test_location = Address.objects.create(
+            country='Russia',
+            city='Moscow',
+            street='Arbat, 20',
+        )
+        self.test_realty = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.HOTEL,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=test_location,
+            host=RealtyHost.objects.create(user=self.test_user),
+        )
+        self.detail_url = reverse('realty:detail', kwargs={'pk': self.test_realty.pk, 'slug': self.test_realty.slug})
+
+    def test_detail_page_served_from_cache(self):
+        """Test that detail page is served from the cache without DB queries, visits count is up to date."""
+        self.client.get(self.detail_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+
+        self.assertContains(response, 'Realty 1')
+        self.assertContains(response, '2 views')
+        self.assertNotContains(response, REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER)
+        self.assertNotContains(response, PAGE_CACHE_CSRF_TOKEN_PLACEHOLDER)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+    def test_detail_page_visits_count_after_flush(self):
+        """Test that cached detail page isn't invalidated by visits flush, visits count is still up to date."""
+        self.client.get(self.detail_url)
+        update_realty_visits_from_redis()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+
+        self.assertContains(response, '2 views')
+
+    def test_detail_page_invalidated_on_realty_change(self):
+        """Test that cached detail page is invalidated after the realty has been changed."""
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_realty.name = 'New realty name'
+            self.test_realty.save()
+        response = self.client.get(self.detail_url)
+
+        self.assertContains(response, 'New realty name')
+
+    def test_list_page_cache_key_query_params(self):
+        """Test that list pages are cached by normalized query params."""
+        self.client.get(f"{reverse('realty:all')}?realty_type=Hotel&beds_count=1")
+
+        with self.assertNumQueries(0):
+            self.client.get(f"{reverse('realty:all')}?beds_count=1&realty_type=Hotel&utm_source=test")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{reverse('realty:all')}?realty_type=House")
+        self.assertTrue(queries.captured_queries)
+
+    def test_page_cache_not_used_for_authenticated_users(self):
+        """Test that pages of authenticated users aren't cached."""
+        self.client.get(self.detail_url)
+        self.client.login(email='user1@gmail.com', password='test')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.detail_url)
+
+        self.assertTrue(queries.captured_queries)
+        self.assertEqual(int(response.context['realty_views_count']), 2)
+
+
+@mock.patch('common.services.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cache.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cities.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.realty.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+class RealtyConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True).flushall()
+
+        test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        test_location = Address.objects.create(
+            country='Russia',
+            city='Moscow',
+            street='Arbat, 20',
+        )
+        self.test_realty = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.HOTEL,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=test_location,
+            host=RealtyHost.objects.create(user=test_user),
+        )
+        self.detail_url = reverse('realty:detail', kwargs={'pk': self.test_realty.pk, 'slug': self.test_realty.slug})
+        self.api_detail_url = reverse('api:realty_detail', kwargs={'pk': self.test_realty.pk})
+
+    def test_detail_page_not_modified(self):
+        """Test that detail page is answered with 304 without DB queries if ETag matches, visit is counted."""
+        response = self.client.get(self.detail_url)
+        self.assertTrue(response.has_header('ETag'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(self.detail_url)
+        self.assertEqual(int(response.context['realty_views_count']), 3)
+
+    def test_detail_page_not_modified_unavailable_realty(self):
+        """Test that replayed ETag of the realty, that has become unavailable, doesn't count a visit."""
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_realty.is_available = False
+            self.test_realty.save()
+        etag = get_etag([
+            settings.RELEASE_VERSION,
+            [self.test_realty.pk, get_cache_versions([get_realty_version_key(self.test_realty.pk)]), None, False],
+        ])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        redis = fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True)
+        self.assertEqual(redis.hget(REALTY_VISITS_COUNT_KEY, str(self.test_realty.pk)), '1')
+
+    def test_detail_page_etag_of_other_realty(self):
+        """Test that ETag of the realty detail page doesn't match detail page of other realty."""
+        etag = self.client.get(self.detail_url)['ETag']
+        other_realty = Realty.objects.create(
+            name='Realty 2',
+            description='Desc 2',
+            is_available=True,
+            realty_type=RealtyTypeChoices.HOTEL,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=Address.objects.create(country='Russia', city='Moscow', street='Arbat, 22'),
+            host=self.test_realty.host,
+        )
+
+        response = self.client.get(
+            reverse('realty:detail', kwargs={'pk': other_realty.pk, 'slug': other_realty.slug}),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_page_etag_changed_on_realty_change(self):
+        """Test that detail page ETag changes after the realty has been changed."""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_realty.name = 'New realty name'
+            self.test_realty.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_page_etag_changed_on_host_profile_change(self):
+        """Test that detail page ETag changes after the profile of the realty host has been changed."""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            test_profile = self.test_realty.host.user.profile
+            test_profile.description = 'New description'
+            test_profile.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_page_etag_changed_on_release(self):
+        """Test that detail page ETag changes after a new version of the code has been released."""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with override_settings(RELEASE_VERSION='new-release'):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_page_etag_changed_after_login(self):
+        """Test that detail page ETag depends on the current user."""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.login(email='user1@gmail.com', password='test')
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_list_not_modified(self):
+        """Test that realty API list is answered with 304 if ETag matches."""
+        url = reverse('api:realty_list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(f"{url}?page=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_detail_not_modified(self):
+        """Test that realty API detail is answered with 304 if ETag or Last-Modified matches."""
+        response = self.client.get(self.api_detail_url)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            etag_response = self.client.get(self.api_detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        last_modified_response = self.client.get(
+            self.api_detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+        self.assertEqual(etag_response.status_code, 304)
+        self.assertEqual(last_modified_response.status_code, 304)
+
+    def test_api_detail_etag_changed_on_amenities_change(self):
+        """Test that realty API detail ETag changes after amenities of the realty have been changed."""
+        etag = self.client.get(self.api_detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.test_realty.amenities.add(Amenity.objects.create(name='wifi'))
+        response = self.client.get(self.api_detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_detail_not_found(self):
+        """Test that realty API detail of unavailable realty returns 404."""
+        Realty.objects.filter(pk=self.test_realty.pk).update(is_available=False)
+
+        response = self.client.get(self.api_detail_url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@mock.patch('realty.services.cache.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+@mock.patch('realty.services.cities.redis_instance',
+            fakeredis.FakeStrictRedis(server=PAGE_CACHE_REDIS_SERVER, charset="utf-8", decode_responses=True))
+class RealtyBulkCreateApiViewTests(TestCase):
+    def setUp(self) -> None:
+        self.test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        self.test_user.is_email_confirmed = True
+        self.test_user.save()
+        self.test_user.profile.profile_image = 'upload/images/user/1/avatar.png'
+        self.test_user.profile.save()
+        self.url = reverse('api:realty_bulk_create')
+        self.realty_data = [
+            {
+                'name': f'Realty {index}',
+                'description': 'Desc',
+                'is_available': True,
+                'realty_type': RealtyTypeChoices.HOUSE,
+                'beds_count': 1,
+                'max_guests_count': 2,
+                'price_per_night': 40,
+                'location': {'country': 'Russia', 'city': 'Moscow', 'street': f'Arbat, {index}'},
+                'amenities': ['wifi'],
+            }
+            for index in range(2)
+        ]
+
+    def test_realty_created(self):
+        """Test that all realty are created for the host of the current user."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.realty_data, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([realty['name'] for realty in response.json()], ['Realty 0', 'Realty 1'])
+        self.assertEqual(response.json()[0]['amenities'], [{'id': Amenity.objects.get().id, 'name': 'wifi'}])
+        self.assertEqual(Realty.objects.filter(host__user=self.test_user).count(), 2)
+
+    def test_nothing_created_if_any_realty_invalid(self):
+        """Test that no realty is created if there is an invalid realty in the list."""
+        self.client.login(email='user1@gmail.com', password='test')
+        self.realty_data[1]['beds_count'] = 100
+
+        response = self.client.post(self.url, self.realty_data, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('beds_count', response.json()[1])
+        self.assertFalse(Realty.objects.exists())
+
+    def test_empty_list(self):
+        """Test that an empty list is invalid."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        response = self.client.post(self.url, [], content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_anonymous_user(self):
+        """Test that anonymous users can't create realty."""
+        response = self.client.post(self.url, self.realty_data, content_type='application/json')
+
+        self.assertIn(response.status_code, (401, 403))
+        self.assertFalse(Realty.objects.exists())
+
+
+class RealtyExportApiViewTests(TestCase):
+    def setUp(self) -> None:
+        test_user = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        for index in range(2):
+            Realty.objects.create(
+                name=f'Realty {index}',
+                description='Desc',
+                is_available=True,
+                realty_type=RealtyTypeChoices.HOTEL,
+                beds_count=1,
+                max_guests_count=2,
+                price_per_night=40,
+                location=Address.objects.create(country='Russia', city='Moscow', street=f'Arbat, {index}'),
+                host=RealtyHost.objects.get_or_create(user=test_user)[0],
+            )
+
+    def test_ndjson_export(self):
+        """Test that all available realty are streamed as NDJSON."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        response = self.client.get(reverse('api:realty_export', kwargs={'export_format': 'ndjson'}))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Realty 0', 'Realty 1'])
+
+    def test_csv_gzip_export(self):
+        """Test that realty are streamed as a compressed CSV file."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        response = self.client.get(
+            reverse('api:realty_export', kwargs={'export_format': 'csv'}), {'compression': 'gzip'},
+        )
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('realty.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_invalid_params(self):
+        """Test that unsupported formats and compressions are rejected."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        format_response = self.client.get(reverse('api:realty_export', kwargs={'export_format': 'xml'}))
+        compression_response = self.client.get(
+            reverse('api:realty_export', kwargs={'export_format': 'csv'}), {'compression': 'zip'},
+        )
+
+        self.assertEqual(format_response.status_code, 404)
+        self.assertEqual(compression_response.status_code, 400)
+
+    def test_anonymous_user(self):
+        """Test that anonymous users can't export realty."""
+        response = self.client.get(reverse('api:realty_export', kwargs={'export_format': 'csv'}))
+
+        self.assertIn(response.status_code, (401, 403))
+
 
 @override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class RealtyEditViewTests(TestCase):
@@ -1775,3 +2305,119 @@ class RealtyImageOrderViewTests(TestCase):
         # new order
         self.assertEqual(self.image1.order, 1)
         self.assertEqual(self.image2.order, 0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DIRECT_UPLOADS_ENABLED=True)
+class RealtyImageDirectUploadViewsTests(TestCase):
+    def setUp(self) -> None:
+        test_user1 = CustomUser.objects.create_user(
+            email='user1@gmail.com',
+            first_name='John',
+            last_name='Doe',
+            password='test',
+        )
+        CustomUser.objects.create_user(
+            email='user2@gmail.com',
+            first_name='Jane',
+            last_name='Doe',
+            password='test',
+        )
+        test_location1 = Address.objects.create(
+            country='Russia',
+            city='Moscow',
+            street='Arbat, 20',
+        )
+        self.test_realty1 = Realty.objects.create(
+            name='Realty 1',
+            description='Desc 1',
+            is_available=True,
+            realty_type=RealtyTypeChoices.APARTMENTS,
+            beds_count=1,
+            max_guests_count=2,
+            price_per_night=40,
+            location=test_location1,
+            host=RealtyHost.objects.create(user=test_user1),
+        )
+        self.upload_url = reverse('realty:image_upload', kwargs={'realty_id': self.test_realty1.id})
+        self.confirm_url = reverse('realty:image_upload_confirm', kwargs={'realty_id': self.test_realty1.id})
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)  # delete temp media dir
+        super().tearDownClass()
+
+    def test_upload_image(self):
+        """Host of the realty gets a presigned POST for uploading an image directly to the storage."""
+        self.client.login(email='user1@gmail.com', password='test')
+
+        with mock.patch.object(RealtyImage._meta.get_field('image'), 'storage', create_local_s3_storage()):
+            response = self.client.post(
+                path=self.upload_url,
+                data=json.dumps({'content_type': 'image/jpeg'}),
+                content_type='application/json',
+            )
+            invalid_response = self.client.post(
+                path=self.upload_url,
+                data=json.dumps({'content_type': 'text/html'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        direct_upload = response.json()
+        self.assertTrue(direct_upload['name'].startswith(f"upload/images/realty/{self.test_realty1.id}/"))
+        self.assertEqual(direct_upload['fields']['key'], f"media/{direct_upload['name']}")
+        self.assertEqual(invalid_response.status_code, 400)
+
+    def test_upload_image_not_available(self):
+        """Direct uploads are available for hosts of the realty and S3 storages only."""
+        self.client.login(email='user2@gmail.com', password='test')
+        with mock.patch.object(RealtyImage._meta.get_field('image'), 'storage', create_local_s3_storage()):
+            response = self.client.post(
+                path=self.upload_url,
+                data=json.dumps({'content_type': 'image/jpeg'}),
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 404)
+
+        self.client.login(email='user1@gmail.com', password='test')
+        response = self.client.post(
+            path=self.upload_url,
+            data=json.dumps({'content_type': 'image/jpeg'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch('realty.views.is_realty_image_direct_upload_enabled', return_value=True)
+    def test_confirm_image_upload(self, *args):
+        """Realty image is created once the image has been uploaded to the storage (local stand-in of the bucket)."""
+        self.client.login(email='user1@gmail.com', password='test')
+        image_name = f"upload/images/realty/{self.test_realty1.id}/image.png"
+
+        response = self.client.post(
+            path=self.confirm_url,
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RealtyImage.objects.exists())
+
+        storage = RealtyImage._meta.get_field('image').storage
+        storage.save(image_name, ContentFile(create_valid_image('image.png').read()))
+        response = self.client.post(
+            path=self.confirm_url,
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        realty_image = RealtyImage.objects.get(realty=self.test_realty1)
+        self.assertEqual(realty_image.image.name, image_name)
+        self.assertEqual(response.json(), {'id': realty_image.id, 'url': realty_image.image.url})
+
+        # image can't be confirmed twice
+        response = self.client.post(
+            path=self.confirm_url,
+            data=json.dumps({'name': image_name}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(RealtyImage.objects.count(), 1)
@@ -28,6 +28,12 @@ urlpatterns = [
 
     # Images
     path('image/order/', views.RealtyImageOrderView.as_view(), name='image_change_order'),
+    path('<int:realty_id>/image/upload/', views.RealtyImageUploadView.as_view(), name='image_upload'),
+    path(
+        route='<int:realty_id>/image/upload/confirm/',
+        view=views.RealtyImageUploadConfirmView.as_view(),
+        name='image_upload_confirm',
+    ),
 
     # Sitemap
     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
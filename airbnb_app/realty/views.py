@@ -1,40 +1,61 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from braces.views import JsonRequestResponseMixin
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpRequest
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest
 from django.shortcuts import get_object_or_404, redirect, reverse
+from django.template.loader import render_to_string
 from django.views import generic
 
 from addresses.forms import AddressForm
 from addresses.models import Address
-from common.collections import FormWithModel
-from common.services import get_field_names_from_form, get_keys_with_prefixes, get_required_fields_from_form_with_model
+from common.collections import CachedPage, FormWithModel
+from common.mixins import AnonymousPageCacheMixin, ConditionalGetMixin, KeysetPaginationMixin
+from common.pagination import WindowCountPaginator
+from common.services import (
+    get_cache_versions, get_field_names_from_form, get_keys_with_prefixes, get_required_fields_from_form_with_model,
+    get_visitor_id, is_bot_or_prefetch_request,
+)
 from common.session_handler import SessionHandler
 from hosts.models import RealtyHost
 
-from .constants import MAX_REALTY_IMAGES_COUNT, REALTY_FORM_KEYS_COLLECTOR_NAME, REALTY_FORM_SESSION_PREFIX
+from .constants import (
+    MAX_REALTY_IMAGES_COUNT, REALTY_CURSOR_QUERY_PARAM, REALTY_FORM_KEYS_COLLECTOR_NAME, REALTY_FORM_SESSION_PREFIX,
+    REALTY_KEYSET_PAGINATION_ORDERING, REALTY_LIST_VERSION_KEY, REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER,
+)
 from .filters import RealtyShortFilter
 from .forms import (
     RealtyDescriptionForm, RealtyFiltersForm, RealtyForm, RealtyGeneralInfoForm, RealtyImageFormSet, RealtyTypeForm,
 )
 from .mixins import RealtySessionDataRequiredMixin
-from .models import CustomDeleteQueryset, Realty, RealtyImage
-from .services.images import get_images_by_realty_id, update_images_order
+from .models import CustomDeleteQueryset, Realty, RealtyImage, RealtyView
+from .services.cache import (
+    get_city_version_key, get_realty_detail_page_city, get_realty_version_key, set_realty_detail_page_city,
+)
+from .services.facets import RealtyFacets, RealtyFacetsFilters, get_cached_realty_facets
+from .services.images import (
+    confirm_realty_image_upload, create_realty_image_upload, get_images_by_realty_id,
+    is_realty_image_direct_upload_enabled, update_images_order,
+)
 from .services.order import convert_response_to_orders
 from .services.realty import (
-    get_all_available_realty, get_amenity_ids_from_session, get_available_realty_by_city_slug,
-    get_available_realty_filtered_by_type, get_available_realty_search_results,
-    get_cached_realty_visits_count_by_realty_id, get_or_create_realty_host_by_user, update_realty_visits_count,
+    get_amenity_ids_from_session, get_available_realty_filtered_by_type, get_available_realty_listing,
+    get_available_realty_search_results, get_available_realty_with_details, get_or_create_realty_host_by_user,
+    get_realty_listing_cards, get_realty_visits_count, update_realty_visits_count,
 )
 
 
 class RealtySearchResultsView(generic.ListView):
     model = Realty
     template_name = 'realty/realty/search_results.html'
+    context_object_name = 'realty_list'  # realty may be read from `RealtyView`
     realty_type_form: RealtyTypeForm = None
     realty_filters_form: RealtyFiltersForm = None
+    realty_filter: RealtyShortFilter = None
+    realty_types: List[str] = None
+    filtered_realty: 'QuerySet[Union[Realty, RealtyView]]' = None
 
     def dispatch(self, request, *args, **kwargs):
         self.realty_type_form = RealtyTypeForm()
@@ -42,40 +63,64 @@ class RealtySearchResultsView(generic.ListView):
         return super(RealtySearchResultsView, self).dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        realty_search_results = get_available_realty_search_results(self.request.GET.get('q', None))
+        realty_search_results = get_available_realty_search_results(
+            self.request.GET.get('q', None), realty_qs=get_available_realty_listing(),
+        )
 
-        realty_types: List[str] = self.request.GET.getlist('realty_type', None)
-        if realty_types:
-            realty_search_results = get_available_realty_filtered_by_type(
-                realty_types=realty_types,
-                realty_qs=realty_search_results,
-            )
+        self.realty_filter = RealtyShortFilter(self.request.GET, realty_search_results)
+        self.filtered_realty = self.realty_filter.qs
 
-        realty_search_results = RealtyShortFilter(self.request.GET, realty_search_results).qs
+        self.realty_types = self.request.GET.getlist('realty_type', None)
+        if self.realty_types:
+            self.filtered_realty = get_available_realty_filtered_by_type(
+                realty_types=self.realty_types,
+                realty_qs=self.filtered_realty,
+            )
 
-        return realty_search_results
+        return get_realty_listing_cards(self.filtered_realty)
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super(RealtySearchResultsView, self).get_context_data(**kwargs)
         search_query: str = self.request.GET.get('q')
 
         context['search_query'] = search_query
-        context['realty_count'] = self.get_queryset().count()
+        # search results aren't paginated, so evaluate them once and reuse the result cache in the template
+        context['realty_count'] = len(self.object_list)
+        context['realty_facets'] = self.get_realty_facets()
         context['realty_type_form'] = self.realty_type_form
         context['realty_filters_form'] = self.realty_filters_form
         context['meta_description'] = f"Search results for `{search_query}`"
 
         return context
 
+    def get_realty_facets(self) -> RealtyFacets:
+        """Get realty counts of the filters over the search results, filter forms get counts in their labels."""
+        realty_facets = get_cached_realty_facets(
+            self.realty_filter.get_facets_queryset(), self.request.GET, filters=self.get_realty_facets_filters(),
+        )
+        self.realty_type_form.set_facet_counts(realty_facets)
+        self.realty_filters_form.set_facet_counts(realty_facets)
+        return realty_facets
+
+    def get_realty_facets_filters(self) -> RealtyFacetsFilters:
+        return RealtyFacetsFilters(realty_types=self.realty_types or (), **self.realty_filter.get_facet_filter_values())
 
-class RealtyListView(generic.ListView):
+
+class RealtyListView(AnonymousPageCacheMixin, KeysetPaginationMixin, generic.ListView):
     """Display all available realty objects."""
 
     model = Realty
     template_name = 'realty/realty/list.html'
+    context_object_name = 'realty_list'  # realty may be read from `RealtyView`
     paginate_by = 3
+    paginator_class = WindowCountPaginator
+    keyset_ordering = REALTY_KEYSET_PAGINATION_ORDERING
+    cursor_query_param = REALTY_CURSOR_QUERY_PARAM
     realty_type_form: RealtyTypeForm = None
     realty_filters_form: RealtyFiltersForm = None
+    realty_filter: RealtyShortFilter = None
+    realty_types: List[str] = None
+    filtered_realty: 'QuerySet[Union[Realty, RealtyView]]' = None
 
     def dispatch(self, request, *args, **kwargs):
         self.realty_type_form = RealtyTypeForm()
@@ -83,29 +128,28 @@ class RealtyListView(generic.ListView):
         return super(RealtyListView, self).dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        available_realty = get_all_available_realty()
+        available_realty = get_available_realty_listing(city_slug=self.kwargs.get('city_slug', None))
 
-        city_slug: str = self.kwargs.get('city_slug', None)
-        if city_slug:
-            available_realty = get_available_realty_by_city_slug(city_slug=city_slug)
+        self.realty_filter = RealtyShortFilter(data=self.request.GET, queryset=available_realty)
+        self.filtered_realty = self.realty_filter.qs
 
-        realty_types: List[str] = self.request.GET.getlist('realty_type', None)
-        if realty_types:
-            available_realty = get_available_realty_filtered_by_type(
-                realty_types=realty_types,
-                realty_qs=available_realty,
+        self.realty_types = self.request.GET.getlist('realty_type', None)
+        if self.realty_types:
+            self.filtered_realty = get_available_realty_filtered_by_type(
+                realty_types=self.realty_types,
+                realty_qs=self.filtered_realty,
             )
 
-        available_realty = RealtyShortFilter(data=self.request.GET, queryset=available_realty).qs
-
-        return available_realty
+        return get_realty_listing_cards(self.filtered_realty)
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super(RealtyListView, self).get_context_data(**kwargs)
         city_slug = self.kwargs.get('city_slug', 'All cities')
         city: str = city_slug.capitalize()
 
-        context['realty_count'] = self.get_queryset().count()
+        context['realty_count'] = context['paginator'].count
+        context['is_realty_count_estimated'] = context['paginator'].is_count_estimated
+        context['realty_facets'] = self.get_realty_facets()
         context['city'] = city
         context['meta_description'] = f"List of places in {city}"
         context['realty_type_form'] = self.realty_type_form
@@ -113,29 +157,101 @@ class RealtyListView(generic.ListView):
 
         return context
 
+    def get_realty_facets(self) -> RealtyFacets:
+        """Get realty counts of the filters over the filtered realty, filter forms get counts in their labels."""
+        realty_facets = get_cached_realty_facets(
+            self.realty_filter.get_facets_queryset(), self.request.GET, city_slug=self.kwargs.get('city_slug', None),
+            filters=self.get_realty_facets_filters(),
+        )
+        self.realty_type_form.set_facet_counts(realty_facets)
+        self.realty_filters_form.set_facet_counts(realty_facets)
+        return realty_facets
+
+    def get_realty_facets_filters(self) -> RealtyFacetsFilters:
+        return RealtyFacetsFilters(realty_types=self.realty_types or (), **self.realty_filter.get_facet_filter_values())
 
-class RealtyDetailView(generic.DetailView):
+    def get_page_cache_version_keys(self) -> List[str]:
+        city_slug: Optional[str] = self.kwargs.get('city_slug', None)
+        if city_slug:
+            return [get_city_version_key(city_slug)]
+        return [REALTY_LIST_VERSION_KEY]
+
+
+class RealtyDetailView(ConditionalGetMixin, AnonymousPageCacheMixin, generic.DetailView):
     """Display a single available Realty."""
 
     model = Realty
     template_name = 'realty/realty/detail.html'
-    queryset = get_all_available_realty()
+    queryset = get_available_realty_with_details()
 
     def get(self, request: HttpRequest, *args, **kwargs):
-        update_realty_visits_count(self.get_object().id)
-        return super(RealtyDetailView, self).get(request, *args, **kwargs)
+        self.object: Realty = self.get_object()
+        set_realty_detail_page_city(self.object.id, self.object.location.city)
+        self.update_visits_count(self.object.id, self.object.location.city)
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
 
     def get_context_data(self, **kwargs):
         context = super(RealtyDetailView, self).get_context_data(**kwargs)
-        realty_object: Realty = self.get_object()
 
-        context['realty_views_count'] = (
-                realty_object.visits_count +
-                get_cached_realty_visits_count_by_realty_id(realty_id=realty_object.id)
-        )
+        if self.is_page_cache_used:
+            # visits count changes on every request, so it is spliced into the cached page
+            context['realty_views_count_placeholder'] = REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER
+        else:
+            context['realty_views_count'] = self.get_realty_views_count(self.object.id, self.object.visits_count)
 
         return context
 
+    def get_etag_data(self) -> list:
+        # doesn't hit the DB, so requests served from the page cache stay DB-free
+        return [
+            self.kwargs['pk'],
+            get_cache_versions([get_realty_version_key(self.kwargs['pk'])]),
+            self.request.user.pk,
+            getattr(self.request, 'is_mobile_agent', False),
+        ]
+
+    def handle_not_modified(self) -> None:
+        if is_bot_or_prefetch_request(self.request):
+            return
+        # ETag may be replayed against any realty, so only realty that has been rendered since its last change counts
+        city = get_realty_detail_page_city(self.kwargs['pk'])
+        if city is not None:
+            self.update_visits_count(self.kwargs['pk'], city)
+
+    def get_page_cache_version_keys(self) -> List[str]:
+        return [get_realty_version_key(self.kwargs['pk'])]
+
+    def get_page_cache_data(self) -> dict:
+        return {
+            'realty_id': self.object.id,
+            'city': self.object.location.city,
+            'visits_count': self.object.visits_count,
+        }
+
+    def handle_cached_page(self, cached_page: CachedPage) -> None:
+        self.update_visits_count(cached_page.data['realty_id'], cached_page.data['city'])
+
+    def splice_page_cache_content(self, cached_page: CachedPage) -> str:
+        content = super(RealtyDetailView, self).splice_page_cache_content(cached_page)
+        realty_views_count = self.get_realty_views_count(
+            cached_page.data['realty_id'], cached_page.data['visits_count'],
+        )
+        return content.replace(
+            REALTY_VIEWS_COUNT_PAGE_CACHE_PLACEHOLDER,
+            render_to_string(
+                'realty/realty/components/views_count.html', {'realty_views_count': realty_views_count},
+            ),
+        )
+
+    def update_visits_count(self, realty_id: int, city: Optional[str] = None) -> None:
+        if not is_bot_or_prefetch_request(self.request):
+            update_realty_visits_count(realty_id, visitor_id=get_visitor_id(self.request), city=city)
+
+    @staticmethod
+    def get_realty_views_count(realty_id: int, visits_count: int) -> int:
+        return get_realty_visits_count(realty_id, visits_count)
+
 
 class RealtyEditView(
     LoginRequiredMixin,
@@ -222,6 +338,7 @@ class RealtyEditView(
                 'is_creating_new_realty': self.is_creating_new_realty,
                 'realty_images': self.realty_images,
                 'max_realty_images_count': MAX_REALTY_IMAGES_COUNT,
+                'is_direct_upload_enabled': is_realty_image_direct_upload_enabled(),
             },
         )
 
@@ -269,6 +386,7 @@ class RealtyEditView(
                 'is_creating_new_realty': self.is_creating_new_realty,
                 'realty_images': self.realty_images,
                 'max_realty_images_count': MAX_REALTY_IMAGES_COUNT,
+                'is_direct_upload_enabled': is_realty_image_direct_upload_enabled(),
             },
         )
 
@@ -451,3 +569,66 @@ class RealtyImageOrderView(
                 'saved': 'OK',
             },
         )
+
+
+class RealtyImageDirectUploadMixin:
+    """Mixin for views of the direct (browser -> storage) upload of RealtyImages.
+
+    Only the host of the realty can upload its images.
+    """
+
+    realty: Realty = None
+
+    def dispatch(self, request: HttpRequest, realty_id: int, *args, **kwargs):
+        if not is_realty_image_direct_upload_enabled():
+            raise Http404
+        self.realty = get_object_or_404(Realty, id=realty_id, host__user=request.user)
+        return super(RealtyImageDirectUploadMixin, self).dispatch(request, realty_id, *args, **kwargs)
+
+    def is_max_images_count_reached(self) -> bool:
+        return get_images_by_realty_id(self.realty.id).count() >= MAX_REALTY_IMAGES_COUNT
+
+
+class RealtyImageUploadView(
+    LoginRequiredMixin,
+    RealtyImageDirectUploadMixin,
+    JsonRequestResponseMixin,
+    generic.View,
+):
+    """View for issuing a presigned POST, that uploads a RealtyImage directly to the storage."""
+
+    require_json = True
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        if self.is_max_images_count_reached():
+            return self.render_bad_request_response({'errors': ['Max images count has been reached']})
+        try:
+            direct_upload = create_realty_image_upload(self.realty, content_type=self.request_json.get('content_type'))
+        except ValueError as error:
+            return self.render_bad_request_response({'errors': [str(error)]})
+        return self.render_json_response(context_dict=direct_upload._asdict())
+
+
+class RealtyImageUploadConfirmView(
+    LoginRequiredMixin,
+    RealtyImageDirectUploadMixin,
+    JsonRequestResponseMixin,
+    generic.View,
+):
+    """View for creating a RealtyImage, that has been uploaded directly to the storage."""
+
+    require_json = True
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        if self.is_max_images_count_reached():
+            return self.render_bad_request_response({'errors': ['Max images count has been reached']})
+        new_image = confirm_realty_image_upload(self.realty, image_name=str(self.request_json.get('name', '')))
+        if new_image is None:
+            return self.render_bad_request_response({'errors': ['Image has not been uploaded']})
+        return self.render_json_response(
+            context_dict={
+                'id': new_image.id,
+                'url': new_image.image.url,
+            },
+            status=201,
+        )
@@ -1,3 +1,7 @@
+from unittest import mock
+
+import fakeredis
+
 from django.test import TestCase
 from django.urls import reverse
 
@@ -15,6 +19,8 @@ class SubscribeViewTests(TestCase):
             password='test',
         )
 
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(charset="utf-8", decode_responses=True))
     def test_subscribe_success_if_not_logged_in(self):
         """Test that `AnonymousUser` can subscribe to the newsletter."""
         form_data = {
@@ -25,6 +31,8 @@ class SubscribeViewTests(TestCase):
         self.assertRedirects(response, reverse('home_page'))
         self.assertTrue(Subscriber.objects.filter(email=form_data['email']).exists())
 
+    @mock.patch('realty.services.cities.redis_instance',
+                fakeredis.FakeStrictRedis(charset="utf-8", decode_responses=True))
     def test_subscribe_success_if_logged_in(self):
         """Test that authenticated user can subscribe to the newsletter."""
         test_user = CustomUser.objects.get(email='user1@gmail.com')
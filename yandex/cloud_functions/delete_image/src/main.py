@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import functools
+import itertools
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Callable, Final, NamedTuple, TypedDict, Union
+from typing import TYPE_CHECKING, Any, Callable, Final, Iterable, Iterator, NamedTuple, TypedDict, Union
 
 import boto3
 from botocore.config import Config
@@ -107,6 +110,16 @@ YANDEX_AWS_ACCESS_KEY_ID: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AW
 YANDEX_AWS_SECRET_ACCESS_KEY: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AWS_ACCESS_KEY_SECRET")
 YANDEX_AWS_DEFAULT_REGION: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AWS_DEFAULT_REGION")
 
+# S3 `DeleteObjects` accepts up to 1000 keys per request
+DELETE_OBJECTS_BATCH_SIZE: Final[int] = 1000
+DELETE_OBJECTS_MAX_WORKERS: Final[int] = int(os.environ.get("DELETE_IMAGE_DELETE_OBJECTS_MAX_WORKERS", 4))
+
+# renditions of the `image.jpg` are stored as `<size>/image.jpg` and `<size>/image.jpg.webp`
+RESIZED_IMAGE_FORMAT_SUFFIXES: Final[tuple[str, ...]] = (
+    "",
+    ".webp",
+)
+
 
 class FileInfo(NamedTuple):
     initial_object_key: str
@@ -127,29 +140,76 @@ def parse_object_key(*, object_key: str) -> FileInfo:
     return file_info
 
 
-def delete_resized_image(*, file_info: FileInfo) -> None:
-    bucket_name = YANDEX_OBJECT_STORAGE_BUCKET
+@functools.lru_cache(maxsize=None)
+def get_s3_client():
+    """S3 client is created once per function instance and reused by warm invocations."""
     s3_config = Config(
         region_name=YANDEX_AWS_DEFAULT_REGION,
     )
 
     session = boto3.session.Session()
-    s3 = session.client(
+    return session.client(
         service_name="s3",
         endpoint_url="https://storage.yandexcloud.net",
         aws_access_key_id=YANDEX_AWS_ACCESS_KEY_ID,
         aws_secret_access_key=YANDEX_AWS_SECRET_ACCESS_KEY,
         config=s3_config,
     )
-    response = s3.list_objects_v2(Bucket=bucket_name, Prefix=file_info.base_filepath)
-    objects = response.get("Contents", [])
-    objects_to_delete = [
-        {'Key': s3_object['Key']}
-        for s3_object in objects
-        if s3_object['Key'].endswith(file_info.filename) and s3_object['Key'] != file_info.initial_object_key
-    ]
-    if len(objects_to_delete) > 0:
-        s3.delete_objects(Bucket=bucket_name, Delete={'Objects': objects_to_delete})
+
+
+def get_resized_image_object_keys(*, s3, bucket_name: str, file_info: FileInfo) -> Iterator[str]:
+    """Get keys of the resized images of the file.
+
+    Resized images are stored as `<base_filepath><size>/<filename>`, so only size "directories" are listed
+    (as common prefixes, page by page), and keys of the file renditions are built exactly,
+    keys of the other files in the same directories aren't transferred.
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    pages = paginator.paginate(Bucket=bucket_name, Prefix=file_info.base_filepath, Delimiter="/")
+    for page in pages:
+        for common_prefix in page.get("CommonPrefixes", []):
+            for format_suffix in RESIZED_IMAGE_FORMAT_SUFFIXES:
+                object_key = f"{common_prefix['Prefix']}{file_info.filename}{format_suffix}"
+                if object_key != file_info.initial_object_key:
+                    yield object_key
+
+
+def iter_batches(items: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def delete_objects_batch(*, s3, bucket_name: str, object_keys: list[str]) -> list[str]:
+    """Delete up to `DELETE_OBJECTS_BATCH_SIZE` objects, keys that haven't been deleted are returned."""
+    response = s3.delete_objects(
+        Bucket=bucket_name,
+        Delete={
+            'Objects': [{'Key': object_key} for object_key in object_keys],
+            'Quiet': True,  # only errors are returned, missing keys are not errors
+        },
+    )
+    return [error['Key'] for error in response.get('Errors', [])]
+
+
+def delete_resized_image(*, file_info: FileInfo, s3=None) -> list[str]:
+    """Delete resized images of the file.
+
+    Keys are deleted in batches of `DELETE_OBJECTS_BATCH_SIZE`,
+    batches are submitted concurrently, while the next pages are being listed.
+
+    Returns:
+        list[str]: keys that haven't been deleted
+    """
+    bucket_name = YANDEX_OBJECT_STORAGE_BUCKET
+    s3 = s3 or get_s3_client()
+    object_keys = get_resized_image_object_keys(s3=s3, bucket_name=bucket_name, file_info=file_info)
+    with ThreadPoolExecutor(max_workers=DELETE_OBJECTS_MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(delete_objects_batch, s3=s3, bucket_name=bucket_name, object_keys=batch)
+            for batch in iter_batches(object_keys, DELETE_OBJECTS_BATCH_SIZE)
+        ]
+    return [object_key for future in futures for object_key in future.result()]
 
 
 def handler(event: ObjectStorageEvent, context: Context) -> dict[str, Any]:
@@ -168,15 +228,28 @@ def handler(event: ObjectStorageEvent, context: Context) -> dict[str, Any]:
                 'error': 'Error: `Event` must contain `messages` list.',
             }),
         }
+    not_deleted_keys = []
     for message in messages:
         try:
             object_id = message['details']['object_id']
         except KeyError:
             continue
-        delete_resized_image(
-            file_info=parse_object_key(object_key=object_id),
+        not_deleted_keys.extend(
+            delete_resized_image(
+                file_info=parse_object_key(object_key=object_id),
+            ),
         )
 
+    if not_deleted_keys:
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': 'Error: some resized images have not been deleted.',
+                'context': {
+                    'keys': not_deleted_keys,
+                },
+            }),
+        }
     return {
         'statusCode': 200,
         'body': json.dumps({
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Iterator
+from unittest import TestCase, mock
+
+from src.main import DELETE_OBJECTS_BATCH_SIZE, delete_resized_image, handler, parse_object_key
+
+
+class InMemoryS3Client:
+    """Local stand-in of the S3 client, that supports listing (with pagination) and batch deletion."""
+
+    max_keys = 1000
+
+    def __init__(self, keys: list[str]):
+        self.keys = set(keys)
+        self.list_requests_count = 0
+        self.delete_batch_sizes: list[int] = []
+        self.failing_keys: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get_paginator(self, operation_name: str) -> InMemoryS3Client:
+        assert operation_name == "list_objects_v2"
+        return self
+
+    def paginate(self, *, Bucket: str, Prefix: str, Delimiter: str) -> Iterator[dict[str, Any]]:  # noqa: N803
+        entries = set()
+        for key in self.keys:
+            if not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix):]
+            entries.add(Prefix + rest.split(Delimiter, 1)[0] + Delimiter if Delimiter in rest else key)
+
+        entries = sorted(entries)
+        for page_start in range(0, max(len(entries), 1), self.max_keys):
+            self.list_requests_count += 1
+            page_entries = entries[page_start:page_start + self.max_keys]
+            yield {
+                "Contents": [{"Key": entry} for entry in page_entries if not entry.endswith(Delimiter)],
+                "CommonPrefixes": [{"Prefix": entry} for entry in page_entries if entry.endswith(Delimiter)],
+            }
+
+    def delete_objects(self, *, Bucket: str, Delete: dict[str, Any]) -> dict[str, Any]:  # noqa: N803
+        object_keys = [s3_object["Key"] for s3_object in Delete["Objects"]]
+        if len(object_keys) > self.max_keys:
+            raise ValueError("MalformedXML: more than 1000 keys in a single request")
+        with self._lock:
+            self.delete_batch_sizes.append(len(object_keys))
+            errors = [{"Key": object_key} for object_key in object_keys if object_key in self.failing_keys]
+            self.keys.difference_update(set(object_keys) - self.failing_keys)
+        return {"Errors": errors} if errors else {}
+
+
+class DeleteImageTests(TestCase):
+    sizes_count = 1500
+
+    def setUp(self) -> None:
+        keys = ["media/upload/images/realty/1/image.jpg"]
+        for size_index in range(1, self.sizes_count + 1):
+            size_prefix = f"resized/upload/images/realty/1/{size_index}x{size_index}/"
+            keys.extend([f"{size_prefix}image.jpg", f"{size_prefix}image.jpg.webp", f"{size_prefix}other_image.jpg"])
+            keys.extend(f"{size_prefix}image_{file_index}.jpg" for file_index in range(10))
+            keys.extend(f"resized/upload/images/realty/2/{size_index}x{size_index}/image_{i}.jpg" for i in range(4))
+        self.s3 = InMemoryS3Client(keys)
+        self.other_keys = {
+            key
+            for key in keys
+            if not key.endswith(("/image.jpg", "/image.jpg.webp")) or key.startswith("media/")
+        }
+
+    def test_delete_resized_image(self):
+        """delete_resized_image() deletes renditions of the file only, in batches of 1000 keys."""
+        file_info = parse_object_key(object_key="media/upload/images/realty/1/image.jpg")
+        self.assertGreater(len(self.s3.keys), 20_000)
+
+        not_deleted_keys = delete_resized_image(file_info=file_info, s3=self.s3)
+
+        self.assertListEqual(not_deleted_keys, [])
+        self.assertSetEqual(self.s3.keys, self.other_keys)
+        self.assertEqual(self.s3.list_requests_count, 2)  # 1500 sizes -> 2 pages
+        self.assertListEqual(sorted(self.s3.delete_batch_sizes), [DELETE_OBJECTS_BATCH_SIZE] * 3)
+
+    def test_delete_resized_image_errors(self):
+        """handler() returns keys that haven't been deleted, so the trigger retries the deletion."""
+        failing_key = "resized/upload/images/realty/1/10x10/image.jpg"
+        self.s3.failing_keys.add(failing_key)
+        event = {"messages": [{"details": {"object_id": "media/upload/images/realty/1/image.jpg"}}]}
+
+        with mock.patch("src.main.get_s3_client", return_value=self.s3):
+            response = handler(event, context=None)
+
+        self.assertEqual(response["statusCode"], 500)
+        self.assertIn(failing_key, response["body"])
+        self.assertSetEqual(self.s3.keys, self.other_keys | {failing_key})
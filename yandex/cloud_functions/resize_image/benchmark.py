@@ -0,0 +1,125 @@
+"""Local benchmark of the image resizing.
+
+Measures resize latency and peak memory per target size on a corpus of images (e.g. real listing photos):
+
+    python benchmark.py path/to/photos --repeat 3
+
+Every configuration (size, format, draft mode) runs in a separate process,
+so peak RSS of the process is the peak memory of the configuration.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import pathlib
+import resource
+import statistics
+import sys
+import time
+from typing import NamedTuple
+
+from src.main import (
+    PILLOW_IMAGE_DEFAULT_FORMAT, PILLOW_IMAGE_WEBP_FORMAT, PILLOW_IMAGE_WEBP_SUPPORTED, RESIZE_IMAGE_VALID_SIZES,
+    VALID_EXTENSIONS, resize_image_content,
+)
+
+
+class BenchmarkConfig(NamedTuple):
+    target_size: str
+    target_format: str
+    use_draft: bool
+
+
+class BenchmarkResult(NamedTuple):
+    config: BenchmarkConfig
+    latencies_ms: list[float]
+    peak_memory_mb: float
+    output_size_kb: float
+
+
+def get_peak_rss_mb() -> float:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is in bytes on macOS and in kilobytes on Linux
+    return peak_rss / 1024 / 1024 if sys.platform == "darwin" else peak_rss / 1024
+
+
+def run_config(config: BenchmarkConfig, image_paths: list[pathlib.Path], repeat: int) -> BenchmarkResult:
+    target_width, target_height = map(int, config.target_size.split("x"))
+    contents = [image_path.read_bytes() for image_path in image_paths]
+    baseline_memory_mb = get_peak_rss_mb()
+
+    latencies_ms, output_sizes = [], []
+    for _ in range(repeat):
+        for content in contents:
+            started_at = time.perf_counter()
+            resized_content = resize_image_content(
+                content=content,
+                target_width=target_width,
+                target_height=target_height,
+                target_format=config.target_format,
+                use_draft=config.use_draft,
+            )
+            latencies_ms.append((time.perf_counter() - started_at) * 1000)
+            output_sizes.append(len(resized_content))
+
+    return BenchmarkResult(
+        config=config,
+        latencies_ms=latencies_ms,
+        peak_memory_mb=get_peak_rss_mb() - baseline_memory_mb,
+        output_size_kb=statistics.mean(output_sizes) / 1024,
+    )
+
+
+def percentile(values: list[float], percent: int) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(percent / 100 * (len(values) - 1)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark image resizing on a corpus of images.")
+    parser.add_argument("corpus_dir", type=pathlib.Path, help="directory with the source images")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=RESIZE_IMAGE_VALID_SIZES,
+        help="target sizes, e.g. 300x200 (`RESIZE_IMAGE_VALID_SIZES` by default)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="how many times every image is resized")
+    args = parser.parse_args()
+
+    image_paths = sorted(
+        path
+        for path in args.corpus_dir.iterdir()
+        if path.suffix.lower().lstrip(".") in VALID_EXTENSIONS
+    )
+    if not image_paths:
+        parser.error(f"`{args.corpus_dir}` doesn't contain images, valid extensions: `{VALID_EXTENSIONS}`")
+
+    target_formats = [PILLOW_IMAGE_DEFAULT_FORMAT]
+    if PILLOW_IMAGE_WEBP_SUPPORTED:
+        target_formats.append(PILLOW_IMAGE_WEBP_FORMAT)
+    else:
+        print("Pillow is built without WebP support, WebP is skipped")
+
+    configs = [
+        BenchmarkConfig(target_size=target_size, target_format=target_format, use_draft=use_draft)
+        for target_size in args.sizes
+        for target_format in target_formats
+        for use_draft in (False, True)
+    ]
+    context = multiprocessing.get_context("spawn")
+    print(f"{len(image_paths)} images, {args.repeat} repeats")
+    print(f"{'size':>9} {'format':>6} {'draft':>5} {'p50, ms':>8} {'p95, ms':>8} {'peak, MB':>9} {'output, KB':>10}")
+    for config in configs:
+        # a new process per config, so peak memory of the previous configs isn't counted
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            result: BenchmarkResult = pool.apply(run_config, (config, image_paths, args.repeat))
+        print(
+            f"{config.target_size:>9} {config.target_format:>6} {str(config.use_draft):>5} "
+            f"{statistics.median(result.latencies_ms):>8.1f} {percentile(result.latencies_ms, 95):>8.1f} "
+            f"{result.peak_memory_mb:>9.1f} {result.output_size_kb:>10.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 #!/bin/bash
 source ./.env
 
+# sizes of the renditions are defined once, by the Django app
+RESIZE_IMAGE_VALID_SIZES=$(python3 -c "import runpy; print(','.join(runpy.run_path('../../../airbnb_app/main/constants.py')['IMAGE_RENDITION_SIZES']))")
+
 function create_cloud_function {
     yc serverless function create \
       --name="$YANDEX_FUNCTION_RESIZE_IMAGE_NAME" \
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import base64
+import functools
 import json
 import os
 import re
@@ -10,7 +11,7 @@ from typing import TYPE_CHECKING, Any, Callable, Final, NamedTuple, TypedDict, U
 
 import boto3
 from botocore.config import Config
-from PIL import Image
+from PIL import Image, features
 
 
 if TYPE_CHECKING:
@@ -78,6 +79,8 @@ VALID_EXTENSIONS: Final[tuple[str, ...]] = (
     "jpg",
     "png",
 )
+# built-in copy of the Django app sizes (`main.constants.IMAGE_RENDITION_SIZES`),
+# used if the function has been deployed without `RESIZE_IMAGE_VALID_SIZES` (e.g. not by `deploy.sh`) or runs locally
 DEFAULT_VALID_RESIZE_FORMATS: Final[tuple[str, ...]] = (
     "32x33",
     "56x56",
@@ -86,12 +89,32 @@ DEFAULT_VALID_RESIZE_FORMATS: Final[tuple[str, ...]] = (
     "250x200",
     "300x200",
     "306x204",
+    "500x400",
+    "600x400",
+    "900x600",
 )
 PILLOW_IMAGE_CONVERSATION_REQUIRED_MODS: Final[tuple[str, ...]] = (
     "RGBA",
     "P",
 )
 PILLOW_IMAGE_DEFAULT_FORMAT: Final[str] = "jpeg"
+PILLOW_IMAGE_WEBP_FORMAT: Final[str] = "webp"
+PILLOW_IMAGE_WEBP_SUPPORTED: Final[bool] = features.check(PILLOW_IMAGE_WEBP_FORMAT)
+PILLOW_IMAGE_CONTENT_TYPES: Final[dict[str, str]] = {
+    PILLOW_IMAGE_DEFAULT_FORMAT: "image/jpeg",
+    PILLOW_IMAGE_WEBP_FORMAT: "image/webp",
+}
+PILLOW_IMAGE_SAVE_OPTIONS: Final[dict[str, dict[str, Any]]] = {
+    PILLOW_IMAGE_DEFAULT_FORMAT: {
+        "quality": 75,
+        "optimize": True,
+        "progressive": True,
+    },
+    PILLOW_IMAGE_WEBP_FORMAT: {
+        "quality": 75,
+        "method": 4,
+    },
+}
 
 
 YANDEX_OBJECT_STORAGE_MEDIA_RESIZED_PREFIX: Final[str] = os.environ.get(
@@ -106,9 +129,12 @@ YANDEX_OBJECT_STORAGE_BUCKET: Final[str] = os.environ.get("YANDEX_FUNCTION_RESIZ
 YANDEX_AWS_ACCESS_KEY_ID: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AWS_ACCESS_KEY_ID")
 YANDEX_AWS_SECRET_ACCESS_KEY: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AWS_ACCESS_KEY_SECRET")
 YANDEX_AWS_DEFAULT_REGION: Final[str] = os.environ.get("YANDEX_CLOUD_FUNCTIONS_AWS_DEFAULT_REGION")
-RESIZE_IMAGE_VALID_SIZES: tuple[str, ...] | list[str] = os.environ.get("RESIZE_IMAGE_VALID_SIZES", "").split(".")
-if not RESIZE_IMAGE_VALID_SIZES:
-    RESIZE_IMAGE_VALID_SIZES = DEFAULT_VALID_RESIZE_FORMATS
+# sizes are defined by the Django app (`main.constants.IMAGE_RENDITION_SIZES`) and passed on deploy (see `deploy.sh`)
+RESIZE_IMAGE_VALID_SIZES: Final[tuple[str, ...]] = tuple(
+    size
+    for size in os.environ.get("RESIZE_IMAGE_VALID_SIZES", "").split(",")
+    if size
+) or DEFAULT_VALID_RESIZE_FORMATS
 
 
 class FileInfo(NamedTuple):
@@ -116,34 +142,50 @@ class FileInfo(NamedTuple):
     target_object_key: str
     target_width: int
     target_height: int
+    target_format: str
     filename: str
 
 
 def parse_object_key(*, object_key: str) -> FileInfo:
+    """Parse key of the resized image.
+
+    WebP rendition is requested by the `.webp` suffix after the initial filename (e.g., `300x200/image.jpg.webp`),
+    renditions are stored by their keys, so the format can't be negotiated by the `Accept` header.
+    """
     groups = re.search(r'((\d+)x(\d+))/(.*)', object_key).groups()
+    filename = groups[3]
+    target_format = PILLOW_IMAGE_DEFAULT_FORMAT
+    webp_suffix = f".{PILLOW_IMAGE_WEBP_FORMAT}"
+    if filename.lower().endswith(webp_suffix) and "." in filename[:-len(webp_suffix)]:
+        filename = filename[:-len(webp_suffix)]
+        target_format = PILLOW_IMAGE_WEBP_FORMAT
     initial_object_key = (
         object_key
         .replace(f"{groups[0]}/", "")
         .replace(YANDEX_OBJECT_STORAGE_MEDIA_RESIZED_PREFIX, YANDEX_OBJECT_STORAGE_MEDIA_PREFIX, 1)
     )
+    if target_format != PILLOW_IMAGE_DEFAULT_FORMAT:
+        initial_object_key = initial_object_key[:-len(webp_suffix)]
     file_info = FileInfo(
         target_object_key=object_key,
         initial_object_key=initial_object_key,
         target_width=int(groups[1]),
         target_height=int(groups[2]),
-        filename=groups[3],
+        target_format=target_format,
+        filename=filename,
     )
     return file_info
 
 
-def resize_image(*, file_info: FileInfo) -> dict[str, Any]:
-    bucket_name = YANDEX_OBJECT_STORAGE_BUCKET
+@functools.lru_cache(maxsize=None)
+def get_s3_client():
+    """S3 client is created once per function instance and reused by warm invocations."""
     s3_config = Config(
         region_name=YANDEX_AWS_DEFAULT_REGION,
     )
 
     session = boto3.session.Session()
-    s3 = session.client(
+    return session.client(
         service_name="s3",
         endpoint_url="https://storage.yandexcloud.net",
         aws_access_key_id=YANDEX_AWS_ACCESS_KEY_ID,
@@ -151,6 +193,35 @@ def resize_image(*, file_info: FileInfo) -> dict[str, Any]:
         config=s3_config,
     )
 
+
+def resize_image_content(
+        *,
+        content: bytes,
+        target_width: int,
+        target_height: int,
+        target_format: str = PILLOW_IMAGE_DEFAULT_FORMAT,
+        use_draft: bool = True,
+) -> bytes:
+    """Resize image to fit into the target size.
+
+    With `use_draft` JPEG images are decoded in reduced size (DCT scaling, down to 1/8),
+    that is still not smaller than the target size, so large downscales don't decode the full image.
+    """
+    image = Image.open(BytesIO(content))
+    if use_draft:
+        image.draft("RGB", (target_width, target_height))  # no-op for non-JPEG images
+    image.thumbnail(size=(target_width, target_height))
+    if image.mode in PILLOW_IMAGE_CONVERSATION_REQUIRED_MODS:
+        image = image.convert("RGB")
+    with BytesIO() as buffer:
+        image.save(buffer, target_format, **PILLOW_IMAGE_SAVE_OPTIONS[target_format])
+        return buffer.getvalue()
+
+
+def resize_image(*, file_info: FileInfo) -> dict[str, Any]:
+    bucket_name = YANDEX_OBJECT_STORAGE_BUCKET
+    s3 = get_s3_client()
+
     file_extension = file_info.filename.rsplit(".")[-1].lower()
     if file_extension not in VALID_EXTENSIONS:
         return {
@@ -175,31 +246,39 @@ def resize_image(*, file_info: FileInfo) -> dict[str, Any]:
             }),
         }
 
+    if file_info.target_format == PILLOW_IMAGE_WEBP_FORMAT and not PILLOW_IMAGE_WEBP_SUPPORTED:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({
+                "error": "WebP images are not supported.",
+            }),
+        }
+
     object_response = s3.get_object(
         Bucket=bucket_name,
         Key=file_info.initial_object_key,
     )
-    object_body = object_response['Body'].read()
-    image = Image.open(BytesIO(object_body))
-    image.thumbnail(size=(file_info.target_width, file_info.target_height))
-    with BytesIO() as buffer:
-        if image.mode in PILLOW_IMAGE_CONVERSATION_REQUIRED_MODS:
-            image = image.convert("RGB")
-        image.save(buffer, PILLOW_IMAGE_DEFAULT_FORMAT)
-        buffer.seek(0)
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=file_info.target_object_key,
-            Body=buffer,
-        )
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "image/jpeg",
-            },
-            "isBase64Encoded": True,
-            "body": base64.b64encode(buffer.getvalue()).decode(),
-        }
+    resized_content = resize_image_content(
+        content=object_response['Body'].read(),
+        target_width=file_info.target_width,
+        target_height=file_info.target_height,
+        target_format=file_info.target_format,
+    )
+    content_type = PILLOW_IMAGE_CONTENT_TYPES[file_info.target_format]
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=file_info.target_object_key,
+        Body=resized_content,
+        ContentType=content_type,
+    )
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": content_type,
+        },
+        "isBase64Encoded": True,
+        "body": base64.b64encode(resized_content).decode(),
+    }
 
 
 def handler(event: HttpEvent, context: Context) -> dict[str, Any]: